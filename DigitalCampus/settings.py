@@ -58,18 +58,24 @@ INSTALLED_APPS = [
     "payment",
     "melbac",
     'library',
+    "benchmarks",
 
     "django.contrib.humanize",
     'chatbot',
 ]
 
 MIDDLEWARE = [
+    "eduweb.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "eduweb.uploads.RequestSizeLimitMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "eduweb.sessions.SessionRefreshMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "eduweb.access.AccessContextMiddleware",
+    "eduweb.audit.AuditMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -108,9 +114,94 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Keep connections open between requests (seconds, 0 = per request)
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int) / 1000,
+        },
     }
 }
 
+# Applied to every new SQLite connection (eduweb.dbtuning)
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int),
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int),
+    "cache_size": config("SQLITE_CACHE_SIZE", default=-20000, cast=int),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+# Optional read-only connection for reporting views (PRAGMA query_only=ON).
+# Defaults to the same file as default (WAL lets it read while default
+# writes). Point DB_REPORTING_NAME at e.g. db_reporting.sqlite3 and run
+# `python manage.py reporting_snapshot` to test a separate replica locally.
+SQLITE_READ_ONLY_ALIASES = ()
+if config("DB_REPORTING_ALIAS", default=False, cast=bool):
+    DATABASES["reporting"] = {
+        **DATABASES["default"],
+        "NAME": config("DB_REPORTING_NAME", default=str(DATABASES["default"]["NAME"])),
+        "TEST": {"MIRROR": "default"},
+    }
+    SQLITE_READ_ONLY_ALIASES = ("reporting",)
+
+# Reads inside @reporting_view / use_reporting() go to "reporting" (eduweb.dbrouting)
+DATABASE_ROUTERS = ["eduweb.dbrouting.ReportingRouter"]
+# Raise instead of pinning to default when a reporting block writes
+REPORTING_STRICT = config("REPORTING_STRICT", default=False, cast=bool)
+
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+
+# Shared, worker-safe cache that needs no external service.
+#   file   → FileBasedCache under CACHE_LOCATION (default)
+#   db     → DatabaseCache table; run `python manage.py createcachetable` once
+#   locmem → per-process only, fine for local development
+CACHE_BACKEND = config("CACHE_BACKEND", default="file")
+CACHE_DEFAULT_TIMEOUT = config("CACHE_DEFAULT_TIMEOUT", default=300, cast=int)
+
+_CACHE_BACKENDS = {
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / "cache")),
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": config("CACHE_TABLE", default="eduweb_cache"),
+    },
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "digitalcampus",
+    },
+}
+
+CACHES = {
+    "default": {
+        **_CACHE_BACKENDS.get(CACHE_BACKEND, _CACHE_BACKENDS["file"]),
+        "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+        "KEY_PREFIX": "dc",
+        "OPTIONS": {"MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=20000, cast=int)},
+    }
+}
+
+# Anonymous public pages (eduweb.caching.cache_public_page)
+PAGE_CACHE_TIMEOUT = config("PAGE_CACHE_TIMEOUT", default=600, cast=int)
+
+# Buffered view/download counters (eduweb.counters)
+#   memory → per-process buffer (default)
+#   cache  → shared cache keys; needs a backend with atomic incr/decr
+COUNTER_BUFFER = config("COUNTER_BUFFER", default="memory")
+COUNTER_FLUSH_INTERVAL = config("COUNTER_FLUSH_INTERVAL", default=60, cast=int)
+COUNTER_FLUSH_THRESHOLD = config("COUNTER_FLUSH_THRESHOLD", default=500, cast=int)
+
+# Admin listings (eduweb.listing)
+#   prefix   → word-prefix search on indexed LOWER() columns (default)
+#   contains → substring search, full table scan
+ADMIN_SEARCH_MODE = config("ADMIN_SEARCH_MODE", default="prefix")
+ADMIN_STATS_CACHE_TIMEOUT = config("ADMIN_STATS_CACHE_TIMEOUT", default=60, cast=int)
+
 # --------------------------------------------------
 # PASSWORD VALIDATION
 # --------------------------------------------------
@@ -145,10 +236,77 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+# Uploaded files above this size are spooled to disk instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = config("FILE_UPLOAD_MAX_MEMORY_SIZE", default=2621440, cast=int)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Resumable chunked uploads (eduweb/uploads.py). The temp dir must be on
+# the same filesystem as MEDIA_ROOT so finished files are moved, not copied.
+UPLOAD_TEMP_DIR = config("UPLOAD_TEMP_DIR", default=str(BASE_DIR / "uploads_tmp"))
+UPLOAD_CHUNK_SIZE = config("UPLOAD_CHUNK_SIZE", default=8 * 1024 * 1024, cast=int)
+UPLOAD_MAX_VIDEO_SIZE = config("UPLOAD_MAX_VIDEO_SIZE", default=2048 * 1024 * 1024, cast=int)
+UPLOAD_EXPIRY = config("UPLOAD_EXPIRY", default=24 * 3600, cast=int)
+# Any request with a larger Content-Length is refused before it is read
+UPLOAD_MAX_REQUEST_SIZE = config("UPLOAD_MAX_REQUEST_SIZE", default=64 * 1024 * 1024, cast=int)
+
+# Protected files (eduweb/media.py) are permission-checked by Django and then
+# handed to the front server: "nginx" (X-Accel-Redirect to an internal
+# location aliasing MEDIA_ROOT), "sendfile" (X-Sendfile) or "" to stream
+# from Django with Range/ETag support.
+PROTECTED_MEDIA_BACKEND = config("PROTECTED_MEDIA_BACKEND", default="")
+PROTECTED_MEDIA_INTERNAL_URL = config("PROTECTED_MEDIA_INTERNAL_URL", default="/protected/")
+
+# Live feeds over Server-Sent Events (eduweb/events.py). Under WSGI each
+# open stream holds a worker for up to SSE_MAX_DURATION seconds, and under
+# Passenger a worker is a whole process (one request at a time), so WSGI
+# pages poll JSON unless streaming is opted into.
+#   auto   → stream under ASGI only, poll under WSGI
+#   stream → also stream under multithreaded WSGI servers; keep
+#            SSE_MAX_CONNECTIONS well below the threads per process
+#   poll   → JSON polling only
+SSE_MODE = config("SSE_MODE", default="auto")
+SSE_POLL_INTERVAL = config("SSE_POLL_INTERVAL", default=2, cast=int)
+SSE_HEARTBEAT = config("SSE_HEARTBEAT", default=15, cast=int)
+SSE_MAX_DURATION = config("SSE_MAX_DURATION", default=120, cast=int)
+SSE_MAX_CONNECTIONS = config("SSE_MAX_CONNECTIONS", default=20, cast=int)
+SSE_MAX_PER_USER = config("SSE_MAX_PER_USER", default=3, cast=int)
+SSE_RETRY_MS = config("SSE_RETRY_MS", default=3000, cast=int)
+
+# Audit trail (eduweb/audit.py). Entries are buffered per request and
+# written with one bulk_create when the response is done.
+#   db    → write to AuditLog (default)
+#   spool → append JSON lines to AUDIT_SPOOL_DIR from a background thread;
+#           load them with `python manage.py load_audit_spool` from cron
+AUDIT_MODE = config("AUDIT_MODE", default="db")
+AUDIT_SPOOL_DIR = config("AUDIT_SPOOL_DIR", default=str(BASE_DIR / "audit_spool"))
+
+# Months of audit log kept in the AuditLog table (plus the current one).
+# `python manage.py archive_audit_logs` moves older months into compressed
+# files in AUDIT_ARCHIVE_DIR; the audit log screens read both
+AUDIT_HOT_MONTHS = config("AUDIT_HOT_MONTHS", default=3, cast=int)
+AUDIT_ARCHIVE_DIR = config("AUDIT_ARCHIVE_DIR", default=str(BASE_DIR / "audit_archive"))
+
+# --------------------------------------------------
+# INSTRUMENTATION (eduweb.instrumentation)
+# --------------------------------------------------
+
+# Wall time, query count and DB time per URL name, exposed at /metrics/
+# (staff users, or "Authorization: Bearer <METRICS_TOKEN>" for scrapers).
+# Slow requests, requests over their query budget and N+1 loops are logged
+# with their most expensive queries.
+INSTRUMENTATION_ENABLED = config("INSTRUMENTATION_ENABLED", default=True, cast=bool)
+INSTRUMENTATION_SLOW_REQUEST_MS = config("INSTRUMENTATION_SLOW_REQUEST_MS", default=1000, cast=int)
+INSTRUMENTATION_REPEAT_THRESHOLD = config("INSTRUMENTATION_REPEAT_THRESHOLD", default=10, cast=int)
+# Most queries a view may run before it is logged as over budget
+INSTRUMENTATION_QUERY_BUDGETS = {
+    "students:dashboard": 25,
+    "students:grades": 15,
+    "students:progress": 15,
+    "management:dashboard": 30,
+}
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # --------------------------------------------------
 # DEFAULT PRIMARY KEY
 # --------------------------------------------------
@@ -181,12 +339,18 @@ LOGIN_REDIRECT_URL = "eduweb:apply"
 LOGOUT_REDIRECT_URL = "eduweb:index"
 
 SESSION_COOKIE_AGE = 1209600
-SESSION_SAVE_EVERY_REQUEST = True
+# Sliding expiry is refreshed at most every SESSION_REFRESH_INTERVAL seconds
+# by eduweb.sessions.SessionRefreshMiddleware instead of on every request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = config("SESSION_REFRESH_INTERVAL", default=300, cast=int)
 SESSION_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "Lax"
 
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Cache first, django_session as write-through source of truth; existing
+# db-engine sessions stay valid. Set to django.contrib.sessions.backends.db
+# to go back.
+SESSION_ENGINE = config("SESSION_ENGINE", default="eduweb.sessions")
 CSRF_COOKIE_HTTPONLY = False
 
 # --------------------------------------------------
@@ -213,6 +377,26 @@ STRIPE_SECRET_KEY = config("STRIPE_SECRET_KEY", default="")
 STRIPE_PUBLIC_KEY = config("STRIPE_PUBLIC_KEY", default="")
 STRIPE_WEBHOOK_SECRET = config("STRIPE_WEBHOOK_SECRET", default="")
 
+# Invoice PDFs (eduweb/invoices.py). Changing these details re-renders
+# invoices on their next download.
+INVOICE_COMPANY = {
+    "name": config("INVOICE_COMPANY_NAME", default="MIU Education"),
+    "address": config("INVOICE_COMPANY_ADDRESS", default="123 Education Street"),
+    "city": config("INVOICE_COMPANY_CITY", default="Learning City, LC 12345"),
+    "email": config("INVOICE_COMPANY_EMAIL", default="billing@miuedu.com"),
+    "phone": config("INVOICE_COMPANY_PHONE", default="+1 (555) 123-4567"),
+}
+# Render the invoice in the background as soon as a payment succeeds
+INVOICE_PRERENDER = config("INVOICE_PRERENDER", default=True, cast=bool)
+
+# Certificate PDFs (eduweb/certificates.py): optional TTF files per role;
+# reportlab's Times family is used for any role left empty
+CERTIFICATE_FONTS = {
+    "regular": config("CERTIFICATE_FONT_REGULAR", default=""),
+    "bold": config("CERTIFICATE_FONT_BOLD", default=""),
+    "script": config("CERTIFICATE_FONT_SCRIPT", default=""),
+}
+
 # --------------------------------------------------
 # CORS / CSRF
 # --------------------------------------------------
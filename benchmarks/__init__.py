@@ -0,0 +1,16 @@
+"""
+benchmarks — Latency, query and memory benchmarks of the hot pages.
+
+    python manage.py benchmark --seed 10k               # reseed, run, save JSON
+    python manage.py benchmark --only students: --iterations 50
+    python manage.py benchmark --compare benchmarks/baseline.json
+
+Each scenario (scenarios.py) requests one page through the Django test
+client as the user who would normally see it, over whatever data is in
+the database; ``--seed`` fills it first with seed_bulky_data at 1k, 10k or
+100k students. The runner (runner.py) records p50/p95 latency, queries
+and database time per request and the peak Python memory of one extra
+request, and writes them to benchmarks/results/. compare.py checks a
+result against a stored baseline and the command exits with an error
+when a scenario got slower, heavier or ran more queries.
+"""
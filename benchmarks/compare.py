@@ -0,0 +1,68 @@
+"""
+compare.py — Regressions of a benchmark result against a baseline.
+
+Latency and memory may grow by TOLERANCE (20 %) before they count, and
+latency also by NOISE_MS: on a page that takes 3 ms, 20 % is scheduler
+noise. Query counts are exact, so any extra query is a regression.
+Scenarios that are missing on either side are listed but never fail; a
+scenario that errors now but did not in the baseline always does.
+"""
+
+import json
+from dataclasses import dataclass
+
+TOLERANCE = 0.2
+NOISE_MS = 5.0
+NOISE_KIB = 64.0
+
+# metric → absolute slack on top of the relative tolerance (None: exact)
+METRICS = {
+    'p50_ms': NOISE_MS,
+    'p95_ms': NOISE_MS,
+    'queries': None,
+    'peak_kib': NOISE_KIB,
+}
+
+
+@dataclass
+class Change:
+    scenario: str
+    metric: str
+    before: float
+    after: float
+    regressed: bool
+
+    @property
+    def ratio(self):
+        return self.after / self.before if self.before else None
+
+
+def load(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def compare(baseline, current, tolerance=TOLERANCE):
+    """
+    (changes, missing, broken): a Change per metric of every scenario
+    measured in both results, the names of scenarios measured in only
+    one, and of those that error now but worked in the baseline.
+    """
+    before, after = baseline['scenarios'], current['scenarios']
+    changes, broken = [], []
+    for name in sorted(before.keys() & after.keys()):
+        if 'error' in after[name]:
+            if 'error' not in before[name]:
+                broken.append(name)
+            continue
+        for metric, slack in METRICS.items():
+            if metric not in before[name] or metric not in after[name]:
+                continue
+            old, new = before[name][metric], after[name][metric]
+            if slack is None:
+                regressed = new > old
+            else:
+                regressed = new > old * (1 + tolerance) + slack
+            changes.append(Change(name, metric, old, new, regressed))
+    missing = sorted(before.keys() ^ after.keys())
+    return changes, missing, broken
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from benchmarks import compare, runner, scenarios
+
+# Student accounts seeded per --seed scale factor
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+# Random seed of seed_bulky_data, so every run measures the same rows
+SEED = 1
+
+
+class Command(BaseCommand):
+    help = 'Time the hot pages (p50/p95, queries, peak memory) and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', choices=SCALES,
+                            help='Reseed the database first (seed_bulky_data deletes existing data)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per scenario')
+        parser.add_argument('--only', action='append', metavar='PREFIX',
+                            help='Run scenarios starting with PREFIX, e.g. students: (repeatable)')
+        parser.add_argument('--output', help='Results file (default: benchmarks/results/<time>.json)')
+        parser.add_argument('--compare', metavar='BASELINE', help='Fail on regressions against this file')
+        parser.add_argument('--against', metavar='RESULTS',
+                            help='With --compare: check this results file instead of running')
+        parser.add_argument('--tolerance', type=float, default=compare.TOLERANCE,
+                            help='Allowed relative growth of latency and memory (default 0.2)')
+
+    def handle(self, *args, **options):
+        if options['against']:
+            if not options['compare']:
+                raise CommandError('--against needs --compare')
+            results = compare.load(options['against'])
+        else:
+            results = self._run(options)
+        if options['compare']:
+            self._compare(compare.load(options['compare']), results, options['tolerance'])
+
+    def _run(self, options):
+        if options['seed']:
+            self.stdout.write(f"Seeding {options['seed']} students...")
+            call_command('seed_bulky_data', students=SCALES[options['seed']], bulk=True, seed=SEED,
+                         stdout=self.stdout)
+
+        results = {'meta': runner.meta(options['seed']), 'scenarios': {}}
+        self.stdout.write(
+            f"{results['meta']['students']} students · {options['iterations']} iterations "
+            f"· {options['warmup']} warm-up"
+        )
+        self.stdout.write(f"{'scenario':<32} {'p50':>8} {'p95':>8} {'queries':>8} {'db p50':>8} {'peak':>10}")
+        fixtures = scenarios.Fixtures()
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                for scenario in scenarios.select(options['only']):
+                    try:
+                        result = runner.run(scenario, fixtures, options['iterations'], options['warmup'])
+                    except CommandError:
+                        # Missing fixtures: nothing else can run either
+                        raise
+                    except Exception as exc:
+                        # A broken page is a result too; the other scenarios still run
+                        results['scenarios'][scenario.name] = {'error': f'{type(exc).__name__}: {exc}'}
+                        self.stdout.write(self.style.ERROR(
+                            f"{scenario.name:<32} {results['scenarios'][scenario.name]['error']}"
+                        ))
+                        continue
+                    results['scenarios'][scenario.name] = result
+                    self.stdout.write(
+                        f"{scenario.name:<32} {result['p50_ms']:>6.1f}ms {result['p95_ms']:>6.1f}ms "
+                        f"{result['queries']:>8} {result['db_p50_ms']:>6.1f}ms {result['peak_kib']:>7.0f}KiB"
+                    )
+        finally:
+            fixtures.cleanup()
+
+        path = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / 'results'
+                    / f"{timezone.now():%Y%m%d-%H%M%S}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+        return results
+
+    def _compare(self, baseline, results, tolerance):
+        changes, missing, broken = compare.compare(baseline, results, tolerance)
+        regressions = [change for change in changes if change.regressed] + broken
+        for change in changes:
+            if not change.regressed and change.after == change.before:
+                continue
+            ratio = f'{change.ratio:.2f}x' if change.ratio else 'new'
+            line = (f'{change.scenario:<32} {change.metric:<9} '
+                    f'{change.before:>9} → {change.after:<9} {ratio}')
+            self.stdout.write(self.style.ERROR(line) if change.regressed else line)
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f'{name}: only measured on one side, skipped'))
+        for name in broken:
+            self.stdout.write(self.style.ERROR(f"{name}: {results['scenarios'][name]['error']}"))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against the baseline')
+        self.stdout.write(self.style.SUCCESS(f'No regressions in {len(changes)} metric(s)'))
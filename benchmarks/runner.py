@@ -0,0 +1,103 @@
+"""
+runner.py — Times scenarios with the Django test client.
+
+Every scenario gets its own logged-in client and a few warm-up requests
+(sessions, caches and templates fill up as they would on a live worker),
+then ``iterations`` timed requests. Queries and their time are counted
+with eduweb.instrumentation.capture() around each request. Peak memory
+comes from one more request under tracemalloc, which would slow the timed
+ones down.
+"""
+
+import itertools
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from eduweb.instrumentation import capture
+
+_addresses = itertools.count(1)
+
+
+class UnexpectedStatus(Exception):
+    pass
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _call(client, scenario, fixtures):
+    path, data, kwargs = scenario.request(fixtures)
+    # A fresh address per request: the chatbot rate-limits by REMOTE_ADDR
+    n = next(_addresses)
+    kwargs.setdefault('REMOTE_ADDR', f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}')
+    with capture() as log:
+        start = time.perf_counter()
+        response = getattr(client, scenario.method)(path, data, **kwargs)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        response.close()
+        elapsed = time.perf_counter() - start
+    if response.status_code != scenario.status:
+        # A login redirect or an error page would make any number look good
+        raise UnexpectedStatus(f'{path} answered {response.status_code}, expected {scenario.status}')
+    return elapsed, log
+
+
+def run(scenario, fixtures, iterations=20, warmup=3):
+    """Metrics of one scenario (times in milliseconds, memory in KiB)."""
+    client = Client()
+    if scenario.user:
+        client.force_login(getattr(fixtures, scenario.user))
+    for _ in range(warmup):
+        _call(client, scenario, fixtures)
+
+    times, queries, db_times = [], [], []
+    for _ in range(iterations):
+        elapsed, log = _call(client, scenario, fixtures)
+        times.append(elapsed * 1000)
+        queries.append(log.count)
+        db_times.append(log.time * 1000)
+
+    tracemalloc.start()
+    try:
+        _call(client, scenario, fixtures)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(times, 50), 2),
+        'p95_ms': round(percentile(times, 95), 2),
+        'mean_ms': round(statistics.fmean(times), 2),
+        'max_ms': round(max(times), 2),
+        'queries': int(statistics.median_low(queries)),
+        'queries_max': max(queries),
+        'db_p50_ms': round(percentile(db_times, 50), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def meta(scale=None):
+    """What the numbers were measured on, stored next to them."""
+    return {
+        'created': timezone.now().isoformat(timespec='seconds'),
+        'scale': scale,
+        'students': User.objects.filter(profile__role='student').count(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+    }
@@ -0,0 +1,189 @@
+"""
+scenarios.py — The pages the benchmark requests, and who requests them.
+
+A Scenario names a URL and the fixture user it is requested as. ``url``
+and ``data`` are called with the Fixtures before every request (outside
+the timed part), so a scenario that consumes something (a quiz attempt)
+can make a fresh one each time.
+"""
+
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from chatbot.models import ChatSession
+from eduweb.models import (
+    CourseApplication, Enrollment, LibraryItem, Lesson, Quiz, QuizAttempt,
+)
+
+# Candidates checked for portal access when picking the student
+STUDENT_CANDIDATES = 50
+
+
+@dataclass
+class Scenario:
+    name: str
+    url: Callable
+    user: str = None                # Fixtures attribute, None for anonymous
+    method: str = 'get'
+    data: Callable = None
+    content_type: str = None
+    status: int = 200
+    extra: dict = field(default_factory=dict)
+
+    def request(self, fixtures):
+        """(path, data, kwargs) for one client call."""
+        data = self.data(fixtures) if self.data else None
+        kwargs = dict(self.extra)
+        if self.content_type:
+            kwargs['content_type'] = self.content_type
+            data = json.dumps(data)
+        return self.url(fixtures), data, kwargs
+
+
+# ─── 1. Fixtures ──────────────────────────────────────────────────────────────
+
+class Fixtures:
+    """Users and objects picked from the seeded data, looked up once."""
+
+    def __init__(self):
+        self._attempts = []
+
+    @staticmethod
+    def _missing(what):
+        raise CommandError(f'No {what} in the database; seed it first (benchmark --seed 1k).')
+
+    def _role(self, role):
+        user = (User.objects.filter(is_active=True, profile__role=role, profile__email_verified=True)
+                .order_by('pk').first())
+        return user or self._missing(f'verified {role} user')
+
+    @cached_property
+    def student(self):
+        """The portal-ready student with the most active enrollments."""
+        candidates = (
+            User.objects.filter(is_active=True, profile__role='student')
+            .annotate(active=Count('enrollments', filter=Q(enrollments__status='active')))
+            .filter(active__gt=0)
+            .order_by('-active', 'pk')[:STUDENT_CANDIDATES]
+        )
+        for user in candidates:
+            # The same application get_access() checks
+            application = CourseApplication.objects.filter(user_id=user.pk).first()
+            if application is not None and application.can_access_student_portal():
+                return user
+        return self._missing('enrolled student with portal access')
+
+    @cached_property
+    def finance(self):
+        return self._role('finance')
+
+    @cached_property
+    def admin(self):
+        return self._role('admin')
+
+    @cached_property
+    def lesson(self):
+        lesson = (
+            Lesson.objects.filter(
+                is_active=True,
+                course__enrollments__student=self.student,
+                course__enrollments__status='active',
+            )
+            .select_related('course').order_by('pk').first()
+        )
+        return lesson or self._missing("active lesson in the student's courses")
+
+    @cached_property
+    def quiz(self):
+        enrolled = Enrollment.objects.filter(student=self.student, status='active').values('course')
+        quiz = (
+            Quiz.objects.filter(is_active=True, lesson__course__in=enrolled)
+            .filter(questions__isnull=False).distinct().order_by('pk').first()
+        )
+        return quiz or self._missing("quiz with questions in the student's courses")
+
+    @cached_property
+    def quiz_answers(self):
+        """One answer per question, as posted by the quiz form."""
+        return {
+            f'question_{question.pk}': str(answer.pk)
+            for question in self.quiz.questions.prefetch_related('answers')
+            for answer in question.answers.all()[:1]
+        }
+
+    def quiz_attempt(self):
+        attempt = QuizAttempt.objects.create(quiz=self.quiz, student=self.student)
+        self._attempts.append(attempt.pk)
+        return attempt
+
+    @cached_property
+    def library_query(self):
+        """A word that matches some library items (any word when there are none)."""
+        title = LibraryItem.objects.filter(is_active=True).values_list('title', flat=True).first()
+        words = [word for word in (title or '').split() if len(word) > 3]
+        return words[0] if words else 'introduction'
+
+    @cached_property
+    def chat_session(self):
+        return ChatSession.objects.create(first_name='Benchmark', email='benchmark@example.com')
+
+    def cleanup(self):
+        """Remove what the scenarios created, so the next run starts from the same data."""
+        QuizAttempt.objects.filter(pk__in=self._attempts).delete()
+        if 'chat_session' in self.__dict__:
+            self.chat_session.delete()
+
+
+# ─── 2. Scenarios ─────────────────────────────────────────────────────────────
+
+SCENARIOS = [
+    Scenario('students:dashboard', lambda fx: reverse('students:dashboard'), user='student'),
+    Scenario('students:grades', lambda fx: reverse('students:grades'), user='student'),
+    Scenario('students:progress', lambda fx: reverse('students:progress'), user='student'),
+    Scenario('students:course_catalog', lambda fx: reverse('students:course_catalog'), user='student'),
+    Scenario(
+        'students:lesson_view',
+        lambda fx: reverse('students:lesson_view', args=[fx.lesson.course.slug, fx.lesson.slug]),
+        user='student',
+    ),
+    Scenario(
+        'students:quiz_submit',
+        lambda fx: reverse('students:quiz_submit', args=[fx.quiz_attempt().pk]),
+        user='student', method='post', data=lambda fx: fx.quiz_answers, status=302,
+    ),
+    Scenario('finance:dashboard', lambda fx: reverse('finance:dashboard'), user='finance'),
+    Scenario('management:users_list', lambda fx: reverse('management:users_list'), user='admin'),
+    Scenario('management:applications_list', lambda fx: reverse('management:applications_list'),
+             user='admin'),
+    Scenario('management:audit_logs_list', lambda fx: reverse('management:audit_logs_list'),
+             user='admin'),
+    Scenario(
+        'library:search',
+        lambda fx: f"{reverse('library:search')}?{urlencode({'q': fx.library_query})}",
+        user='student',
+    ),
+    Scenario(
+        'chatbot:send_message',
+        lambda fx: reverse('chatbot:send_message'),
+        method='post', content_type='application/json',
+        data=lambda fx: {'session_id': fx.chat_session.pk, 'message': 'How do I apply for a course?'},
+    ),
+]
+
+
+def select(only=None):
+    """Scenarios whose name starts with one of the ``only`` prefixes (all by default)."""
+    if not only:
+        return list(SCENARIOS)
+    chosen = [s for s in SCENARIOS if any(s.name.startswith(prefix) for prefix in only)]
+    if not chosen:
+        raise CommandError(f"No scenario matches {', '.join(only)}")
+    return chosen
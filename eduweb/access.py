@@ -0,0 +1,196 @@
+"""
+access.py — Per-request access context.
+
+Every authenticated page used to load request.user.profile in its decorator,
+then again in the context processors, plus one to three CourseApplication
+queries to decide portal access. AccessContextMiddleware now resolves all
+of that once per request as ``request.access``:
+
+    access = request.access            # lazy, nothing runs for anonymous pages
+    access.role, access.email_verified
+    access.application_pk, access.application_status   # the latest application
+    access.can_access_portal, access.has_pending_application   # any application
+
+The profile/application part is stored in the session together with the
+user's 'access:<id>' tag version (eduweb.caching), so following requests
+need no query at all. Saving or deleting the user's UserProfile or any of
+their CourseApplications bumps the tag and the next request recomputes.
+is_active / is_superuser / is_staff are always read live from request.user.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject
+
+from .caching import invalidate_tags, tag_versions
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = '_eduweb_access'
+# Bumped when _compute() changes shape, so stored contexts are rebuilt
+FORMAT = 2
+
+# Application statuses that count as "in progress" for the nav CTA
+PENDING_STATUSES = (
+    'draft', 'pending_payment', 'payment_complete',
+    'documents_uploaded', 'under_review',
+)
+
+
+def _tag(user_id):
+    return f'access:{user_id}'
+
+
+@dataclass(frozen=True)
+class AccessContext:
+    """Immutable snapshot of what the current user may access."""
+    user_id: int = None
+    is_authenticated: bool = False
+    is_active: bool = False
+    is_staff: bool = False
+    is_superuser: bool = False
+    has_profile: bool = False
+    role: str = ''
+    email_verified: bool = False
+    application_pk: int = None
+    application_status: str = ''
+    can_access_portal: bool = False
+    # Any of the user's applications is in progress, not just the latest
+    pending_application: bool = False
+
+    @property
+    def is_student(self):
+        return self.role == 'student'
+
+    @property
+    def has_application(self):
+        return self.application_pk is not None
+
+    @property
+    def has_pending_application(self):
+        return self.pending_application
+
+
+ANONYMOUS = AccessContext()
+
+
+def _compute(user):
+    """
+    Two or three small queries: the profile flags, the user's latest
+    application and, when that one is not pending, whether another is.
+    """
+    from .models import CourseApplication, UserProfile
+
+    profile = (
+        UserProfile.objects
+        .filter(user_id=user.pk)
+        .values('role', 'email_verified')
+        .first()
+    )
+    data = {
+        'has_profile': profile is not None,
+        'role': profile['role'] if profile else '',
+        'email_verified': bool(profile and profile['email_verified']),
+        'application_pk': None,
+        'application_status': '',
+        'can_access_portal': False,
+        'pending_application': False,
+    }
+
+    # Same row as CourseApplication.objects.filter(user=user).first()
+    application = CourseApplication.objects.filter(user_id=user.pk).first()
+    if application is not None:
+        data.update(
+            application_pk=application.pk,
+            application_status=application.status,
+            can_access_portal=bool(application.can_access_student_portal()),
+        )
+        data['pending_application'] = (
+            application.status in PENDING_STATUSES
+            or CourseApplication.objects.filter(user_id=user.pk, status__in=PENDING_STATUSES).exists()
+        )
+    return data
+
+
+def _load(request, user):
+    version = tag_versions([_tag(user.pk)])[_tag(user.pk)]
+    session = getattr(request, 'session', None)
+
+    stored = session.get(SESSION_KEY) if session is not None else None
+    if (stored and stored.get('user_id') == user.pk and stored.get('version') == version
+            and stored.get('format') == FORMAT):
+        return stored['data']
+
+    data = _compute(user)
+    if session is not None:
+        session[SESSION_KEY] = {'user_id': user.pk, 'version': version, 'format': FORMAT, 'data': data}
+    return data
+
+
+def get_access(request):
+    """Return the AccessContext for ``request``, computing it on first use."""
+    access = request.__dict__.get('_access_context')
+    if access is not None:
+        return access
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        access = ANONYMOUS
+    else:
+        try:
+            data = _load(request, user)
+        except Exception:
+            # Cache outage: fall back to a direct computation
+            logger.exception('access: failed to use cached access context')
+            data = _compute(user)
+        access = AccessContext(
+            user_id=user.pk,
+            is_authenticated=True,
+            is_active=user.is_active,
+            is_staff=user.is_staff,
+            is_superuser=user.is_superuser,
+            **data,
+        )
+    request._access_context = access
+    return access
+
+
+class AccessContextMiddleware:
+    """Expose ``request.access`` lazily. Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.access = SimpleLazyObject(lambda: get_access(request))
+        return self.get_response(request)
+
+
+def invalidate_user(user_id):
+    """Force the user's next request to recompute its access context."""
+    if user_id:
+        invalidate_tags(_tag(user_id))
+
+
+def invalidate_users(user_ids):
+    """invalidate_user() for many users in one cache round trip (bulk updates)."""
+    invalidate_tags(*(_tag(uid) for uid in user_ids if uid))
+
+
+def _invalidate(sender, instance, **kwargs):
+    try:
+        invalidate_user(instance.user_id)
+    except Exception:
+        logger.exception('access: failed to invalidate user %s', instance.user_id)
+
+
+def connect_signals():
+    """Called from AppConfig.ready()."""
+    from .models import CourseApplication, UserProfile
+
+    for model in (CourseApplication, UserProfile):
+        uid = f'access-{model.__name__}'
+        post_save.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-delete')
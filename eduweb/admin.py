@@ -2,6 +2,8 @@ from django import forms
 from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
+
+from . import pagecache
 from .models import (
     Announcement, Assignment, AssignmentSubmission, AuditLog,
     Badge, StudentBadge, BlogCategory, BlogPost,
@@ -508,16 +510,20 @@ class BlogPostAdmin(admin.ModelAdmin):
 
     def publish_posts(self, request, queryset):
         updated = queryset.update(status='published', publish_date=timezone.now())
+        # update() sends no post_save; drop the cached public blog pages
+        pagecache.invalidate_model(BlogPost)
         self.message_user(request, f'{updated} post(s) published.')
     publish_posts.short_description = "Publish selected posts"
 
     def unpublish_posts(self, request, queryset):
         updated = queryset.update(status='draft')
+        pagecache.invalidate_model(BlogPost)
         self.message_user(request, f'{updated} post(s) unpublished.')
     unpublish_posts.short_description = "Unpublish selected posts"
 
     def feature_posts(self, request, queryset):
         updated = queryset.update(is_featured=True)
+        pagecache.invalidate_model(BlogPost)
         self.message_user(request, f'{updated} post(s) featured.')
     feature_posts.short_description = "Feature selected posts"
 
@@ -1783,7 +1789,6 @@ class BroadcastMessageAdmin(admin.ModelAdmin):
     readonly_fields = (
         'slug',
         'recipient_count',
-        'recipient_emails',
         'sent_at',
         'created_at',
         'updated_at',
@@ -1800,7 +1805,6 @@ class BroadcastMessageAdmin(admin.ModelAdmin):
                 'filter_type',
                 'filter_values',
                 'recipient_count',
-                'recipient_emails'
             )
         }),
         ('Status', {
@@ -1968,6 +1972,17 @@ class LibraryItemAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title', 'author')}
 
 
+from .models import DailyCounter
+
+@admin.register(DailyCounter)
+class DailyCounterAdmin(admin.ModelAdmin):
+    list_display  = ['day', 'model_label', 'object_id', 'field_name', 'count']
+    list_filter   = ['model_label', 'field_name', 'day']
+    search_fields = ['object_id']
+    readonly_fields = ['model_label', 'object_id', 'field_name', 'day', 'count']
+    date_hierarchy = 'day'
+
+
 # ==================== ADMIN SITE BRANDING ====================
 admin.site.site_header = "LMS Administration"
 admin.site.site_title = "LMS Admin Portal"
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class EduwebConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'eduweb'
+
+    def ready(self):
+        from . import access, autocomplete, dbtuning, events, pagecache
+        access.connect_signals()
+        autocomplete.connect_signals()
+        dbtuning.connect_signals()
+        events.connect_signals()
+        pagecache.connect_signals()
@@ -0,0 +1,186 @@
+"""
+audiences.py — Broadcast audiences as filter definitions.
+
+A broadcast stores *who* it is for, not the addresses themselves: the
+filter type and values picked in the compose form, plus optional extra
+segments to add or leave out. Addresses are resolved in the database when
+they are needed:
+
+    audience = Audience.for_broadcast(broadcast)
+    audience.count()                    # one COUNT(*) for the compose preview
+    for batch in audience.batches(50):  # unique, lower-cased addresses
+        send_mass_mail(...)
+
+The stored definition lives in BroadcastMessage.filter_values. The keys of
+the primary segment are the ones the form has always written ('roles',
+'faculties', …); union and exclusion are lists of further segments:
+
+    {'roles': ['student'],
+     'include': [{'type': 'role', 'values': ['instructor']}],
+     'exclude': [{'type': 'enrollment_status', 'values': ['dropped']}]}
+
+Every segment is a one-column query of ``LOWER(email)``. Included segments
+are combined with UNION, which removes duplicates in the database, and
+each of them is filtered with ``NOT IN`` the excluded segments. The rows
+are then read with a chunked iterator, so a 100k audience never exists as
+a Python list.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+from .models import CourseApplication
+
+ITERATOR_CHUNK = 2000
+
+# Form field / filter_values key holding the selected values of each type
+VALUE_KEYS = {
+    'faculty': 'faculties',
+    'course': 'courses',
+    'program': 'programs',
+    'lms_course': 'lms_courses',
+    'role': 'roles',
+    'application_status': 'application_statuses',
+    'enrollment_status': 'enrollment_statuses',
+}
+
+
+# ─── 1. Segments ──────────────────────────────────────────────────────────────
+# Each returns (queryset, email field) for the selected values.
+
+def _all_users(values):
+    return User.objects.filter(is_active=True), 'email'
+
+
+def _role(values):
+    return User.objects.filter(profile__role__in=values), 'email'
+
+
+def _faculty(values):
+    # Applicants to programs in the selected faculties
+    return CourseApplication.objects.filter(program__department__faculty_id__in=values), 'email'
+
+
+def _program(values):
+    return CourseApplication.objects.filter(program_id__in=values), 'email'
+
+
+def _course(values):
+    # Academic units: applicants to the programs that teach them
+    return CourseApplication.objects.filter(program__courses__id__in=values), 'email'
+
+
+def _lms_course(values):
+    return User.objects.filter(enrollments__course_id__in=values), 'email'
+
+
+def _application_status(values):
+    return CourseApplication.objects.filter(status__in=values), 'email'
+
+
+def _enrollment_status(values):
+    return User.objects.filter(enrollments__status__in=values), 'email'
+
+
+SEGMENTS = {
+    'all_users': _all_users,
+    'role': _role,
+    'faculty': _faculty,
+    'program': _program,
+    'course': _course,
+    'lms_course': _lms_course,
+    'application_status': _application_status,
+    'enrollment_status': _enrollment_status,
+}
+
+
+def addresses(segment_type, values=()):
+    """One-column queryset of the segment's non-empty, lower-cased emails."""
+    try:
+        build = SEGMENTS[segment_type]
+    except KeyError:
+        raise ValueError(f'Unknown audience segment: {segment_type!r}')
+    queryset, field = build(list(values))
+    return (
+        queryset
+        .filter(**{f'{field}__gt': ''})
+        .order_by()
+        .annotate(address=Lower(field))
+        .values_list('address', flat=True)
+    )
+
+
+# ─── 2. Definitions ───────────────────────────────────────────────────────────
+
+def definition(filter_type, values=(), include=(), exclude=()):
+    """
+    filter_values for a broadcast. ``include``/``exclude`` are iterables of
+    (segment_type, values) pairs; segments without values are dropped.
+    """
+    filter_values = {}
+    if filter_type in VALUE_KEYS:
+        filter_values[VALUE_KEYS[filter_type]] = list(values)
+    for key, segments in (('include', include), ('exclude', exclude)):
+        segments = [
+            {'type': segment_type, 'values': list(segment_values)}
+            for segment_type, segment_values in segments
+            if segment_values
+        ]
+        if segments:
+            filter_values[key] = segments
+    return filter_values
+
+
+class Audience:
+    """Union of ``include`` segments minus the ``exclude`` segments."""
+
+    def __init__(self, include, exclude=()):
+        # [(segment_type, values), …]
+        self.include = list(include)
+        self.exclude = list(exclude)
+
+    @classmethod
+    def from_definition(cls, filter_type, filter_values):
+        filter_values = filter_values or {}
+        primary = (filter_type, filter_values.get(VALUE_KEYS.get(filter_type), []))
+        include = [primary] + [(s['type'], s['values']) for s in filter_values.get('include', [])]
+        exclude = [(s['type'], s['values']) for s in filter_values.get('exclude', [])]
+        return cls(include, exclude)
+
+    @classmethod
+    def for_broadcast(cls, broadcast):
+        return cls.from_definition(broadcast.filter_type, broadcast.filter_values)
+
+    def queryset(self):
+        """Unique addresses of the audience as a single SQL statement."""
+        parts = []
+        for segment_type, values in self.include:
+            part = addresses(segment_type, values)
+            for excluded_type, excluded_values in self.exclude:
+                part = part.exclude(address__in=addresses(excluded_type, excluded_values))
+            parts.append(part)
+        if len(parts) == 1:
+            return parts[0].distinct()
+        return parts[0].union(*parts[1:])
+
+    def count(self):
+        return self.queryset().count()
+
+    def iter_emails(self, chunk_size=ITERATOR_CHUNK):
+        """Stream addresses from the database ``chunk_size`` rows at a time."""
+        return self.queryset().iterator(chunk_size=chunk_size)
+
+    def batches(self, size, chunk_size=ITERATOR_CHUNK):
+        """Lists of at most ``size`` addresses, for batched sending."""
+        batch = []
+        for email in self.iter_emails(chunk_size):
+            batch.append(email)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def sample(self, limit):
+        """First ``limit`` addresses in alphabetical order, for previews."""
+        return list(self.queryset().order_by('address')[:limit])
@@ -0,0 +1,293 @@
+"""
+audit.py — Buffered AuditLog writer.
+
+Views used to call AuditLog.objects.create(...) inline, one INSERT per
+entry, each copying the IP address by hand (or forgetting to). Now:
+
+    audit.record('update', 'SystemConfiguration', 'Updated email configuration',
+                 object_id=config.pk)
+
+AuditMiddleware opens a scope for every request. record() takes the user,
+IP address and user agent from it, so no call site passes them. Entries
+are kept in the scope and written with one bulk_create when the response
+is done (for streaming responses, when the stream is closed). An entry
+recorded inside transaction.atomic() joins the buffer only if that
+transaction commits, so rolled-back changes leave no audit trail.
+
+Outside a request (management commands, background threads) record()
+writes straight away; pass ``request=`` to keep its metadata.
+
+Modes (settings.AUDIT_MODE)
+    db    → bulk_create at the end of the request (default)
+    spool → entries go to a background thread that appends them as JSON
+            lines to AUDIT_SPOOL_DIR; the request costs no query at all.
+            `python manage.py load_audit_spool` (run from cron) moves
+            closed spool files into the table.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from contextvars import ContextVar
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+MODE = getattr(settings, 'AUDIT_MODE', 'db')
+SPOOL_DIR = getattr(settings, 'AUDIT_SPOOL_DIR', None)
+BATCH_SIZE = 500
+USER_AGENT_MAX = 500
+
+_scope = ContextVar('audit_scope', default=None)
+
+
+# ─── 1. Request metadata ──────────────────────────────────────────────────────
+
+def client_ip(request):
+    if request is None:
+        return None
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR') or None
+
+
+def _request_user_id(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class _Scope:
+    """Metadata and pending entries of one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.ip_address = client_ip(request)
+        self.user_agent = request.META.get('HTTP_USER_AGENT', '')[:USER_AGENT_MAX]
+        self.entries = []
+        self.open = True
+
+    def close(self):
+        self.open = False
+        entries, self.entries = self.entries, []
+        if entries:
+            write(entries)
+
+
+# ─── 2. Recording ─────────────────────────────────────────────────────────────
+
+_UNSET = object()
+
+
+def record(action, model_name, description, *, object_id='', user=_UNSET,
+           extra_data=None, request=None):
+    """
+    Queue one AuditLog entry and return it (unsaved). ``user`` defaults to
+    the request's user; pass None for system actions.
+    """
+    scope = _scope.get()
+    if request is not None and (scope is None or scope.request is not request):
+        ip_address = client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')[:USER_AGENT_MAX]
+    elif scope is not None:
+        request = scope.request
+        ip_address, user_agent = scope.ip_address, scope.user_agent
+    else:
+        ip_address, user_agent = None, ''
+
+    if user is _UNSET:
+        user_id = _request_user_id(request) if request is not None else None
+    else:
+        user_id = getattr(user, 'pk', user)
+
+    entry = AuditLog(
+        user_id=user_id,
+        action=action,
+        model_name=model_name,
+        object_id='' if object_id is None else str(object_id),
+        description=description,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        extra_data=extra_data or {},
+        timestamp=timezone.now(),
+    )
+
+    def commit():
+        if scope is not None and scope.open:
+            scope.entries.append(entry)
+        else:
+            write([entry])
+
+    # Runs immediately outside atomic blocks
+    transaction.on_commit(commit)
+    return entry
+
+
+def write(entries):
+    """Persist entries now (or hand them to the spool); never raises."""
+    try:
+        if MODE == 'spool':
+            _spool().put([to_row(entry) for entry in entries])
+        else:
+            AuditLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    except Exception:
+        logger.exception('audit: failed to write %d entries', len(entries))
+
+
+class AuditMiddleware:
+    """Opens the audit scope. Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        scope = _Scope(request)
+        token = _scope.set(scope)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            scope.close()
+            _scope.reset(token)
+            raise
+        if getattr(response, 'streaming', False):
+            # Streaming bodies (CSV exports) record while they are sent
+            response._resource_closers.append(scope.close)
+        else:
+            scope.close()
+            _scope.reset(token)
+        return response
+
+
+# ─── 3. Spool ─────────────────────────────────────────────────────────────────
+
+def to_row(entry):
+    """JSON-ready dict of an entry (the spool and archive line format)."""
+    return {
+        'user_id': entry.user_id,
+        'action': entry.action,
+        'model_name': entry.model_name,
+        'object_id': entry.object_id,
+        'description': entry.description,
+        'ip_address': entry.ip_address,
+        'user_agent': entry.user_agent,
+        'extra_data': entry.extra_data,
+        'timestamp': entry.timestamp.isoformat(),
+    }
+
+
+def from_row(row):
+    """Unsaved AuditLog from a to_row() dict (``id`` is kept if present)."""
+    row = dict(row)
+    if isinstance(row['timestamp'], str):
+        row['timestamp'] = parse_datetime(row['timestamp'])
+    return AuditLog(**row)
+
+
+def spool_dir():
+    return Path(SPOOL_DIR or Path(settings.BASE_DIR) / 'audit_spool')
+
+
+class _Spool:
+    """Background writer; each process appends to its own file per minute."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='audit-spool', daemon=True)
+        self.thread.start()
+        atexit.register(self.drain)
+
+    def put(self, rows):
+        self.queue.put(rows)
+
+    def _path(self):
+        minute = timezone.now().strftime('%Y%m%d%H%M')
+        return spool_dir() / f'audit-{minute}-{os.getpid()}.jsonl'
+
+    def _append(self, rows):
+        path = self._path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as handle:
+            for row in rows:
+                handle.write(json.dumps(row, default=str) + '\n')
+
+    def _run(self):
+        while True:
+            rows = self.queue.get()
+            try:
+                # Coalesce whatever queued up meanwhile into one write
+                while True:
+                    try:
+                        rows = rows + self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                self._append(rows)
+            except Exception:
+                logger.exception('audit: failed to spool %d entries', len(rows))
+
+    def drain(self):
+        rows = []
+        while True:
+            try:
+                rows += self.queue.get_nowait()
+            except queue.Empty:
+                break
+        if rows:
+            self._append(rows)
+
+
+_spool_instance = None
+_spool_lock = threading.Lock()
+
+
+def _spool():
+    global _spool_instance
+    with _spool_lock:
+        if _spool_instance is None:
+            _spool_instance = _Spool()
+        return _spool_instance
+
+
+def load_spool():
+    """
+    Insert closed spool files (those at least a minute old) into AuditLog
+    and delete them. Returns the number of entries loaded.
+    """
+    from django.contrib.auth.models import User
+
+    directory = spool_dir()
+    if not directory.is_dir():
+        return 0
+    # A writer may still be finishing the previous minute's file
+    cutoff = (timezone.now() - timedelta(minutes=1)).strftime('%Y%m%d%H%M')
+    loaded = 0
+    for path in sorted(directory.glob('audit-*.jsonl')):
+        if path.name.split('-')[1] >= cutoff:
+            continue
+        entries = []
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                entries.append(from_row(json.loads(line)))
+        # Users deleted since the entry was spooled
+        user_ids = {entry.user_id for entry in entries if entry.user_id}
+        existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        for entry in entries:
+            if entry.user_id not in existing:
+                entry.user_id = None
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        path.unlink()
+        loaded += len(entries)
+    return loaded
@@ -0,0 +1,411 @@
+"""
+auditarchive.py — Monthly AuditLog archives, queried together with the table.
+
+The AuditLog table only keeps the last AUDIT_HOT_MONTHS months (plus the
+current one). `python manage.py archive_audit_logs` (monthly, from cron)
+moves every older month into a gzip-compressed JSON-lines file:
+
+    AUDIT_ARCHIVE_DIR/auditlog-2026-03.jsonl.gz   rows, newest first
+    AUDIT_ARCHIVE_DIR/auditlog-2026-03.json       manifest: row count, id
+                                                  range, rows per action
+
+so the table and its indexes stay the size of the recent window however
+much history builds up.
+
+AuditQuery reads both, so callers never need to know where a row lives:
+
+    query = AuditQuery(action='login', date_from=date(2025, 1, 1))
+    page = query.page(request, per_page=50)     # keyset page (listing.py)
+    for log in query.iterate(): ...             # CSV export, newest first
+    auditarchive.get(pk)                        # detail view
+
+A page is answered from the table alone whenever the table has a full page
+of matching rows newer than the newest archived month, so recent pages
+never open an archive. Archived rows keep their ids and come back as
+unsaved AuditLog instances with ``archived = True``.
+"""
+
+import gzip
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import listing
+from .audit import from_row, to_row
+from .models import AuditLog
+
+ARCHIVE_DIR = getattr(settings, 'AUDIT_ARCHIVE_DIR', None)
+HOT_MONTHS = getattr(settings, 'AUDIT_HOT_MONTHS', 3)
+ORDERING = ['-timestamp', '-pk']
+CHUNK_SIZE = 2000
+
+_FILE_RE = re.compile(r'^auditlog-(\d{4})-(\d{2})\.jsonl\.gz$')
+
+
+# ─── 1. Months and files ──────────────────────────────────────────────────────
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def month_bounds(month):
+    """[start, end) of the month starting on the date ``month``."""
+    following = _next_month(month)
+    return (
+        timezone.make_aware(datetime(month.year, month.month, 1)),
+        timezone.make_aware(datetime(following.year, following.month, 1)),
+    )
+
+
+def archive_dir():
+    return Path(ARCHIVE_DIR or Path(settings.BASE_DIR) / 'audit_archive')
+
+
+def _data_path(month):
+    return archive_dir() / f'auditlog-{month:%Y-%m}.jsonl.gz'
+
+
+def _manifest_path(month):
+    return archive_dir() / f'auditlog-{month:%Y-%m}.json'
+
+
+def archived_months():
+    """First days of the archived months, newest first."""
+    directory = archive_dir()
+    if not directory.is_dir():
+        return []
+    months = []
+    for path in directory.iterdir():
+        match = _FILE_RE.match(path.name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months, reverse=True)
+
+
+def manifest(month):
+    try:
+        with open(_manifest_path(month), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _rows(month):
+    """((timestamp, id), row) for the month's archived rows, newest first."""
+    try:
+        handle = gzip.open(_data_path(month), 'rt', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            yield (row['timestamp'], row['id']), row
+
+
+def _entry(row):
+    log = from_row(row)
+    log.archived = True
+    return log
+
+
+def _attach_users(logs):
+    """One query for the users of archived entries (table rows use select_related)."""
+    pending = [log for log in logs if getattr(log, 'archived', False) and log.user_id]
+    users = User.objects.in_bulk({log.user_id for log in pending})
+    for log in pending:
+        # Deleted since: shown as System, like SET_NULL would
+        log.user = users.get(log.user_id)
+    return logs
+
+
+def _key(log):
+    return log.timestamp, log.pk
+
+
+# ─── 2. Archiving ─────────────────────────────────────────────────────────────
+
+def _write_json(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle)
+    os.replace(tmp, path)
+
+
+def archive_month(month):
+    """
+    Move the month's rows from the table into its archive file, merged
+    with anything archived earlier, and return how many rows were moved.
+    The file is complete before any row is deleted.
+    """
+    start, end = month_bounds(month)
+    table = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    if not table.exists():
+        return 0
+
+    def fresh():
+        for log in table.order_by(*ORDERING).iterator(chunk_size=CHUNK_SIZE):
+            yield _key(log), {'id': log.pk, **to_row(log)}, True
+
+    def archived():
+        for key, row in _rows(month):
+            row['timestamp'] = row['timestamp'].isoformat()
+            yield key, row, False
+
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = _data_path(month)
+    tmp = path.with_name(path.name + '.tmp')
+    moved, ids, actions = [], [], Counter()
+    previous = None
+    with gzip.open(tmp, 'wt', encoding='utf-8') as handle:
+        merged = heapq.merge(fresh(), archived(), key=lambda item: item[0], reverse=True)
+        for key, row, in_table in merged:
+            if in_table:
+                moved.append(row['id'])
+            # A row left in the table by an interrupted run is already archived
+            if key == previous:
+                continue
+            previous = key
+            ids.append(row['id'])
+            actions[row['action']] += 1
+            handle.write(json.dumps(row) + '\n')
+    os.replace(tmp, path)
+    _write_json(_manifest_path(month), {
+        'month': f'{month:%Y-%m}',
+        'rows': len(ids),
+        'min_id': min(ids),
+        'max_id': max(ids),
+        'actions': dict(actions),
+    })
+
+    for i in range(0, len(moved), CHUNK_SIZE):
+        AuditLog.objects.filter(pk__in=moved[i:i + CHUNK_SIZE]).delete()
+    return len(moved)
+
+
+def archive(keep_months=None, today=None):
+    """
+    Archive every month older than the current one and the ``keep_months``
+    before it. Returns {month: rows moved}.
+    """
+    keep_months = HOT_MONTHS if keep_months is None else keep_months
+    cutoff = (today or timezone.localdate()).replace(day=1)
+    for _ in range(keep_months):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+
+    oldest = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return {}
+    month = timezone.localtime(oldest).date().replace(day=1)
+    moved = {}
+    while month < cutoff:
+        count = archive_month(month)
+        if count:
+            moved[month] = count
+        month = _next_month(month)
+    return moved
+
+
+# ─── 3. Querying ──────────────────────────────────────────────────────────────
+
+class AuditQuery:
+    """The audit log filters, applied to the table and to the archives alike."""
+
+    def __init__(self, user=None, action=None, date_from=None, date_to=None, search=None):
+        self.user_id = getattr(user, 'pk', user)
+        self.action = action or None
+        # Half-open [start, end), so the timestamp index is used
+        self.start, self.end = listing.day_bounds(date_from, date_to)
+        self.search = (search or '').strip()
+
+    def queryset(self):
+        logs = AuditLog.objects.select_related('user')
+        if self.user_id:
+            logs = logs.filter(user_id=self.user_id)
+        if self.action:
+            logs = logs.filter(action=self.action)
+        if self.start is not None:
+            logs = logs.filter(timestamp__gte=self.start)
+        if self.end is not None:
+            logs = logs.filter(timestamp__lt=self.end)
+        if self.search:
+            logs = logs.filter(
+                Q(description__icontains=self.search) | Q(model_name__icontains=self.search)
+            )
+        return logs
+
+    def _matches(self, row):
+        if self.user_id and row['user_id'] != self.user_id:
+            return False
+        if self.action and row['action'] != self.action:
+            return False
+        if self.start is not None and row['timestamp'] < self.start:
+            return False
+        if self.end is not None and row['timestamp'] >= self.end:
+            return False
+        if self.search:
+            term = self.search.casefold()
+            return term in row['description'].casefold() or term in row['model_name'].casefold()
+        return True
+
+    def months(self):
+        """Archived months overlapping the date range, newest first."""
+        months = []
+        for month in archived_months():
+            start, end = month_bounds(month)
+            if (self.end is None or start < self.end) and (self.start is None or end > self.start):
+                months.append(month)
+        return months
+
+    # ── keyset pages ────────────────────────────────────────────────────────
+    def _older(self, values, limit):
+        """Up to ``limit`` matching rows before the cursor, newest first."""
+        table = self.queryset()
+        if values is not None:
+            timestamp, pk = values
+            table = table.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk))
+        rows = list(table.order_by(*ORDERING)[:limit])
+
+        months = self.months()
+        if values is not None:
+            months = [m for m in months if month_bounds(m)[0] <= values[0]]
+        if not months or (len(rows) == limit and rows[-1].timestamp >= month_bounds(months[0])[1]):
+            return rows
+
+        cursor = tuple(values) if values is not None else None
+        archived = []
+        for month in months:
+            for key, row in _rows(month):
+                if cursor is not None and key >= cursor:
+                    continue
+                if self._matches(row):
+                    archived.append(_entry(row))
+                    if len(archived) == limit:
+                        break
+            if len(archived) == limit:
+                break
+        return self._merge(rows + archived, limit, newest_first=True)
+
+    def _newer(self, values, limit):
+        """Up to ``limit`` matching rows after the cursor, oldest first."""
+        timestamp, pk = values
+        table = self.queryset().filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=pk))
+        rows = list(table.order_by('timestamp', 'pk')[:limit])
+
+        cursor = (timestamp, pk)
+        archived = []
+        for month in reversed(self.months()):
+            if month_bounds(month)[1] <= timestamp:
+                continue
+            newer = []
+            for key, row in _rows(month):
+                # Files are newest first; the rest is older than the cursor
+                if key <= cursor:
+                    break
+                if self._matches(row):
+                    newer.append(_entry(row))
+            archived.extend(reversed(newer))
+            if len(archived) >= limit:
+                break
+        return self._merge(rows + archived, limit, newest_first=False)
+
+    @staticmethod
+    def _merge(logs, limit, newest_first):
+        logs.sort(key=_key, reverse=newest_first)
+        unique, seen = [], set()
+        for log in logs:
+            if log.pk not in seen:
+                seen.add(log.pk)
+                unique.append(log)
+        return _attach_users(unique[:limit])
+
+    def page(self, request, per_page=50):
+        """listing.KeysetPage of matching rows, newest first."""
+        def fetch(values, forward, limit):
+            if forward:
+                return self._older(values, limit)
+            return self._newer(values, limit)
+
+        count, estimate = self.count()
+        return listing.cursor_page(request, fetch, ORDERING, AuditLog, per_page, count, estimate)
+
+    def count(self):
+        """
+        (count, is_estimate). Archived months add their manifest totals
+        when only date and action filters apply and cover the whole month;
+        otherwise the count is a lower bound and marked as an estimate.
+        """
+        count, estimate = listing.capped_count(self.queryset())
+        for month in self.months():
+            info = manifest(month)
+            start, end = month_bounds(month)
+            covered = (self.start is None or self.start <= start) and (self.end is None or self.end >= end)
+            if info is None or not covered or self.user_id or self.search:
+                estimate = True
+            elif self.action:
+                count += info['actions'].get(self.action, 0)
+            else:
+                count += info['rows']
+        return count, estimate
+
+    # ── full scans ──────────────────────────────────────────────────────────
+    def iterate(self):
+        """Every matching row, newest first (table and archives merged)."""
+        def table():
+            for log in self.queryset().order_by(*ORDERING).iterator(chunk_size=CHUNK_SIZE):
+                yield _key(log), log
+
+        def archives():
+            for month in self.months():
+                for key, row in _rows(month):
+                    if self._matches(row):
+                        yield key, _entry(row)
+
+        chunk, previous = [], None
+        for key, log in heapq.merge(table(), archives(), key=lambda item: item[0], reverse=True):
+            if key == previous:
+                continue
+            previous = key
+            chunk.append(log)
+            if len(chunk) == CHUNK_SIZE:
+                yield from _attach_users(chunk)
+                chunk = []
+        yield from _attach_users(chunk)
+
+
+def get(pk):
+    """The AuditLog with this id from the table or an archive, or None."""
+    log = AuditLog.objects.select_related('user').filter(pk=pk).first()
+    if log is not None:
+        return log
+    for month in archived_months():
+        info = manifest(month)
+        if info is not None and not info['min_id'] <= pk <= info['max_id']:
+            continue
+        for (_, row_id), row in _rows(month):
+            if row_id == pk:
+                return _attach_users([_entry(row)])[0]
+    return None
+
+
+def action_counts(limit=5):
+    """[{'action': …, 'count': …}] over the table and archives, most frequent first."""
+    totals = Counter(dict(
+        AuditLog.objects.order_by().values_list('action').annotate(count=Count('pk'))
+    ))
+    for month in archived_months():
+        totals.update((manifest(month) or {}).get('actions', {}))
+    return [{'action': action, 'count': count} for action, count in totals.most_common(limit)]
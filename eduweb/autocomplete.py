@@ -0,0 +1,325 @@
+"""
+autocomplete.py — Search-as-you-type choice fields.
+
+A ModelChoiceField over every active user puts the whole table in a
+<select> on each render. AutocompleteField renders only the selected
+value; the browser asks /autocomplete/<source>/?q=… for matches while the
+user types (static/js/autocomplete.js):
+
+    recipient = AutocompleteField('staff_contacts', label='Recipient')
+
+A *source* decides which roles may search it, on which columns, which
+rows it offers and how each row is labelled. The submitted value is still
+validated against the field's queryset, so a hand-crafted POST cannot pick
+a row the endpoint would not have offered.
+
+Matching is a prefix match on every word of the query against columns
+with a LOWER() index (or on the raw column for upper-case references),
+written as a range
+
+    LOWER(col) >= 'smi' AND LOWER(col) < 'smj'
+
+so SQLite and PostgreSQL both answer from the index. Results are cached
+per source and query for CACHE_TIMEOUT seconds; saves that change
+a searchable column bump the source's tag.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django import forms
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .caching import get_or_set, invalidate_tags, make_key
+from .models import ApplicationPayment, UserProfile
+
+logger = logging.getLogger(__name__)
+
+MIN_CHARS = 2
+LIMIT = 20
+MAX_LIMIT = 50
+CACHE_TIMEOUT = 60
+
+
+# ─── 1. Sources ───────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    # Base queryset: every row this source can ever return
+    queryset: Callable[[], object]
+    label: Callable[[object], str]
+    # AccessContext → may this user search the source (role scoping)
+    allowed: Callable[[object], bool]
+    # Columns matched case-insensitively (need a LOWER() index)
+    search_fields: tuple = ()
+    # Further columns only administrators may match on (e.g. email)
+    admin_search_fields: tuple = ()
+    # Columns matched as typed, upper-cased (need a plain index)
+    upper_fields: tuple = ()
+    value_field: str = 'pk'
+    ordering: tuple = ('pk',)
+    # Models whose saves change results: {model: fields that matter}
+    watch: dict = field(default_factory=dict)
+
+    @property
+    def tag(self):
+        return f'autocomplete-{self.name}'
+
+    def fields_for(self, access):
+        if self.admin_search_fields and _is_admin(access):
+            return self.search_fields + self.admin_search_fields
+        return self.search_fields
+
+
+SOURCES = {}
+
+
+def register(source):
+    SOURCES[source.name] = source
+    return source
+
+
+def get_source(name):
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise LookupError(f'Unknown autocomplete source: {name!r}')
+
+
+def _is_admin(access):
+    return access.is_staff or access.is_superuser or access.role == 'admin'
+
+
+def _user_label(user):
+    profile = getattr(user, 'profile', None)
+    role = profile.get_role_display() if profile else 'User'
+    return f'{user.get_full_name() or user.username} [{role}]'
+
+
+USER_FIELDS = ('username', 'first_name', 'last_name', 'email')
+USER_WATCH = {
+    User: {'username', 'first_name', 'last_name', 'email', 'is_active'},
+    UserProfile: {'role'},
+}
+
+register(Source(
+    name='users',
+    queryset=lambda: User.objects.filter(is_active=True).select_related('profile'),
+    label=_user_label,
+    allowed=_is_admin,
+    search_fields=USER_FIELDS,
+    ordering=('first_name', 'last_name', 'pk'),
+    watch=USER_WATCH,
+))
+
+# People a student may write to (students:compose_message). Only portal
+# students and admins may search it, and only admins by email address.
+register(Source(
+    name='staff_contacts',
+    queryset=lambda: User.objects.filter(
+        is_active=True, profile__role__in=['instructor', 'admin'],
+    ).select_related('profile'),
+    label=lambda u: f'{u.get_full_name() or u.username} — {u.profile.get_role_display()}',
+    allowed=lambda access: (access.is_student and access.can_access_portal) or _is_admin(access),
+    search_fields=('username', 'first_name', 'last_name'),
+    admin_search_fields=('email',),
+    ordering=('first_name', 'last_name', 'pk'),
+    watch=USER_WATCH,
+))
+
+register(Source(
+    name='paid_application_payments',
+    queryset=lambda: ApplicationPayment.objects.filter(
+        status='success', application__isnull=False,
+    ).select_related('application'),
+    label=lambda p: (
+        f'{p.payment_reference} — {p.application.first_name} {p.application.last_name} '
+        f'({p.currency} {p.amount:,.2f})'
+    ),
+    allowed=lambda access: access.role == 'finance' or _is_admin(access),
+    search_fields=('application__first_name', 'application__last_name', 'application__email'),
+    upper_fields=('payment_reference',),
+    value_field='payment_reference',
+    ordering=('-created_at',),
+    watch={ApplicationPayment: {'status', 'payment_reference', 'amount', 'currency'}},
+))
+
+
+# ─── 2. Search ────────────────────────────────────────────────────────────────
+
+def _upper_bound(prefix):
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def prefix_filter(queryset, term, search_fields=(), upper_fields=()):
+    """Rows where every word of ``term`` starts one of the fields."""
+    aliases = {}
+    for name in search_fields:
+        aliases[f'ac_{name}'] = Lower(name)
+    queryset = queryset.alias(**aliases)
+
+    for word in term.split():
+        match = Q()
+        lower = word.lower()
+        for alias in aliases:
+            match |= Q(**{f'{alias}__gte': lower, f'{alias}__lt': _upper_bound(lower)})
+        upper = word.upper()
+        for name in upper_fields:
+            match |= Q(**{f'{name}__gte': upper, f'{name}__lt': _upper_bound(upper)})
+        queryset = queryset.filter(match)
+    return queryset
+
+
+def search(source, access, term, limit=LIMIT):
+    """
+    [{'id': value, 'text': label}, …] for ``term``; an empty list for
+    terms shorter than MIN_CHARS. Raises PermissionError when the user may
+    not use the source.
+    """
+    if not source.allowed(access):
+        raise PermissionError(source.name)
+    term = ' '.join(term.split())[:100]
+    if len(term) < MIN_CHARS:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    search_fields = source.fields_for(access)
+
+    def compute():
+        queryset = prefix_filter(
+            source.queryset(), term, search_fields, source.upper_fields,
+        )
+        # Joins (user → profile, payment → application) can repeat rows
+        rows = queryset.distinct().order_by(*source.ordering)[:limit]
+        return [
+            {'id': str(getattr(row, source.value_field)), 'text': source.label(row)}
+            for row in rows
+        ]
+
+    key = make_key(
+        'autocomplete', source.name, ','.join(search_fields), term.lower(), limit,
+        tags=[source.tag],
+    )
+    return get_or_set(key, compute, timeout=CACHE_TIMEOUT)
+
+
+# ─── 3. Form field and widget ─────────────────────────────────────────────────
+
+class AutocompleteWidget(forms.Widget):
+    """
+    Hidden input with the value and a text box showing the selected label.
+    Only the selected row is looked up; choices are never iterated.
+    """
+
+    input_class = (
+        'w-full px-4 py-3 border border-gray-300 rounded-lg '
+        'focus:ring-2 focus:ring-primary-500 focus:border-transparent text-sm'
+    )
+
+    def __init__(self, source, attrs=None, placeholder='Start typing to search…'):
+        super().__init__(attrs)
+        self.source = source
+        self.placeholder = placeholder
+
+    def id_for_label(self, id_):
+        # <label for> points at the visible text box
+        return f'{id_}_search' if id_ else id_
+
+    def selected_label(self, value):
+        if value in (None, ''):
+            return ''
+        choices = getattr(self, 'choices', None)
+        field = getattr(choices, 'field', None)
+        if field is None:
+            return str(value)
+        if isinstance(value, field.queryset.model):
+            obj = value
+        else:
+            key = field.to_field_name or 'pk'
+            try:
+                obj = field.queryset.filter(**{key: value}).first()
+            except (ValueError, TypeError):
+                obj = None
+        return field.label_from_instance(obj) if obj is not None else ''
+
+    def format_value(self, value):
+        if value in (None, ''):
+            return ''
+        choices = getattr(self, 'choices', None)
+        field = getattr(choices, 'field', None)
+        if field is not None and isinstance(value, field.queryset.model):
+            return str(getattr(value, field.to_field_name or 'pk'))
+        return str(value)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        input_id = attrs.get('id') or f'id_{name}'
+        css = attrs.get('class', self.input_class)
+        return format_html(
+            '<div class="relative" data-autocomplete>'
+            '<input type="hidden" name="{}" id="{}" value="{}">'
+            '<input type="text" id="{}_search" value="{}" class="{}" placeholder="{}" '
+            'autocomplete="off" role="combobox" aria-expanded="false" '
+            'data-autocomplete-url="{}" data-autocomplete-min="{}"{}>'
+            '</div>'
+            '<script src="{}" defer></script>',
+            name, input_id, self.format_value(value),
+            input_id, self.selected_label(value), css, self.placeholder,
+            reverse('eduweb:autocomplete', args=[self.source]), MIN_CHARS,
+            format_html(' required') if self.is_required else '',
+            static('js/autocomplete.js'),
+        )
+
+
+class AutocompleteField(forms.ModelChoiceField):
+    """ModelChoiceField fed by an autocomplete source instead of a <select>."""
+
+    def __init__(self, source, queryset=None, label_from_instance=None, **kwargs):
+        definition = get_source(source)
+        kwargs.setdefault('widget', AutocompleteWidget(source))
+        if definition.value_field != 'pk':
+            kwargs.setdefault('to_field_name', definition.value_field)
+        kwargs.setdefault('empty_label', None)
+        super().__init__(
+            queryset if queryset is not None else definition.queryset(), **kwargs
+        )
+        self._label = label_from_instance or definition.label
+
+    def label_from_instance(self, obj):
+        return self._label(obj)
+
+
+# ─── 4. Invalidation ──────────────────────────────────────────────────────────
+
+def _invalidate(sender, instance=None, update_fields=None, **kwargs):
+    tags = []
+    for source in SOURCES.values():
+        fields = source.watch.get(sender)
+        if fields is None:
+            continue
+        # e.g. the last_login save on every login does not change results
+        if update_fields is not None and not (set(update_fields) & fields):
+            continue
+        tags.append(source.tag)
+    if tags:
+        try:
+            invalidate_tags(*tags)
+        except Exception:
+            logger.exception('autocomplete: failed to invalidate %s', tags)
+
+
+def connect_signals():
+    """Called from AppConfig.ready()."""
+    models = {model for source in SOURCES.values() for model in source.watch}
+    for model in models:
+        uid = f'autocomplete-{model._meta.label_lower}'
+        post_save.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-delete')
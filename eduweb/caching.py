@@ -0,0 +1,310 @@
+"""
+caching.py — Shared cache helpers for the whole project.
+
+Everything goes through the cache configured in settings.CACHES['default'],
+which is file- or database-backed so that every worker sees the same data.
+
+Key helpers:
+    make_key('nav', 'faculties', tags=['faculty'])   → versioned cache key
+    invalidate_tags('faculty')                        → drops every key built
+                                                        with that tag
+    get_or_set(key, compute, timeout=300)             → read-through helper
+
+Decorators:
+    @cached('nav', timeout=300, tags=['faculty'])     → memoise a function
+    @cache_public_page(tags=['blog'])                  → cache anonymous GETs
+
+Counters:
+    stats()  → {'hits': …, 'misses': …, 'hit_rate': …} across all workers
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = getattr(settings, 'EDUWEB_CACHE_ALIAS', 'default')
+
+# Sentinel so a cached ``None`` is still a hit
+_MISSING = object()
+
+
+def get_cache():
+    """Return the shared cache backend."""
+    return caches[CACHE_ALIAS]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1. HIT / MISS COUNTERS
+#    Counted in-process (cheap) and folded into shared counters every
+#    STATS_FLUSH_SECONDS so `stats()` reports totals for all workers.
+# ─────────────────────────────────────────────────────────────────────────────
+STATS_FLUSH_SECONDS = 30
+_STATS_KEY = 'eduweb:cache-stats:{}'
+
+_stats_lock = threading.Lock()
+_local_stats = {'hits': 0, 'misses': 0}
+_last_flush = time.monotonic()
+
+
+def _record(outcome):
+    global _last_flush
+    with _stats_lock:
+        _local_stats[outcome] += 1
+        if time.monotonic() - _last_flush < STATS_FLUSH_SECONDS:
+            return
+        pending = dict(_local_stats)
+        _local_stats['hits'] = _local_stats['misses'] = 0
+        _last_flush = time.monotonic()
+    _flush_stats(pending)
+
+
+def _flush_stats(pending):
+    cache = get_cache()
+    for name, value in pending.items():
+        if not value:
+            continue
+        key = _STATS_KEY.format(name)
+        try:
+            if not cache.add(key, value, timeout=None):
+                cache.incr(key, value)
+        except ValueError:
+            # Key expired between add() and incr() — start again from here
+            cache.set(key, value, timeout=None)
+        except Exception:
+            logger.exception('caching: failed to flush %s counter', name)
+
+
+def stats():
+    """Return shared hit/miss totals, including this process' unflushed share."""
+    with _stats_lock:
+        pending = dict(_local_stats)
+    shared = get_cache().get_many([_STATS_KEY.format(n) for n in ('hits', 'misses')])
+    hits = shared.get(_STATS_KEY.format('hits'), 0) + pending['hits']
+    misses = shared.get(_STATS_KEY.format('misses'), 0) + pending['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_stats():
+    """Zero both the shared and the in-process counters."""
+    with _stats_lock:
+        _local_stats['hits'] = _local_stats['misses'] = 0
+    get_cache().delete_many([_STATS_KEY.format(n) for n in ('hits', 'misses')])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2. VERSIONED KEYS & TAG INVALIDATION
+#    Every tag owns a version token. Keys embed the current token of each of
+#    their tags, so bumping the token orphans all of them at once; orphaned
+#    entries simply age out through their TTL.
+# ─────────────────────────────────────────────────────────────────────────────
+_TAG_KEY = 'eduweb:tag:{}'
+
+
+def _new_token():
+    return format(time.time_ns(), 'x')
+
+
+def tag_versions(tags):
+    """Return {tag: token} for the given tags, creating missing tokens."""
+    tags = sorted(set(tags))
+    if not tags:
+        return {}
+    cache = get_cache()
+    keys = {_TAG_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        token = found.get(key)
+        if token is None:
+            token = _new_token()
+            if not cache.add(key, token, timeout=None):
+                token = cache.get(key, token)
+        versions[tag] = token
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Invalidate every key that was built with any of ``tags``."""
+    if not tags:
+        return
+    token = _new_token()
+    get_cache().set_many({_TAG_KEY.format(tag): token for tag in tags}, timeout=None)
+
+
+def make_key(namespace, *parts, tags=()):
+    """
+    Build a cache key from a namespace, arbitrary parts and tag versions.
+    Long keys are hashed so they fit every backend's key limit.
+    """
+    raw = ':'.join(str(p) for p in parts)
+    versions = tag_versions(tags)
+    if versions:
+        raw += '|' + ','.join(f'{tag}={token}' for tag, token in versions.items())
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'eduweb:{namespace}:{digest}'
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3. READ-THROUGH HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
+def cache_get(key, default=None):
+    """cache.get() that feeds the hit/miss counters."""
+    value = get_cache().get(key, _MISSING)
+    if value is _MISSING:
+        _record('misses')
+        return default
+    _record('hits')
+    return value
+
+
+def cache_set(key, value, timeout=None):
+    """cache.set() using CACHE_DEFAULT_TIMEOUT when no timeout is given."""
+    if timeout is None:
+        timeout = settings.CACHE_DEFAULT_TIMEOUT
+    get_cache().set(key, value, timeout)
+
+
+def get_or_set(key, compute, timeout=None):
+    """Return the cached value for ``key`` or compute, store and return it."""
+    value = cache_get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache_set(key, value, timeout)
+    return value
+
+
+def cached(namespace, timeout=None, tags=(), key_func=None):
+    """
+    Memoise a function in the shared cache.
+
+    The key is built from the function arguments (or ``key_func(*args,
+    **kwargs)`` when given) plus the current versions of ``tags``.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if key_func is not None:
+                parts = (key_func(*args, **kwargs),)
+            else:
+                parts = (func.__qualname__, args, sorted(kwargs.items()))
+            key = make_key(namespace, *parts, tags=tags)
+            return get_or_set(key, lambda: func(*args, **kwargs), timeout)
+        wrapper.invalidate = lambda: invalidate_tags(*tags)
+        return wrapper
+    return decorator
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4. ANONYMOUS PAGE CACHE
+#    Public pages render identically for every anonymous visitor except for
+#    the CSRF token in base.html (chatbot widget, contact forms). The token is
+#    swapped for a placeholder before storing and re-issued per request.
+# ─────────────────────────────────────────────────────────────────────────────
+CSRF_PLACEHOLDER = '__EDUWEB_CSRF_TOKEN__'
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    # Pending flash messages are per-visitor and must not be frozen into HTML
+    from django.contrib.messages import get_messages
+    return not len(get_messages(request))
+
+
+def page_cache_key(request, namespace='page', tags=()):
+    """Cache key for an anonymous page: host + path + querystring."""
+    return make_key(namespace, request.get_host(), request.get_full_path(), tags=tags)
+
+
+def _freeze(response):
+    content = response.content.decode(response.charset)
+    content = _CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content)
+    return {
+        'content': content,
+        'status': response.status_code,
+        'content_type': response.get('Content-Type'),
+        'stored_at': int(time.time()),
+        # Weak: bodies differ byte-wise by the per-visitor CSRF token
+        'etag': 'W/"%s"' % hashlib.md5(content.encode('utf-8')).hexdigest(),
+    }
+
+
+def _add_validators(response, entry):
+    """Expose ETag/Last-Modified and force browsers to revalidate."""
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['stored_at'])
+    patch_cache_control(response, private=True, no_cache=True, max_age=0)
+    return response
+
+
+def _thaw(request, entry):
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(
+        content, status=entry['status'], content_type=entry['content_type'],
+    )
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def cache_public_page(timeout=None, tags=(), namespace='page'):
+    """
+    Cache a view's HTML for anonymous visitors.
+
+    Authenticated users, non-GET requests and visitors with pending flash
+    messages always hit the view. Only plain 200 responses that set no
+    cookies of their own are stored. Cached pages carry ETag/Last-Modified
+    so conditional requests are answered with 304 Not Modified.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request, namespace, tags)
+            entry = cache_get(key)
+            if entry is not None:
+                response = get_conditional_response(
+                    request, etag=entry['etag'], last_modified=entry['stored_at'],
+                )
+                if response is None:
+                    response = _thaw(request, entry)
+                return _add_validators(response, entry)
+
+            response = view_func(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not response.has_header('Cache-Control')
+            ):
+                entry = _freeze(response)
+                cache_set(key, entry, timeout or settings.PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'MISS'
+                _add_validators(response, entry)
+            return response
+        return _wrapped_view
+    return decorator
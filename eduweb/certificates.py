@@ -0,0 +1,397 @@
+"""
+certificates.py — Certificate PDF rendering and batch issuance.
+
+Certificate rows existed but nothing produced their files. This module
+draws them with reportlab from a small set of layout templates:
+
+    TEMPLATES['lms_course'], TEMPLATES['program']   # picked by certificate_type
+    LMSCourse.certificate_template                  # optional override by key
+
+Rendering is split so it can run in worker processes without the ORM:
+
+    created = certificates.create_for_course(course)   # missing rows, one bulk_create
+    report = certificates.issue(queryset, workers=8)   # renders + bulk_update
+
+CertificateJob is a plain picklable snapshot of everything printed on the
+page. Fonts (CERTIFICATE_FONTS, TTF paths) are registered and images
+decoded once per process, not once per certificate. Files are written under
+MEDIA_ROOT as ``certificates/<username>_<certificate_id>.pdf`` through a
+temp file and rename, so a rerun can tell which certificates are done and
+a crash never leaves a half-written PDF behind.
+
+``python manage.py issue_certificates --course <slug>`` issues a cohort;
+``python manage.py certificate_benchmark`` measures certificates/second.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Certificate, CourseApplication, Enrollment
+
+logger = logging.getLogger(__name__)
+
+STORAGE_DIR = 'certificates'
+BATCH_SIZE = 200
+IMAGE_DPI = 200
+LOGO_SIZE = 70
+
+# reportlab built-ins, used when CERTIFICATE_FONTS does not name a TTF file
+BUILTIN_FONTS = {
+    'regular': 'Times-Roman',
+    'bold': 'Times-Bold',
+    'script': 'Times-Italic',
+}
+
+
+# ─── 1. Templates ─────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class CertificateTemplate:
+    heading: str
+    intro: str
+    body: str                       # str.format() with title/subtitle
+    accent: str = '#1e3a8a'
+    border: str = '#b8860b'
+    logo: str = 'images/miulogo.png'    # static path, '' for none
+    background: str = ''                # static path of a full-page image
+
+
+TEMPLATES = {
+    'lms_course': CertificateTemplate(
+        heading='Certificate of Completion',
+        intro='This is to certify that',
+        body='has successfully completed the course\n{title}',
+    ),
+    'program': CertificateTemplate(
+        heading='Academic Certificate',
+        intro='This is to certify that',
+        body='has fulfilled all requirements of the programme\n{title}\n{subtitle}',
+        accent='#7f1d1d',
+    ),
+}
+
+
+@dataclass
+class CertificateJob:
+    pk: int
+    certificate_id: str
+    verification_code: str
+    template: str
+    student_name: str
+    title: str
+    subtitle: str
+    completion_date: date
+    issued_date: date
+    grade: str
+    name: str                   # storage name
+    path: str = ''              # absolute path, filled by the parent
+
+
+@dataclass
+class IssueReport:
+    rendered: list = field(default_factory=list)
+    skipped: int = 0
+    failed: list = field(default_factory=list)     # (pk, error)
+    seconds: float = 0.0
+
+    @property
+    def rate(self):
+        return len(self.rendered) / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f'{len(self.rendered)} rendered, {self.skipped} skipped, '
+            f'{len(self.failed)} failed in {self.seconds:.1f}s ({self.rate:.1f}/s)'
+        )
+
+
+# ─── 2. Per-process caches ────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def fonts():
+    """Register configured TTF fonts once per process; return role → font name."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    configured = getattr(settings, 'CERTIFICATE_FONTS', {})
+    names = dict(BUILTIN_FONTS)
+    for role, path in configured.items():
+        if not path:
+            continue
+        font_name = f'Certificate-{role}'
+        try:
+            pdfmetrics.registerFont(TTFont(font_name, path))
+        except Exception:
+            logger.warning('certificates: could not load %s font %s', role, path)
+            continue
+        names[role] = font_name
+    return names
+
+
+@lru_cache(maxsize=16)
+def image(static_path, width, height):
+    """
+    Image for a static path, downscaled once to ``width`` x ``height`` points
+    at IMAGE_DPI; None if missing. reportlab re-compresses the pixels into
+    every PDF, so a 1080 px logo drawn at 70 pt would dominate render time.
+    """
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    if not static_path:
+        return None
+    for root in [*map(str, settings.STATICFILES_DIRS), str(settings.STATIC_ROOT)]:
+        candidate = os.path.join(root, static_path)
+        if os.path.exists(candidate):
+            with Image.open(candidate) as source:
+                picture = source.copy()
+            picture.thumbnail((round(width * IMAGE_DPI / 72), round(height * IMAGE_DPI / 72)))
+            return ImageReader(picture)
+    return None
+
+
+# ─── 3. Rendering ─────────────────────────────────────────────────────────────
+
+def _centered_lines(canvas, lines, font, size, y, width, leading):
+    canvas.setFont(font, size)
+    for line in lines:
+        if line:
+            canvas.drawCentredString(width / 2, y, line)
+            y -= leading
+    return y
+
+
+def render(job):
+    """Return the certificate PDF as bytes."""
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen.canvas import Canvas
+
+    template = TEMPLATES.get(job.template) or TEMPLATES['lms_course']
+    font = fonts()
+    width, height = landscape(A4)
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=(width, height), invariant=1)
+    canvas.setTitle(f'{template.heading} — {job.student_name}')
+
+    background = image(template.background, width, height)
+    if background:
+        canvas.drawImage(background, 0, 0, width, height)
+
+    canvas.setStrokeColor(HexColor(template.border))
+    canvas.setLineWidth(6)
+    canvas.rect(24, 24, width - 48, height - 48)
+    canvas.setLineWidth(1.5)
+    canvas.rect(36, 36, width - 72, height - 72)
+
+    logo = image(template.logo, LOGO_SIZE, LOGO_SIZE)
+    if logo:
+        canvas.drawImage(
+            logo, (width - LOGO_SIZE) / 2, height - 70 - LOGO_SIZE, LOGO_SIZE, LOGO_SIZE,
+            mask='auto', preserveAspectRatio=True,
+        )
+
+    accent = HexColor(template.accent)
+    canvas.setFillColor(accent)
+    _centered_lines(canvas, [template.heading.upper()], font['bold'], 30, height - 185, width, 0)
+
+    canvas.setFillColor(HexColor('#374151'))
+    _centered_lines(canvas, [template.intro], font['regular'], 15, height - 230, width, 0)
+
+    canvas.setFillColor(accent)
+    _centered_lines(canvas, [job.student_name], font['script'], 34, height - 280, width, 0)
+
+    canvas.setFillColor(HexColor('#374151'))
+    body = template.body.format(title=job.title, subtitle=job.subtitle).split('\n')
+    y = _centered_lines(canvas, body[:1], font['regular'], 15, height - 325, width, 24)
+    y = _centered_lines(canvas, body[1:], font['bold'], 18, y, width, 24)
+
+    details = f'Completed {job.completion_date:%B %d, %Y}'
+    if job.grade:
+        details += f'  ·  Grade {job.grade}'
+    _centered_lines(canvas, [details], font['regular'], 12, y - 10, width, 0)
+
+    canvas.setFont(font['regular'], 9)
+    canvas.setFillColor(HexColor('#6b7280'))
+    canvas.drawString(60, 56, f'Certificate ID: {job.certificate_id}')
+    canvas.drawRightString(width - 60, 56, f'Verification: {job.verification_code}')
+    canvas.drawCentredString(width / 2, 56, f'Issued {job.issued_date:%B %d, %Y}')
+
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
+
+
+def render_to_file(job):
+    """Worker entry point: render and atomically write job.path."""
+    try:
+        data = render(job)
+        os.makedirs(os.path.dirname(job.path), exist_ok=True)
+        partial = f'{job.path}.{os.getpid()}.part'
+        with open(partial, 'wb') as fh:
+            fh.write(data)
+        os.replace(partial, job.path)
+        return job.pk, job.name, ''
+    except Exception as exc:
+        return job.pk, job.name, f'{type(exc).__name__}: {exc}'
+
+
+# ─── 4. Jobs from the database ────────────────────────────────────────────────
+
+def storage_name(certificate):
+    return f'{STORAGE_DIR}/{certificate.student.username}_{certificate.certificate_id}.pdf'
+
+
+def job_for(certificate):
+    if certificate.certificate_type == 'program' and certificate.program:
+        template = 'program'
+        title = certificate.program.name
+        subtitle = certificate.program.get_degree_level_display()
+    else:
+        course = certificate.course
+        template = course.certificate_template if course and course.certificate_template in TEMPLATES else 'lms_course'
+        title = course.title if course else 'Course'
+        subtitle = ''
+    student = certificate.student
+    name = storage_name(certificate)
+    return CertificateJob(
+        pk=certificate.pk,
+        certificate_id=certificate.certificate_id,
+        verification_code=str(certificate.verification_code),
+        template=template,
+        student_name=student.get_full_name() or student.username,
+        title=title,
+        subtitle=subtitle,
+        completion_date=certificate.completion_date,
+        issued_date=certificate.issued_date or date.today(),
+        grade=certificate.grade,
+        name=name,
+        path=default_storage.path(name),
+    )
+
+
+def _has_file(certificate):
+    return bool(certificate.certificate_file) and default_storage.exists(certificate.certificate_file.name)
+
+
+def render_all(jobs, workers=None):
+    """
+    Yield (pk, name, error) for every job as it finishes. workers=1 renders
+    in this process; otherwise a fork-based process pool is used.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+
+    workers = workers or os.cpu_count() or 1
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        workers = 1     # spawned workers could not import the models module
+    # Loaded before forking, so every worker starts with warm caches
+    fonts()
+    page = landscape(A4)
+    for template in TEMPLATES.values():
+        image(template.logo, LOGO_SIZE, LOGO_SIZE)
+        image(template.background, *page)
+
+    if workers == 1 or len(jobs) == 1:
+        yield from map(render_to_file, jobs)
+        return
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)),
+        mp_context=multiprocessing.get_context('fork'),
+    ) as pool:
+        yield from pool.map(render_to_file, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
+def issue(certificates, workers=None, force=False, progress=None):
+    """
+    Render every certificate in ``certificates`` that has no file yet (all
+    of them with force=True) and store the file names with bulk_update.
+    """
+    report = IssueReport()
+    queryset = certificates.select_related('student', 'course', 'program')
+    jobs = []
+    for certificate in queryset.iterator(chunk_size=BATCH_SIZE):
+        if not force and _has_file(certificate):
+            report.skipped += 1
+        else:
+            jobs.append(job_for(certificate))
+    if not jobs:
+        return report
+
+    started = time.perf_counter()
+    done = []
+    for pk, name, error in render_all(jobs, workers):
+        if error:
+            report.failed.append((pk, error))
+            logger.warning('certificates: %s failed: %s', pk, error)
+        else:
+            done.append(Certificate(pk=pk, certificate_file=name))
+            report.rendered.append(pk)
+        if len(done) >= BATCH_SIZE:
+            Certificate.objects.bulk_update(done, ['certificate_file'])
+            done = []
+        if progress:
+            progress(len(report.rendered) + len(report.failed), len(jobs))
+    if done:
+        Certificate.objects.bulk_update(done, ['certificate_file'])
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# ─── 5. Cohorts ───────────────────────────────────────────────────────────────
+
+def _new_certificate(**fields):
+    # bulk_create skips Certificate.save(), which normally sets the ID
+    return Certificate(certificate_id=f'CERT-{uuid.uuid4().hex[:12].upper()}', **fields)
+
+
+def create_for_course(course):
+    """Create missing certificates for students who completed ``course``."""
+    have = Certificate.objects.filter(course=course).values('student_id')
+    completed = (
+        Enrollment.objects
+        .filter(course=course, status='completed')
+        .exclude(student_id__in=have)
+        .values_list('student_id', 'completed_at')
+    )
+    rows = [
+        _new_certificate(
+            student_id=student_id, course=course, certificate_type='lms_course',
+            completion_date=(completed_at or timezone.now()).date(),
+        )
+        for student_id, completed_at in completed
+    ]
+    return Certificate.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def create_for_program(program):
+    """Create missing certificates for graduates of ``program``."""
+    have = Certificate.objects.filter(program=program, certificate_type='program').values('student_id')
+    graduates = (
+        CourseApplication.objects
+        .filter(program=program, is_graduated=True, user__isnull=False)
+        .exclude(user_id__in=have)
+        .values_list('user_id', 'graduated_at')
+        .distinct()
+    )
+    rows, seen = [], set()
+    for user_id, graduated_at in graduates:
+        if user_id in seen:
+            continue
+        seen.add(user_id)
+        rows.append(_new_certificate(
+            student_id=user_id, program=program, certificate_type='program',
+            completion_date=graduated_at or timezone.localdate(),
+        ))
+    return Certificate.objects.bulk_create(rows, batch_size=BATCH_SIZE)
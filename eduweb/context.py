@@ -21,9 +21,11 @@ All processors listed here must also be registered in settings.py:
 
 import logging
 from django.template import Library
+from . import conversations
+from .access import get_access
 from .models import (
-    Faculty, Program, CourseApplication,
-    Message, Notification, SupportTicket, ContactMessage,
+    Faculty, Program,
+    Notification, SupportTicket, ContactMessage,
     SiteConfig,
 )
 
@@ -108,11 +110,8 @@ def navigation_data(request):
     # Pending application check — only for authenticated students
     has_pending_application = False
     try:
-        if request.user.is_authenticated and hasattr(request.user, 'profile'):
-            if request.user.profile.role == 'student':
-                has_pending_application = CourseApplication.objects.filter(
-                    user=request.user
-                ).exists()
+        access = get_access(request)
+        has_pending_application = access.is_student and access.has_application
     except Exception:
         logger.exception('navigation_data: failed to check pending application')
 
@@ -134,9 +133,8 @@ def student_counts(request):
     Renamed body but keeps the same context variable names so base.html
     works unchanged for every role.
     """
-    if not request.user.is_authenticated:
-        return {}
-    if not hasattr(request.user, 'profile'):
+    access = get_access(request)
+    if not access.has_profile:
         return {}
 
     try:
@@ -152,12 +150,8 @@ def student_counts(request):
         }
 
         # Unread messages only meaningful for students (inbox feature)
-        if request.user.profile.role == 'student':
-            result['unread_messages_count'] = Message.objects.filter(
-                recipient=request.user,
-                is_read=False,
-                parent__isnull=True,
-            ).count()
+        if access.is_student:
+            result['unread_messages_count'] = conversations.unread_total(request.user)
 
         return result
 
@@ -179,11 +173,8 @@ def instructor_counts(request):
     Inject unread notification count and the 5 most recent unread notifications
     for the instructor nav bell dropdown.
     """
-    if not request.user.is_authenticated:
-        return {}
-    if not hasattr(request.user, 'profile'):
-        return {}
-    if request.user.profile.role != 'instructor':
+    access = get_access(request)
+    if not access.has_profile or access.role != 'instructor':
         return {}
 
     try:
@@ -210,11 +201,10 @@ def instructor_counts(request):
 # ─────────────────────────────────────────────────────────────────────────────
 def admin_counts(request):
     """Inject admin badge counts into every template."""
-    if not request.user.is_authenticated:
-        return {}
-    if not hasattr(request.user, 'profile'):
+    access = get_access(request)
+    if not access.has_profile:
         return {}
-    if request.user.profile.role not in ('admin',) and not request.user.is_staff:
+    if access.role not in ('admin',) and not access.is_staff:
         return {}
 
     try:
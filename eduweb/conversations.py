@@ -0,0 +1,317 @@
+"""
+conversations.py — Message threads with per-participant unread counters.
+
+Every Message belongs to a Conversation (the root message and its
+replies). Each member of a thread has a ConversationParticipant row with
+their own unread count and a copy of the thread's last_message_at, and
+each user has a Mailbox row with their totals. The counters are only
+changed here, with F() updates in the same transaction as the message:
+
+    conversations.send(message)                 # new thread or reply
+    conversations.mark_read(conversation, user) # opening a thread
+    conversations.unread_total(user)            # nav badge: one PK lookup
+    conversations.threads(user, 'sent')         # keyset-paginate this
+
+so the inbox is one index range over (user, -last_message_at, -id) and
+no page ever counts or bulk-updates the Message table.
+
+recount() rebuilds the counters from the messages, for repairs; for_message()
+adopts threads that were written without send(), and for_participant() does
+so only for a member of the thread.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Conversation, ConversationParticipant, Mailbox, Message
+
+INBOX_ORDERING = ['-last_message_at', '-id']
+
+
+# ─── 1. Sending ───────────────────────────────────────────────────────────────
+
+def _ensure_mailboxes(user_ids):
+    Mailbox.objects.bulk_create(
+        [Mailbox(user_id=user_id) for user_id in set(user_ids)],
+        ignore_conflicts=True,
+    )
+
+
+def send(message):
+    """
+    Save an unsaved Message and update the thread counters. A message
+    with a ``parent`` is a reply in the parent's conversation; otherwise
+    it starts a new one. Returns the saved message.
+    """
+    with transaction.atomic():
+        if message.parent_id:
+            conversation = for_message(message.parent)
+            message.conversation = conversation
+            message.save()
+            _record_reply(conversation, message)
+        else:
+            _start(message)
+    return message
+
+
+def _start(message):
+    conversation = Conversation.objects.create(subject=message.subject, message_count=1)
+    message.conversation = conversation
+    message.save()
+    Conversation.objects.filter(pk=conversation.pk).update(
+        root=message, last_message=message, last_message_at=message.created_at,
+    )
+
+    sender_id, recipient_id = message.sender_id, message.recipient_id
+    at = message.created_at
+    rows = [ConversationParticipant(
+        conversation=conversation, user_id=sender_id, counterpart_id=recipient_id,
+        started=True, last_message_at=at, last_read_at=at,
+    )]
+    if recipient_id != sender_id:
+        rows.append(ConversationParticipant(
+            conversation=conversation, user_id=recipient_id, counterpart_id=sender_id,
+            unread_count=1, last_message_at=at,
+        ))
+    ConversationParticipant.objects.bulk_create(rows)
+
+    _ensure_mailboxes([sender_id, recipient_id])
+    Mailbox.objects.filter(user_id=sender_id).update(
+        thread_count=F('thread_count') + 1, started_count=F('started_count') + 1,
+    )
+    if recipient_id != sender_id:
+        Mailbox.objects.filter(user_id=recipient_id).update(
+            thread_count=F('thread_count') + 1, unread_count=F('unread_count') + 1,
+        )
+
+
+def _record_reply(conversation, message):
+    at = message.created_at
+    Conversation.objects.filter(pk=conversation.pk).update(
+        last_message=message, last_message_at=at, message_count=F('message_count') + 1,
+    )
+
+    # A reply can bring someone new into the thread
+    members = set(
+        ConversationParticipant.objects
+        .filter(conversation=conversation)
+        .values_list('user_id', flat=True)
+    )
+    joining = {message.sender_id, message.recipient_id} - members
+    if joining:
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(
+                conversation=conversation, user_id=user_id, last_message_at=at,
+                counterpart_id=message.recipient_id if user_id == message.sender_id else message.sender_id,
+            )
+            for user_id in joining
+        ], ignore_conflicts=True)
+        _ensure_mailboxes(joining)
+        Mailbox.objects.filter(user_id__in=joining).update(thread_count=F('thread_count') + 1)
+
+    ConversationParticipant.objects.filter(conversation=conversation).update(last_message_at=at)
+    # Writing in a thread means having read it
+    ConversationParticipant.objects.filter(
+        conversation=conversation, user_id=message.sender_id,
+    ).update(last_read_at=at)
+    if message.recipient_id != message.sender_id:
+        ConversationParticipant.objects.filter(
+            conversation=conversation, user_id=message.recipient_id,
+        ).update(unread_count=F('unread_count') + 1)
+        _ensure_mailboxes([message.recipient_id])
+        Mailbox.objects.filter(user_id=message.recipient_id).update(
+            unread_count=F('unread_count') + 1,
+        )
+
+
+# ─── 2. Reading ───────────────────────────────────────────────────────────────
+
+def mark_read(conversation, user):
+    """Zero the user's unread count for the thread; returns how many were unread."""
+    now = timezone.now()
+    with transaction.atomic():
+        while True:
+            unread = (
+                ConversationParticipant.objects
+                .filter(conversation=conversation, user=user)
+                .values_list('unread_count', flat=True)
+                .first()
+            )
+            if not unread:
+                return 0
+            # Compare-and-set: a reply arriving in between makes us retry
+            if ConversationParticipant.objects.filter(
+                conversation=conversation, user=user, unread_count=unread,
+            ).update(unread_count=0, last_read_at=now):
+                break
+        Mailbox.objects.filter(user=user).update(
+            unread_count=Greatest(F('unread_count') - unread, 0),
+        )
+        Message.objects.filter(
+            conversation=conversation, recipient=user, is_read=False,
+        ).update(is_read=True, read_at=now)
+    return unread
+
+
+def mark_all_read(user):
+    now = timezone.now()
+    with transaction.atomic():
+        ConversationParticipant.objects.filter(user=user, unread_count__gt=0).update(
+            unread_count=0, last_read_at=now,
+        )
+        Mailbox.objects.filter(user=user).update(unread_count=0)
+        Message.objects.filter(recipient=user, is_read=False).update(is_read=True, read_at=now)
+
+
+# ─── 3. Lookups ───────────────────────────────────────────────────────────────
+
+def mailbox(user):
+    """The user's Mailbox (unsaved and empty when they have no messages yet)."""
+    return Mailbox.objects.filter(user_id=user.pk).first() or Mailbox(user_id=user.pk)
+
+
+def unread_total(user):
+    return (
+        Mailbox.objects.filter(user_id=user.pk)
+        .values_list('unread_count', flat=True)
+        .first()
+    ) or 0
+
+
+def threads(user, folder='inbox'):
+    """
+    Participant rows for the user's inbox, ready for keyset pagination on
+    INBOX_ORDERING. 'inbox' is every thread, 'sent' those the user started.
+    """
+    queryset = (
+        ConversationParticipant.objects
+        .filter(user=user)
+        .select_related(
+            'conversation', 'conversation__last_message',
+            'counterpart', 'counterpart__profile',
+        )
+    )
+    if folder == 'sent':
+        queryset = queryset.filter(started=True)
+    return queryset
+
+
+def participant(conversation, user):
+    return ConversationParticipant.objects.filter(conversation=conversation, user=user).first()
+
+
+def for_message(message):
+    """The message's conversation, creating it for threads written without send()."""
+    if message.conversation_id:
+        return message.conversation
+    root = message.parent or message
+    if root.conversation_id:
+        return root.conversation
+    with transaction.atomic():
+        conversation = Conversation.objects.create(subject=root.subject, root=root)
+        # Claim the root; a concurrent first open that got there first keeps it
+        claimed = (
+            Message.objects.filter(pk=root.pk, conversation__isnull=True)
+            .update(conversation=conversation)
+        )
+        if not claimed:
+            conversation.delete()
+            return Message.objects.select_related('conversation').get(pk=root.pk).conversation
+        Message.objects.filter(parent=root).update(conversation=conversation)
+        users = set(
+            Message.objects.filter(conversation=conversation)
+            .values_list('sender_id', 'recipient_id')
+            .distinct()
+        )
+        user_ids = {user_id for pair in users for user_id in pair}
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(
+                conversation=conversation, user_id=user_id, started=user_id == root.sender_id,
+                counterpart_id=root.recipient_id if user_id == root.sender_id else root.sender_id,
+            )
+            for user_id in user_ids
+        ], ignore_conflicts=True)
+        recount(conversation_ids=[conversation.pk], user_ids=user_ids)
+    message.refresh_from_db(fields=['conversation'])
+    return message.conversation
+
+
+def for_participant(message, user):
+    """
+    The message's conversation if ``user`` takes part in it, else None.
+    Membership of a thread written without send() is read from its
+    messages before for_message() adopts it, so requesting somebody
+    else's message id writes nothing.
+    """
+    root = message.parent or message
+    conversation_id = message.conversation_id or root.conversation_id
+    if conversation_id:
+        if not ConversationParticipant.objects.filter(conversation_id=conversation_id, user=user).exists():
+            return None
+        return message.conversation if message.conversation_id else root.conversation
+    in_thread = (
+        Message.objects.filter(Q(pk=root.pk) | Q(parent=root))
+        .filter(Q(sender=user) | Q(recipient=user))
+        .exists()
+    )
+    return for_message(message) if in_thread else None
+
+
+# ─── 4. Repair ────────────────────────────────────────────────────────────────
+
+def _count(queryset, group_by, aggregate=None):
+    """Correlated scalar subquery: COUNT(*) (or ``aggregate``) of ``queryset``, 0 when empty."""
+    value = (
+        queryset.order_by().values(group_by)
+        .annotate(value=aggregate or Count('pk'))
+        .values('value')
+    )
+    return Coalesce(Subquery(value), 0)
+
+
+def recount(conversation_ids=None, user_ids=None):
+    """
+    Recompute the denormalized fields from Message rows with one UPDATE
+    per table. Both arguments limit the work; with neither, everything
+    is rebuilt.
+    """
+    conversations = Conversation.objects.all()
+    participants = ConversationParticipant.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=conversation_ids)
+        participants = participants.filter(conversation_id__in=conversation_ids)
+    if user_ids is not None:
+        participants = participants.filter(user_id__in=user_ids)
+
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-pk')
+    conversations.update(
+        message_count=_count(Message.objects.filter(conversation=OuterRef('pk')), 'conversation'),
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+    )
+    participants.update(
+        unread_count=_count(
+            Message.objects.filter(
+                conversation=OuterRef('conversation'), recipient=OuterRef('user'), is_read=False,
+            ),
+            'conversation',
+        ),
+        last_message_at=Subquery(
+            Conversation.objects.filter(pk=OuterRef('conversation')).values('last_message_at')[:1]
+        ),
+    )
+
+    mailboxes = Mailbox.objects.all()
+    if user_ids is None:
+        _ensure_mailboxes(ConversationParticipant.objects.values_list('user_id', flat=True).distinct())
+    else:
+        _ensure_mailboxes(user_ids)
+        mailboxes = mailboxes.filter(user_id__in=user_ids)
+    memberships = ConversationParticipant.objects.filter(user=OuterRef('user'))
+    mailboxes.update(
+        unread_count=_count(memberships, 'user', Sum('unread_count')),
+        thread_count=_count(memberships, 'user'),
+        started_count=_count(memberships.filter(started=True), 'user'),
+    )
@@ -0,0 +1,273 @@
+"""
+counters.py — Buffered view/download counters.
+
+Hot counters (BlogPost.views_count, LibraryItem.view_count/download_count)
+used to issue one UPDATE per page view, each taking the SQLite write lock.
+Increments are now accumulated in a buffer and written in batches:
+
+    counters.increment(post, 'views_count')       # no query
+    counters.current(post, 'views_count')         # stored value + pending
+    counters.flush()                              # one UPDATE … CASE per model
+
+Buffers (settings.COUNTER_BUFFER):
+    memory → per-process dict (default). Exact, flushed by the process that
+             counted; pending deltas are visible to that process only.
+    cache  → shared cache keys. Pending deltas are visible to every worker;
+             only use with a cache whose incr/decr is atomic.
+
+A flush runs automatically every COUNTER_FLUSH_INTERVAL seconds or once
+COUNTER_FLUSH_THRESHOLD objects are pending, and at interpreter exit.
+Each flush also adds the totals to DailyCounter (per-day rows for trend
+charts); increments are attributed to the day they are flushed.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1. BUFFERS
+#    drain() → {(label, field, pk): delta}; commit()/restore() are called
+#    after the database write succeeded / failed.
+# ─────────────────────────────────────────────────────────────────────────────
+class _MemoryBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+
+    def add(self, key, amount):
+        with self._lock:
+            self._pending[key] += amount
+
+    def get(self, key):
+        return self._pending.get(key, 0)
+
+    def size(self):
+        return len(self._pending)
+
+    def drain(self):
+        with self._lock:
+            drained, self._pending = dict(self._pending), defaultdict(int)
+        return drained
+
+    def commit(self, drained):
+        pass
+
+    def restore(self, drained):
+        with self._lock:
+            for key, amount in drained.items():
+                self._pending[key] += amount
+
+
+class _CacheBuffer:
+    KEY = 'eduweb:counter:{}:{}:{}'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = set()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'EDUWEB_CACHE_ALIAS', 'default')]
+
+    def _key(self, key):
+        return self.KEY.format(*key)
+
+    def add(self, key, amount):
+        cache_key = self._key(key)
+        try:
+            self.cache.incr(cache_key, amount)
+        except ValueError:
+            if not self.cache.add(cache_key, amount, timeout=None):
+                self.cache.incr(cache_key, amount)
+        with self._lock:
+            self._dirty.add(key)
+
+    def get(self, key):
+        return self.cache.get(self._key(key), 0)
+
+    def size(self):
+        return len(self._dirty)
+
+    def drain(self):
+        with self._lock:
+            keys = list(self._dirty)
+        values = self.cache.get_many([self._key(k) for k in keys])
+        drained = {k: values[self._key(k)] for k in keys if values.get(self._key(k))}
+        # Keys another worker flushed (or whose entry expired) are no longer
+        # ours to track. Re-read them under the lock: an add() that lands
+        # after the re-read re-marks its key once the lock is released.
+        stale = [k for k in keys if k not in drained]
+        if stale:
+            with self._lock:
+                values = self.cache.get_many([self._key(k) for k in stale])
+                self._dirty.difference_update(
+                    k for k in stale if not values.get(self._key(k))
+                )
+        return drained
+
+    def commit(self, drained):
+        # decr (not delete) so increments that landed after drain() survive
+        for key, amount in drained.items():
+            try:
+                self.cache.decr(self._key(key), amount)
+            except ValueError:
+                pass
+        with self._lock:
+            self._dirty.difference_update(drained)
+
+    def restore(self, drained):
+        pass
+
+
+_buffer = (
+    _CacheBuffer() if getattr(settings, 'COUNTER_BUFFER', 'memory') == 'cache'
+    else _MemoryBuffer()
+)
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2. PUBLIC API
+# ─────────────────────────────────────────────────────────────────────────────
+def increment(instance, field, amount=1):
+    """Buffer ``amount`` for ``instance.<field>``; flushes when due."""
+    _buffer.add((_label(instance), field, instance.pk), amount)
+    _maybe_flush()
+
+
+def pending(instance, field):
+    """Increments for ``instance.<field>`` not yet written to the database."""
+    return _buffer.get((_label(instance), field, instance.pk))
+
+
+def current(instance, field):
+    """Near-real-time value: loaded value plus pending increments."""
+    return (getattr(instance, field) or 0) + pending(instance, field)
+
+
+def apply_pending(objects, *fields):
+    """Add pending increments to already-loaded instances, in place."""
+    for obj in objects:
+        for field in fields:
+            setattr(obj, field, current(obj, field))
+    return objects
+
+
+def _maybe_flush():
+    interval = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 60)
+    threshold = getattr(settings, 'COUNTER_FLUSH_THRESHOLD', 500)
+    if time.monotonic() - _last_flush >= interval or _buffer.size() >= threshold:
+        flush()
+
+
+def flush():
+    """Write every pending increment. Returns the number of counters written."""
+    global _last_flush
+    with _flush_lock:
+        _last_flush = time.monotonic()
+        drained = _buffer.drain()
+        if not drained:
+            return 0
+        try:
+            with transaction.atomic():
+                _write_totals(drained)
+                _write_daily(drained, timezone.localdate())
+        except Exception:
+            logger.exception('counters: flush failed, %d counters kept pending', len(drained))
+            _buffer.restore(drained)
+            return 0
+        _buffer.commit(drained)
+    return len(drained)
+
+
+def _write_totals(drained):
+    """One UPDATE … SET f = f + CASE pk WHEN … END per model and batch."""
+    by_model = defaultdict(lambda: defaultdict(dict))
+    for (label, field, pk), amount in drained.items():
+        by_model[label][pk][field] = amount
+
+    for label, rows in by_model.items():
+        model = apps.get_model(label)
+        pks = list(rows)
+        for start in range(0, len(pks), FLUSH_BATCH_SIZE):
+            batch = pks[start:start + FLUSH_BATCH_SIZE]
+            fields = {f for pk in batch for f in rows[pk]}
+            updates = {
+                field: F(field) + Case(
+                    *[When(pk=pk, then=Value(rows[pk][field])) for pk in batch if field in rows[pk]],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                for field in fields
+            }
+            model.objects.filter(pk__in=batch).update(**updates)
+
+
+def _write_daily(drained, day):
+    """Upsert today's DailyCounter rows, adding to any existing count."""
+    DailyCounter = apps.get_model('eduweb', 'DailyCounter')
+    qn = connection.ops.quote_name
+    table = qn(DailyCounter._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} ({qn('model_label')}, {qn('object_id')}, {qn('field_name')}, "
+        f"{qn('day')}, {qn('count')}) VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT ({qn('model_label')}, {qn('object_id')}, {qn('field_name')}, {qn('day')}) "
+        f"DO UPDATE SET {qn('count')} = {table}.{qn('count')} + excluded.{qn('count')}"
+    )
+    params = [
+        (label, str(pk), field, day, amount)
+        for (label, field, pk), amount in drained.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def daily_series(model, field, days=30, pk=None):
+    """
+    Per-day totals for the last ``days`` days, oldest first, gaps filled with 0.
+    Pass ``pk`` for a single object, otherwise all objects of ``model`` are summed.
+    """
+    from django.db.models import Sum
+
+    DailyCounter = apps.get_model('eduweb', 'DailyCounter')
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    qs = DailyCounter.objects.filter(
+        model_label=_label(model), field_name=field, day__gte=start,
+    )
+    if pk is not None:
+        qs = qs.filter(object_id=str(pk))
+    totals = dict(qs.values_list('day').annotate(total=Sum('count')))
+    return [
+        {'day': start + timedelta(days=i), 'count': totals.get(start + timedelta(days=i), 0)}
+        for i in range(days)
+    ]
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
@@ -0,0 +1,105 @@
+"""
+dbrouting.py — Send read-heavy analytics to the ``reporting`` database.
+
+Dashboards and reports run large aggregates that hold SQLite read
+transactions (and, on a busy server, a connection) for a long time. Inside
+a reporting block, reads go to the ``reporting`` alias instead — a
+read-only connection to a snapshot file locally, a replica in production:
+
+    @login_required
+    @user_passes_test(is_admin)
+    @reporting_view
+    def dashboard(request): ...
+
+    with use_reporting():
+        rows = Transaction.objects.values('status').annotate(n=Count('id'))
+
+Write safety:
+    * writes always go to ``default``, never to ``reporting``;
+    * the first write inside a block pins the remaining reads of that block
+      to ``default`` (read-your-writes while the replica lags behind);
+    * with settings.REPORTING_STRICT writes inside a block raise
+      ReportingWriteError instead, which surfaces views that should not
+      have been routed;
+    * the reporting connection itself runs with PRAGMA query_only=ON
+      (settings.SQLITE_READ_ONLY_ALIASES, see eduweb.dbtuning).
+
+Without a ``reporting`` entry in DATABASES every block is a no-op.
+Keep a local snapshot fresh with ``python manage.py reporting_snapshot``.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+REPORTING_ALIAS = 'reporting'
+
+# None outside a block, otherwise {'pinned': bool}
+_state = ContextVar('eduweb_reporting', default=None)
+
+
+class ReportingWriteError(RuntimeError):
+    """A write was attempted inside a strict reporting block."""
+
+
+def reporting_available():
+    return REPORTING_ALIAS in connections.settings
+
+
+@contextmanager
+def use_reporting():
+    """
+    Route reads in this block to the reporting database. Works as a context
+    manager and as a decorator; nested blocks share the outer block's state.
+    """
+    if _state.get() is not None:
+        yield
+        return
+    token = _state.set({'pinned': False})
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def reporting_view(view_func):
+    """View decorator form of use_reporting(); apply it below the auth decorators."""
+    return use_reporting()(view_func)
+
+
+class ReportingRouter:
+    """Listed in settings.DATABASE_ROUTERS."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state['pinned'] or not reporting_available():
+            return None
+        return REPORTING_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            if getattr(settings, 'REPORTING_STRICT', False):
+                raise ReportingWriteError(
+                    f'Write to {model._meta.label} inside a reporting block'
+                )
+            if not state['pinned']:
+                logger.warning(
+                    'dbrouting: write to %s inside a reporting block; '
+                    'remaining reads use default', model._meta.label,
+                )
+                state['pinned'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The reporting copy is produced by snapshots/replication, not migrations
+        return db != REPORTING_ALIAS
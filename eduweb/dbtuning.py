@@ -0,0 +1,71 @@
+"""
+dbtuning.py — SQLite connection tuning.
+
+Django opens SQLite with the default rollback journal, so every writer
+(Stripe webhook, counter flushes, sessions, notifications) blocks every
+reader and concurrent writers fail fast with "database is locked".
+
+Every new SQLite connection now runs settings.SQLITE_PRAGMAS:
+
+    journal_mode=WAL      readers never block the writer and vice versa
+    synchronous=NORMAL    fsync at checkpoints only (safe with WAL)
+    busy_timeout          wait for the write lock instead of failing
+    mmap_size             memory-mapped reads
+    cache_size            page cache per connection (negative = KiB)
+    temp_store=MEMORY     sorts / temp tables in RAM
+
+Aliases listed in settings.SQLITE_READ_ONLY_ALIASES additionally get
+``query_only=ON`` so reporting connections can never write.
+
+Combined with CONN_MAX_AGE the PRAGMAs run once per persistent connection,
+not once per request. ``python manage.py sqlite_benchmark`` compares the
+default and tuned settings under concurrent load.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Applied when settings.SQLITE_PRAGMAS is not defined
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+
+
+def pragma_statements(pragmas, read_only=False):
+    """Return the PRAGMA statements for ``pragmas``, in a stable order."""
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+    if read_only:
+        statements.append('PRAGMA query_only=ON')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created receiver: tune every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    read_only = connection.alias in getattr(settings, 'SQLITE_READ_ONLY_ALIASES', ())
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(get_pragmas(), read_only):
+            try:
+                cursor.execute(statement)
+            except Exception:
+                # A PRAGMA the SQLite build does not know must not take the site down
+                logger.exception('dbtuning: %s failed on %s', statement, connection.alias)
+
+
+def connect_signals():
+    """Called from AppConfig.ready()."""
+    connection_created.connect(apply_pragmas, dispatch_uid='dbtuning-pragmas')
@@ -2,7 +2,7 @@ from functools import wraps
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth import logout
-from .models import CourseApplication
+from .access import get_access
 
 
 def check_for_auth(view_func):
@@ -16,6 +16,8 @@ def check_for_auth(view_func):
         if not request.user.is_authenticated:
             return view_func(request, *args, **kwargs)
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -26,7 +28,7 @@ def check_for_auth(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -34,7 +36,7 @@ def check_for_auth(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role == 'administrator' or request.user.is_superuser:
             messages.info(
@@ -58,16 +60,10 @@ def check_for_auth(view_func):
             return redirect('finance:dashboard')
 
         elif role == 'student':
-            application = (
-                CourseApplication.objects
-                .filter(user=request.user)
-                .first()
-            )
-            
-            if application and application.can_access_student_portal():
+            if access.can_access_portal:
                 return redirect('students:dashboard')
             
-            if application:
+            if access.has_application:
                 messages.info(
                     request,
                     'You have an active application. Check your status.'
@@ -99,6 +95,8 @@ def applicant_required(view_func):
             )
             return redirect('eduweb:auth_page')
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -109,7 +107,7 @@ def applicant_required(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -117,7 +115,7 @@ def applicant_required(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role == 'administrator' or request.user.is_superuser:
             messages.info(
@@ -164,6 +162,8 @@ def smart_redirect_applicant(view_func):
             )
             return redirect('eduweb:auth_page')
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -174,7 +174,7 @@ def smart_redirect_applicant(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -182,7 +182,7 @@ def smart_redirect_applicant(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role == 'administrator' or request.user.is_superuser:
             messages.info(
@@ -206,20 +206,14 @@ def smart_redirect_applicant(view_func):
             return redirect('finance:dashboard')
 
         elif role == 'student':
-            application = (
-                CourseApplication.objects
-                .filter(user=request.user)
-                .first()
-            )
-            
-            if application and application.can_access_student_portal():
+            if access.can_access_portal:
                 messages.success(
                     request,
                     'Welcome! Your admission is complete.'
                 )
                 return redirect('students:dashboard')
             
-            has_application = application is not None
+            has_application = access.has_application
             current_view = request.resolver_match.url_name
 
             if current_view == 'apply' and has_application:
@@ -259,6 +253,8 @@ def instructor_required(view_func):
             )
             return redirect('eduweb:auth_page')
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -269,7 +265,7 @@ def instructor_required(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -277,7 +273,7 @@ def instructor_required(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role != 'instructor':
             messages.warning(
@@ -305,6 +301,8 @@ def admin_required(view_func):
             )
             return redirect('eduweb:auth_page')
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -315,7 +313,7 @@ def admin_required(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -323,7 +321,7 @@ def admin_required(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role != 'administrator' and not request.user.is_superuser:
             messages.warning(
@@ -351,6 +349,8 @@ def finance_required(view_func):
             )
             return redirect('eduweb:auth_page')
 
+        access = get_access(request)
+
         # Check if account is inactive
         if not request.user.is_active:
             messages.warning(
@@ -361,7 +361,7 @@ def finance_required(view_func):
             return redirect('eduweb:auth_page')
 
         # Check if email is verified
-        if not request.user.profile.email_verified:
+        if not access.email_verified:
             messages.warning(
                 request, 
                 'Please verify your email before accessing your account.'
@@ -369,7 +369,7 @@ def finance_required(view_func):
             logout(request)
             return redirect('eduweb:auth_page')
 
-        role = request.user.profile.role
+        role = access.role
 
         if role != 'finance':
             messages.warning(
@@ -0,0 +1,301 @@
+"""
+enrollments.py — Bulk enrollment of students into LMS courses.
+
+One form submission per student does not scale to a cohort: every
+Enrollment.objects.create() fires update_course_enrollment_count (three
+aggregate queries and an UPDATE) plus two notification writes. This
+module enrolls any number of students with a fixed number of queries:
+
+    rows = enrollments.rows_from_csv(request.FILES['csv_file'])
+    rows = enrollments.rows_from_filter(program=p, status='approved')
+    report = enrollments.bulk_enroll(course, rows, enrolled_by=request.user)
+    report.counts            → {'enrolled': 398, 'already_enrolled': 2, …}
+    report.rows              → one EnrollmentRow per input row
+    report.as_csv()          → the same report as CSV text
+
+Every row is validated before anything is written: identifiers are
+resolved with one query per kind (email / username), existing enrollments
+with one more, then the new rows go in with bulk_create(ignore_conflicts),
+the students are notified with one bulk insert, the instructor gets a
+single summary notification and the course statistics are recomputed once.
+"""
+
+import csv
+import io
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import CourseApplication, Enrollment
+from .notifications import notify_many
+
+BATCH_SIZE = 1000
+
+# Row outcomes, in report order
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+DUPLICATE = 'duplicate'
+NOT_FOUND = 'not_found'
+AMBIGUOUS = 'ambiguous'
+INACTIVE = 'inactive'
+INVALID = 'invalid'
+
+RESULT_LABELS = {
+    ENROLLED: 'Enrolled',
+    ALREADY_ENROLLED: 'Already enrolled',
+    DUPLICATE: 'Duplicate row',
+    NOT_FOUND: 'No matching user',
+    AMBIGUOUS: 'Several users share this email',
+    INACTIVE: 'Account inactive',
+    INVALID: 'Invalid row',
+}
+
+# CSV header names accepted for the identifier column
+IDENTIFIER_COLUMNS = ('email', 'username', 'user', 'student')
+
+
+@dataclass
+class EnrollmentRow:
+    line: int
+    identifier: str
+    result: str = None
+    user_id: int = None
+
+    @property
+    def label(self):
+        return RESULT_LABELS[self.result]
+
+    @property
+    def ok(self):
+        return self.result in (ENROLLED, ALREADY_ENROLLED)
+
+
+class EnrollmentReport:
+    """Per-row outcome of a bulk_enroll() call."""
+
+    def __init__(self, course, rows, dry_run=False):
+        self.course = course
+        self.rows = rows
+        self.dry_run = dry_run
+
+    @property
+    def counts(self):
+        counts = dict.fromkeys(RESULT_LABELS, 0)
+        for row in self.rows:
+            counts[row.result] += 1
+        return counts
+
+    @property
+    def enrolled(self):
+        return self.counts[ENROLLED]
+
+    @property
+    def failed(self):
+        return [row for row in self.rows if not row.ok]
+
+    def as_context(self, failed_limit=200):
+        """Template context for templates/management/enrollment_import.html."""
+        failed = self.failed
+        return {
+            'report': self,
+            'report_counts': [(r, RESULT_LABELS[r], n) for r, n in self.counts.items()],
+            'report_csv': self.as_csv(),
+            'failed_rows': failed[:failed_limit],
+            'failed_truncated': len(failed) > failed_limit,
+        }
+
+    def summary(self):
+        counts = self.counts
+        verb = 'would be enrolled' if self.dry_run else 'enrolled'
+        problems = len(self.rows) - counts[ENROLLED] - counts[ALREADY_ENROLLED]
+        return (
+            f'{counts[ENROLLED]} student(s) {verb} in {self.course.title}; '
+            f'{counts[ALREADY_ENROLLED]} already enrolled, {problems} row(s) with problems.'
+        )
+
+    def as_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['line', 'identifier', 'result', 'detail'])
+        for row in self.rows:
+            writer.writerow([row.line, row.identifier, row.result, row.label])
+        return out.getvalue()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1. SOURCES
+# ─────────────────────────────────────────────────────────────────────────────
+def rows_from_csv(uploaded):
+    """
+    Read identifiers (email or username) from an uploaded CSV. A header
+    row naming one of IDENTIFIER_COLUMNS selects that column; otherwise
+    the first column is used.
+    """
+    text = io.TextIOWrapper(uploaded, encoding='utf-8-sig', errors='replace', newline='')
+    reader = csv.reader(text)
+    rows, column = [], 0
+    for line, record in enumerate(reader, start=1):
+        if line == 1:
+            header = [cell.strip().lower() for cell in record]
+            matches = [i for i, name in enumerate(header) if name in IDENTIFIER_COLUMNS]
+            if matches:
+                column = matches[0]
+                continue
+        if not any(cell.strip() for cell in record):
+            continue
+        value = record[column].strip() if column < len(record) else ''
+        rows.append(EnrollmentRow(line=line, identifier=value))
+    text.detach()
+    return rows
+
+
+def rows_from_filter(program=None, intake=None, status=None):
+    """Rows for every applicant account matching the application filters."""
+    applications = CourseApplication.objects.filter(user__isnull=False)
+    if program is not None:
+        applications = applications.filter(program=program)
+    if intake is not None:
+        applications = applications.filter(intake=intake)
+    if status:
+        applications = applications.filter(status=status)
+    user_ids = applications.order_by('user_id').values_list('user_id', flat=True).distinct()
+    return [
+        EnrollmentRow(line=i, identifier=str(uid), user_id=uid)
+        for i, uid in enumerate(user_ids, start=1)
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2. VALIDATION
+# ─────────────────────────────────────────────────────────────────────────────
+def _resolve(rows):
+    """Fill in user_id / result for rows that only carry an identifier."""
+    pending = [row for row in rows if row.user_id is None]
+    emails = {row.identifier.lower() for row in pending if '@' in row.identifier}
+    usernames = {row.identifier for row in pending if row.identifier and '@' not in row.identifier}
+
+    by_email = {}
+    for chunk in _chunks(sorted(emails)):
+        matches = (
+            User.objects.alias(email_lower=Lower('email'))
+            .filter(email_lower__in=chunk)
+            .values_list('email', 'pk', 'is_active')
+        )
+        for email, pk, is_active in matches:
+            by_email.setdefault(email.lower(), []).append((pk, is_active))
+
+    by_username = {}
+    for chunk in _chunks(sorted(usernames)):
+        for username, pk, is_active in (
+            User.objects.filter(username__in=chunk).values_list('username', 'pk', 'is_active')
+        ):
+            by_username[username] = [(pk, is_active)]
+
+    active = {}
+    for row in pending:
+        if not row.identifier:
+            row.result = INVALID
+            continue
+        if '@' in row.identifier:
+            found = by_email.get(row.identifier.lower(), [])
+        else:
+            found = by_username.get(row.identifier, [])
+        if not found:
+            row.result = NOT_FOUND
+        elif len(found) > 1:
+            row.result = AMBIGUOUS
+        else:
+            pk, is_active = found[0]
+            row.user_id, active[pk] = pk, is_active
+
+    # Filter rows carry a user id already; check those are active too
+    known = sorted({row.user_id for row in rows if row.user_id is not None and row.user_id not in active})
+    for chunk in _chunks(known):
+        active.update(User.objects.filter(pk__in=chunk).values_list('pk', 'is_active'))
+
+    for row in rows:
+        if row.user_id is None:
+            continue
+        if row.user_id not in active:
+            row.result, row.user_id = NOT_FOUND, None
+        elif not active[row.user_id]:
+            row.result = INACTIVE
+
+
+def validate(course, rows):
+    """Resolve every row and mark duplicates and existing enrollments; no writes."""
+    _resolve(rows)
+    candidates = {row.user_id for row in rows if row.user_id is not None and row.result is None}
+    existing = set()
+    for chunk in _chunks(sorted(candidates)):
+        existing.update(
+            Enrollment.objects.filter(course=course, student_id__in=chunk)
+            .values_list('student_id', flat=True)
+        )
+
+    seen = set()
+    for row in rows:
+        if row.user_id is None or row.result is not None:
+            continue
+        if row.user_id in seen:
+            row.result = DUPLICATE
+        elif row.user_id in existing:
+            row.result = ALREADY_ENROLLED
+        else:
+            row.result = ENROLLED
+        seen.add(row.user_id)
+    return rows
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3. ENROLL
+# ─────────────────────────────────────────────────────────────────────────────
+def enroll_users(course, user_ids, enrolled_by=None, notify=True):
+    """
+    Insert Enrollments for ``user_ids`` (already validated, not yet enrolled)
+    and notify them. Callers recompute course statistics once at the end.
+    """
+    user_ids = list(user_ids)
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=uid, course=course, enrolled_by=enrolled_by) for uid in user_ids],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    if notify and user_ids:
+        notify_many(
+            user_ids,
+            title=f'Enrolled in {course.title}',
+            message=f'You have been enrolled in "{course.title}". You can start learning now.',
+            notif_type='enrollment',
+            link=f'/courses/{course.slug}/',
+        )
+
+
+def bulk_enroll(course, rows, enrolled_by=None, notify=True, dry_run=False):
+    """Validate ``rows`` and enroll every new student in ``course``."""
+    validate(course, rows)
+    report = EnrollmentReport(course, rows, dry_run=dry_run)
+    new_ids = [row.user_id for row in rows if row.result == ENROLLED]
+    if dry_run or not new_ids:
+        return report
+
+    with transaction.atomic():
+        enroll_users(course, new_ids, enrolled_by=enrolled_by, notify=notify)
+        if notify and course.instructor_id and course.instructor_id != getattr(enrolled_by, 'pk', None):
+            notify_many(
+                [course.instructor_id],
+                title='Students Enrolled',
+                message=f'{len(new_ids)} student(s) were enrolled in "{course.title}".',
+                notif_type='enrollment',
+                link=f'/instructor/courses/{course.slug}/students/',
+            )
+        # bulk_create skips update_course_enrollment_count; recount once
+        course.update_statistics()
+    return report
@@ -0,0 +1,334 @@
+"""
+events.py — Live study group and discussion updates over Server-Sent Events.
+
+A page that shows a feed (study group chat, discussion replies) opens an
+EventSource on an events endpoint and receives only the rows added after
+the last one it rendered:
+
+    @login_required
+    def study_group_events(request, group_id):
+        ...permission checks...
+        return events.respond(request, 'study_group', group.pk,
+                              'students/study_group_message.html', 'msg')
+
+Every row is sent as ``id: <pk>`` plus the rendered item template, so the
+browser's automatic reconnect resumes from Last-Event-ID and never sees a
+row twice (static/js/live_feed.js).
+
+The bus
+    publish(source, key) bumps a cache tag (eduweb.caching) after the
+    transaction commits. Streams read the tag every POLL_INTERVAL and only
+    query the database when it changed, so an idle feed costs one cache
+    read per interval and no SQL. The cache is shared by all workers, so
+    a post handled by one process reaches streams in every other. Within
+    a process a Condition also wakes waiting streams straight away.
+
+Bounding the workers
+    Under WSGI every open stream holds a worker for its whole life. With
+    Passenger (passenger_wsgi.py) that is a whole application process, as
+    Passenger runs Python apps one request per process: a handful of open
+    study group pages would take the pool. So by default only ASGI
+    requests stream, and WSGI pages poll ``?format=json``. Streams end
+    after SSE_MAX_DURATION seconds (the browser reconnects on its own),
+    send a comment line every SSE_HEARTBEAT seconds so proxies keep them
+    open, and are capped per process at SSE_MAX_CONNECTIONS and
+    SSE_MAX_PER_USER. Over the cap the endpoint answers 503, and the
+    client falls back to polling.
+
+Modes (settings.SSE_MODE)
+    auto   → stream under ASGI; WSGI requests poll (default)
+    stream → also stream under a multithreaded WSGI server (e.g. gunicorn
+             gthread). Keep SSE_MAX_CONNECTIONS well below its threads per
+             process. Servers that report one request per process
+             (wsgi.multithread false, as Passenger does) still poll.
+    poll   → never stream; every request is answered as JSON
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+from .caching import invalidate_tags, tag_versions
+from .models import DiscussionReply, StudyGroupMessage
+
+logger = logging.getLogger(__name__)
+
+MODE = getattr(settings, 'SSE_MODE', 'auto')
+POLL_INTERVAL = getattr(settings, 'SSE_POLL_INTERVAL', 2)
+HEARTBEAT = getattr(settings, 'SSE_HEARTBEAT', 15)
+MAX_DURATION = getattr(settings, 'SSE_MAX_DURATION', 120)
+MAX_CONNECTIONS = getattr(settings, 'SSE_MAX_CONNECTIONS', 20)
+MAX_PER_USER = getattr(settings, 'SSE_MAX_PER_USER', 3)
+# Reconnect delay the browser is told to use, and the fallback poll rate
+RETRY_MS = getattr(settings, 'SSE_RETRY_MS', 3000)
+# Rows sent per query; a busier feed just loops again
+BATCH = 50
+
+
+# ─── 1. Sources ───────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    model: type
+    # Field holding the feed key, e.g. study_group_id
+    key_field: str
+    select_related: tuple = ('author',)
+
+    def tag(self, key):
+        return f'events-{self.name}-{key}'
+
+    def rows(self, key, since_id, limit=BATCH):
+        return list(
+            self.model.objects
+            .filter(**{self.key_field: key, 'pk__gt': since_id})
+            .select_related(*self.select_related)
+            .order_by('pk')[:limit]
+        )
+
+    def latest_id(self, key):
+        return (
+            self.model.objects.filter(**{self.key_field: key})
+            .order_by('-pk').values_list('pk', flat=True).first()
+        ) or 0
+
+
+SOURCES = {}
+
+
+def register(source):
+    SOURCES[source.name] = source
+    return source
+
+
+register(Source('study_group', StudyGroupMessage, 'study_group_id'))
+register(Source('discussion', DiscussionReply, 'discussion_id'))
+
+
+# ─── 2. Bus ───────────────────────────────────────────────────────────────────
+
+_wakeup = threading.Condition()
+
+
+def publish(source, key):
+    """Tell every stream of ``source``/``key`` to look for new rows."""
+    tag = SOURCES[source].tag(key)
+
+    def notify():
+        try:
+            invalidate_tags(tag)
+        except Exception:
+            logger.exception('events: failed to publish %s', tag)
+        with _wakeup:
+            _wakeup.notify_all()
+
+    transaction.on_commit(notify)
+
+
+def _version(tag):
+    return tag_versions([tag])[tag]
+
+
+# ─── 3. Connection limits ─────────────────────────────────────────────────────
+
+_slots_lock = threading.Lock()
+_open = Counter()
+
+
+def _acquire(user_id):
+    with _slots_lock:
+        if sum(_open.values()) >= MAX_CONNECTIONS or _open[user_id] >= MAX_PER_USER:
+            return False
+        _open[user_id] += 1
+        return True
+
+
+def _release(user_id):
+    with _slots_lock:
+        _open[user_id] -= 1
+        if _open[user_id] <= 0:
+            del _open[user_id]
+
+
+def open_streams():
+    """Streams currently held open by this process."""
+    with _slots_lock:
+        return sum(_open.values())
+
+
+# ─── 4. Streams ───────────────────────────────────────────────────────────────
+
+class _Feed:
+    """Reads new rows of one feed and renders them as SSE frames."""
+
+    def __init__(self, request, source, key, template, name, since_id, context=None):
+        self.source = source
+        self.key = key
+        self.tag = source.tag(key)
+        self.template = template
+        self.name = name
+        self.since_id = since_id
+        self.seen = None
+        # Render without context processors; the items only need these
+        self.context = {'request': request, 'user': request.user,
+                        'csrf_token': get_token(request), **(context or {})}
+
+    def render(self, row):
+        return render_to_string(self.template, {**self.context, self.name: row})
+
+    def poll(self):
+        """New rows as [(pk, html)], or [] when the tag has not moved."""
+        version = _version(self.tag)
+        if version == self.seen:
+            return []
+        rows = self.source.rows(self.key, self.since_id)
+        if len(rows) < BATCH:
+            # Caught up; a full batch means more are waiting
+            self.seen = version
+        if rows:
+            self.since_id = rows[-1].pk
+        return [(row.pk, self.render(row)) for row in rows]
+
+
+def _frame(pk, html):
+    return f'id: {pk}\nevent: item\ndata: {json.dumps({"id": pk, "html": html})}\n\n'
+
+
+def _sync_stream(feed):
+    yield f'retry: {RETRY_MS}\n\n'
+    deadline = time.monotonic() + MAX_DURATION
+    beat = time.monotonic()
+    while time.monotonic() < deadline:
+        items = feed.poll()
+        for pk, html in items:
+            yield _frame(pk, html)
+        if items:
+            beat = time.monotonic()
+            continue
+        if time.monotonic() - beat >= HEARTBEAT:
+            yield ': ping\n\n'
+            beat = time.monotonic()
+        # Don't hold a database connection while idle. close_old_connections()
+        # would keep it for CONN_MAX_AGE; the next poll opens a fresh one.
+        connections.close_all()
+        with _wakeup:
+            _wakeup.wait(POLL_INTERVAL)
+
+
+async def _async_stream(feed):
+    poll = sync_to_async(feed.poll)
+    yield f'retry: {RETRY_MS}\n\n'
+    deadline = time.monotonic() + MAX_DURATION
+    beat = time.monotonic()
+    while time.monotonic() < deadline:
+        items = await poll()
+        for pk, html in items:
+            yield _frame(pk, html)
+        if items:
+            beat = time.monotonic()
+            continue
+        if time.monotonic() - beat >= HEARTBEAT:
+            yield ': ping\n\n'
+            beat = time.monotonic()
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+# ─── 5. Endpoint ──────────────────────────────────────────────────────────────
+
+def _since(request):
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        return max(int(raw), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def can_stream(request):
+    """Whether this request may be answered with a long-lived stream."""
+    if MODE == 'poll':
+        return False
+    if isinstance(request, ASGIRequest):
+        return True
+    # WSGI: every stream holds a worker, so only on explicit opt-in and
+    # never on servers that run one request per process
+    return MODE == 'stream' and request.META.get('wsgi.multithread', False)
+
+
+def respond(request, source, key, template, name, context=None):
+    """
+    Event stream (or JSON page with ``?format=json``) of the ``source``
+    rows for ``key`` after the client's cursor. Each row is rendered with
+    ``template``, where it is available as ``name`` next to ``context``.
+    Call after the view has checked the user may read the feed. Where
+    this request may not stream (see can_stream) it gets a 204 instead.
+    """
+    polling = request.GET.get('format') == 'json'
+    if not polling and not can_stream(request):
+        # The EventSource treats 204 as "don't reconnect", and the client
+        # polls JSON instead
+        return HttpResponse(status=204)
+
+    source = SOURCES[source]
+    since_id = _since(request)
+    if since_id is None:
+        # No cursor: only rows from now on
+        since_id = source.latest_id(key)
+    feed = _Feed(request, source, key, template, name, since_id, context)
+
+    if polling:
+        items = feed.poll()
+        return JsonResponse({
+            'items': [{'id': pk, 'html': html} for pk, html in items],
+            'since': feed.since_id,
+            'retry': RETRY_MS,
+        })
+
+    user_id = request.user.pk
+    if not _acquire(user_id):
+        response = JsonResponse({'error': 'Too many live connections', 'retry': RETRY_MS}, status=503)
+        response['Retry-After'] = str(max(RETRY_MS // 1000, 1))
+        return response
+
+    if isinstance(request, ASGIRequest):
+        stream = _async_stream(feed)
+    else:
+        stream = _sync_stream(feed)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    # Runs when the server closes the response, even if it was never iterated
+    response._resource_closers.append(lambda: _release(user_id))
+    response['Cache-Control'] = 'no-cache'
+    # nginx: pass frames through as they are written
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ─── 6. Signals ───────────────────────────────────────────────────────────────
+
+def _published(sender, instance, created, **kwargs):
+    if not created:
+        return
+    for source in SOURCES.values():
+        if source.model is sender:
+            publish(source.name, getattr(instance, source.key_field))
+
+
+def connect_signals():
+    """Called from AppConfig.ready()."""
+    for source in SOURCES.values():
+        post_save.connect(
+            _published, sender=source.model,
+            dispatch_uid=f'events-{source.name}',
+        )
@@ -1,8 +1,9 @@
 ﻿from django import forms
 from .models import (
     ContactMessage, CourseApplication, CourseIntake,
-    ListOfCountry, ApplicationDocument
+    ListOfCountry, ApplicationDocument, Program
 )
+from . import enrollments
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -377,4 +378,93 @@ class SetNewPasswordForm(forms.Form):
             raise ValidationError({'password2': 'Passwords do not match.'})
         if p1 and len(p1) < 8:
             raise ValidationError({'password1': 'Password must be at least 8 characters.'})
-        return cleaned
\ No newline at end of file
+        return cleaned
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BULK ENROLLMENT FORM (instructor + management)
+# ─────────────────────────────────────────────────────────────────────────────
+class BulkEnrollmentForm(forms.Form):
+    """
+    Source of a bulk enrollment: a CSV of emails/usernames, or applicants
+    filtered by program, intake and application status. Pass ``courses``
+    to let the user pick the LMS course (management); otherwise the view
+    supplies it (instructor).
+    """
+    SOURCE_CHOICES = [('csv', 'Upload a CSV file'), ('filter', 'Select applicants')]
+
+    course = forms.ModelChoiceField(
+        queryset=None, required=False, empty_label='Select course...',
+        widget=forms.Select(attrs={'class': _SELECT}),
+    )
+    source = forms.ChoiceField(
+        choices=SOURCE_CHOICES, initial='csv',
+        widget=forms.RadioSelect(attrs={'class': _CHECK}),
+    )
+    csv_file = forms.FileField(
+        required=False,
+        label='CSV file',
+        help_text='One email or username per row; a header row named "email" or "username" is optional.',
+        widget=forms.FileInput(attrs={'class': _INPUT, 'accept': '.csv,text/csv'}),
+    )
+    program = forms.ModelChoiceField(
+        queryset=Program.objects.order_by('name'), required=False, empty_label='Any program',
+        widget=forms.Select(attrs={'class': _SELECT}),
+    )
+    intake = forms.ModelChoiceField(
+        queryset=CourseIntake.objects.select_related('program').order_by('-year', 'program__name'),
+        required=False, empty_label='Any intake',
+        widget=forms.Select(attrs={'class': _SELECT}),
+    )
+    status = forms.ChoiceField(
+        choices=[('', 'Any status')] + CourseApplication.STATUS_CHOICES,
+        required=False, initial='approved',
+        widget=forms.Select(attrs={'class': _SELECT}),
+    )
+    notify = forms.BooleanField(
+        required=False, initial=True,
+        label='Notify enrolled students',
+        widget=forms.CheckboxInput(attrs={'class': _CHECK}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label='Validate only (do not enroll)',
+        widget=forms.CheckboxInput(attrs={'class': _CHECK}),
+    )
+
+    MAX_CSV_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, *args, courses=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if courses is None:
+            del self.fields['course']
+        else:
+            self.fields['course'].queryset = courses
+            self.fields['course'].required = True
+
+    def clean_csv_file(self):
+        file = self.cleaned_data.get('csv_file')
+        if file:
+            if file.size > self.MAX_CSV_SIZE:
+                raise forms.ValidationError('CSV file must be less than 5 MB.')
+            if os.path.splitext(file.name)[1].lower() not in ('.csv', '.txt'):
+                raise forms.ValidationError('Only .csv files are allowed.')
+        return file
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('source') == 'csv' and not cleaned.get('csv_file'):
+            raise ValidationError({'csv_file': 'Choose a CSV file to import.'})
+        if cleaned.get('source') == 'filter' and not (
+            cleaned.get('program') or cleaned.get('intake') or cleaned.get('status')
+        ):
+            raise ValidationError('Choose at least one applicant filter.')
+        return cleaned
+
+    def rows(self):
+        """EnrollmentRows for the chosen source (call after is_valid())."""
+        data = self.cleaned_data
+        if data['source'] == 'csv':
+            return enrollments.rows_from_csv(data['csv_file'])
+        return enrollments.rows_from_filter(
+            program=data.get('program'), intake=data.get('intake'), status=data.get('status'),
+        )
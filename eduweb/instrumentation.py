@@ -0,0 +1,371 @@
+"""
+instrumentation.py — Per-view latency and query metrics without an APM.
+
+InstrumentationMiddleware wraps every request and records, per URL name
+(``students:dashboard``), the wall time, the number of database queries
+and the time spent in them. A request that is slower than SLOW_REQUEST_MS,
+goes over its query budget or repeats one statement REPEAT_THRESHOLD times
+(an N+1 loop) is logged on the ``eduweb.instrumentation`` logger together
+with its most expensive query fingerprints:
+
+    GET /student/dashboard/ (students:dashboard): 1840 ms, 212 queries in 903 ms,
+    over budget (8), 180 duplicate(s)
+       180×  702.4 ms  SELECT … FROM "eduweb_lessonprogress" WHERE … = ? LIMIT ?
+
+Queries are captured with connection.execute_wrapper() on every database
+alias while the view runs. A *fingerprint* is the SQL with literals,
+placeholders and IN (…) lists folded, so the queries of an N+1 loop share
+one fingerprint while their parameters differ.
+
+Budgets cap the queries of a view (settings.INSTRUMENTATION_QUERY_BUDGETS):
+
+    INSTRUMENTATION_QUERY_BUDGETS = {'students:dashboard': 8}
+
+Totals are kept per process and copied to the shared cache every
+FLUSH_SECONDS (like caching.stats()), so /metrics/ reports every worker in
+the Prometheus text format. Tests use the same capture:
+
+    assert_max_queries('students:dashboard', 8, user=student)
+    with max_queries(3):
+        ...
+"""
+
+import hmac
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import reverse
+
+from .caching import get_cache
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+SLOW_REQUEST_MS = getattr(settings, 'INSTRUMENTATION_SLOW_REQUEST_MS', 1000)
+QUERY_BUDGETS = getattr(settings, 'INSTRUMENTATION_QUERY_BUDGETS', {})
+# Budget for views not listed in QUERY_BUDGETS (None = unlimited)
+DEFAULT_QUERY_BUDGET = getattr(settings, 'INSTRUMENTATION_DEFAULT_QUERY_BUDGET', None)
+# One fingerprint run this often in a request is reported as N+1
+REPEAT_THRESHOLD = getattr(settings, 'INSTRUMENTATION_REPEAT_THRESHOLD', 10)
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', '')
+FLUSH_SECONDS = 30
+TOP_QUERIES = 5
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+# ─── 1. Query capture ─────────────────────────────────────────────────────────
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, *(?:%s|\?))*\)', re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r'\s+')
+_SELECT_LIST = re.compile(r'^SELECT (DISTINCT )?.+? FROM ', re.DOTALL)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """``sql`` with literals, placeholders and IN lists folded to ``?``."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _LITERAL.sub('?', sql).replace('%s', '?')
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryLog:
+    """Queries run on any connection while capture() is active."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        # fingerprint → [count, seconds]
+        self.fingerprints = {}
+        # (sql, params) → count, for exact duplicates
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.time += elapsed
+            entry = self.fingerprints.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if not many:
+                self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        """Queries that repeated an earlier statement with the same parameters."""
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        return {sql: n for sql, (n, _) in self.fingerprints.items() if n >= threshold}
+
+    def top(self, limit=TOP_QUERIES):
+        """[(fingerprint, count, seconds)], most time first."""
+        rows = sorted(self.fingerprints.items(), key=lambda item: item[1][1], reverse=True)
+        return [(sql, n, seconds) for sql, (n, seconds) in rows[:limit]]
+
+    def report(self, limit=TOP_QUERIES):
+        return '\n'.join(
+            f'  {n:4d}× {seconds * 1000:8.1f} ms  {_short(sql)}'
+            for sql, n, seconds in self.top(limit)
+        )
+
+
+def _short(sql):
+    # The column list is noise in a report; FROM/WHERE identify the query
+    return _SELECT_LIST.sub(lambda match: f'SELECT {match[1] or ""}… FROM ', sql)[:300]
+
+
+@contextmanager
+def capture():
+    """Yield a QueryLog of every query run inside the block, on every alias."""
+    log = QueryLog()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+
+
+# ─── 2. Totals ────────────────────────────────────────────────────────────────
+
+_REGISTRY_KEY = 'eduweb:metrics:processes'
+# Snapshots of workers that stopped reporting are dropped after this long
+PROCESS_TIMEOUT = 24 * 3600
+
+_lock = threading.Lock()
+# view → metric → cumulative value, for this process
+_totals = defaultdict(Counter)
+_last_flush = time.monotonic()
+
+
+def _process_key():
+    # Read on every flush: workers forked after import must not share a key
+    return f'eduweb:metrics:{socket.gethostname()}:{os.getpid()}'
+
+
+def _observe(view, seconds, log, slow, over_budget):
+    global _last_flush
+    with _lock:
+        totals = _totals[view]
+        totals['requests'] += 1
+        totals['seconds'] += seconds
+        totals['queries'] += log.count
+        totals['db_seconds'] += log.time
+        totals['duplicate_queries'] += log.duplicates
+        totals['slow_requests'] += int(slow)
+        totals['over_budget'] += int(over_budget)
+        for bound in BUCKETS:
+            if seconds <= bound:
+                totals[f'le:{bound}'] += 1
+        if time.monotonic() - _last_flush < FLUSH_SECONDS:
+            return
+        pending = {name: dict(values) for name, values in _totals.items()}
+        _last_flush = time.monotonic()
+    _flush(pending)
+
+
+def _flush(pending):
+    cache = get_cache()
+    key = _process_key()
+    try:
+        cache.set(key, pending, PROCESS_TIMEOUT)
+        registry = cache.get(_REGISTRY_KEY) or {}
+        now = time.time()
+        # A lost concurrent update only delays a worker until its next flush
+        registry = {k: seen for k, seen in registry.items() if now - seen < PROCESS_TIMEOUT}
+        registry[key] = now
+        cache.set(_REGISTRY_KEY, registry, None)
+    except Exception:
+        logger.exception('instrumentation: failed to flush metrics')
+
+
+def snapshot():
+    """{view: {metric: value}} summed over every worker, this one's latest numbers included."""
+    cache = get_cache()
+    own = _process_key()
+    registry = cache.get(_REGISTRY_KEY) or {}
+    combined = defaultdict(Counter)
+    for data in cache.get_many([key for key in registry if key != own]).values():
+        for view, values in data.items():
+            combined[view].update(values)
+    with _lock:
+        for view, values in _totals.items():
+            combined[view].update(values)
+    return combined
+
+
+def reset():
+    """Zero the totals of this process and forget every worker's snapshot."""
+    global _last_flush
+    with _lock:
+        _totals.clear()
+        _last_flush = time.monotonic()
+    cache = get_cache()
+    registry = cache.get(_REGISTRY_KEY) or {}
+    cache.delete_many([*registry, _REGISTRY_KEY, _process_key()])
+
+
+# ─── 3. Middleware ────────────────────────────────────────────────────────────
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def query_budget(view):
+    return QUERY_BUDGETS.get(view, DEFAULT_QUERY_BUDGET)
+
+
+class InstrumentationMiddleware:
+    """Measures every request. Goes first in MIDDLEWARE so the others count too."""
+
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        # Streaming bodies are measured until the view returns them
+        with capture() as log:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = view_name(request)
+        budget = query_budget(view)
+        over_budget = budget is not None and log.count > budget
+        slow = elapsed * 1000 >= SLOW_REQUEST_MS
+        repeated = log.repeated()
+        if slow or over_budget or repeated:
+            self._warn(request, view, elapsed, log, budget, over_budget, repeated)
+        _observe(view, elapsed, log, slow, over_budget)
+
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'app;dur={elapsed * 1000:.1f}, '
+                f'db;dur={log.time * 1000:.1f};desc="{log.count} queries"'
+            )
+        return response
+
+    @staticmethod
+    def _warn(request, view, elapsed, log, budget, over_budget, repeated):
+        notes = []
+        if over_budget:
+            notes.append(f'over budget ({budget})')
+        if log.duplicates:
+            notes.append(f'{log.duplicates} duplicate(s)')
+        if repeated:
+            notes.append(f'{len(repeated)} statement(s) repeated {REPEAT_THRESHOLD}+ times')
+        logger.warning(
+            '%s %s (%s): %.0f ms, %d queries in %.0f ms%s\n%s',
+            request.method, request.path, view, elapsed * 1000, log.count, log.time * 1000,
+            ''.join(f', {note}' for note in notes), log.report(),
+        )
+
+
+# ─── 4. /metrics/ ─────────────────────────────────────────────────────────────
+
+def metrics_allowed(request):
+    """Staff users, or a scraper sending ``Authorization: Bearer <METRICS_TOKEN>``."""
+    header = request.headers.get('Authorization', '')
+    if METRICS_TOKEN and header.startswith('Bearer '):
+        return hmac.compare_digest(header[7:].strip(), METRICS_TOKEN)
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+COUNTERS = (
+    ('db_queries_total', 'queries', 'Database queries run by the view'),
+    ('db_query_seconds_total', 'db_seconds', 'Time spent in database queries'),
+    ('duplicate_queries_total', 'duplicate_queries', 'Queries repeating an earlier statement of the same request'),
+    ('slow_requests_total', 'slow_requests', f'Requests slower than {SLOW_REQUEST_MS} ms'),
+    ('query_budget_exceeded_total', 'over_budget', 'Requests over the view query budget'),
+)
+
+
+def render_metrics():
+    """Prometheus text exposition of the totals of every worker."""
+    data = snapshot()
+    views = sorted(data)
+    lines = [
+        '# HELP eduweb_request_duration_seconds Wall time of requests by URL name',
+        '# TYPE eduweb_request_duration_seconds histogram',
+    ]
+    for view in views:
+        values, label = data[view], _label(view)
+        for bound in BUCKETS:
+            lines.append(
+                f'eduweb_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} '
+                f'{values.get(f"le:{bound}", 0)}'
+            )
+        lines.append(f'eduweb_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {values["requests"]}')
+        lines.append(f'eduweb_request_duration_seconds_sum{{view="{label}"}} {values["seconds"]:.6f}')
+        lines.append(f'eduweb_request_duration_seconds_count{{view="{label}"}} {values["requests"]}')
+
+    for name, field, description in COUNTERS:
+        lines.append(f'# HELP eduweb_{name} {description}')
+        lines.append(f'# TYPE eduweb_{name} counter')
+        for view in views:
+            value = data[view].get(field, 0)
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'eduweb_{name}{{view="{_label(view)}"}} {value}')
+
+    lines.append('# HELP eduweb_query_budget Query budget of the view')
+    lines.append('# TYPE eduweb_query_budget gauge')
+    for view, budget in sorted(QUERY_BUDGETS.items()):
+        lines.append(f'eduweb_query_budget{{view="{_label(view)}"}} {budget}')
+    return '\n'.join(lines) + '\n'
+
+
+# ─── 5. Test helpers ──────────────────────────────────────────────────────────
+
+@contextmanager
+def max_queries(limit, label='block'):
+    """Fail with the top fingerprints when the block runs more than ``limit`` queries."""
+    with capture() as log:
+        yield log
+    if log.count > limit:
+        raise AssertionError(
+            f'{label} ran {log.count} queries ({log.duplicates} duplicate), '
+            f'more than {limit}:\n{log.report(limit=20)}'
+        )
+
+
+def assert_max_queries(view, limit, *, client=None, user=None, args=None, kwargs=None,
+                       method='get', data=None, status=200, **extra):
+    """
+    Request the URL named ``view`` with the test client and fail when it
+    runs more than ``limit`` queries, or answers with another status than
+    ``status`` (a login redirect would pass any budget). Logs ``user`` in
+    on a fresh client when no ``client`` is given. Returns the response.
+    """
+    from django.test import Client
+
+    if client is None:
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+    url = reverse(view, args=args, kwargs=kwargs)
+    with max_queries(limit, label=view):
+        response = getattr(client, method)(url, data, **extra)
+    if status is not None and response.status_code != status:
+        raise AssertionError(f'{view} answered {response.status_code}, expected {status}')
+    return response
@@ -0,0 +1,190 @@
+"""
+invoices.py — Render-once invoice PDFs for application payments.
+
+Generating an invoice used to run xhtml2pdf on every click. Each invoice
+is now rendered once and stored in media storage under
+
+    invoices/<year>/<payment_reference>-<version>.pdf
+
+where ``version`` is a short hash of the invoice template source and the
+INVOICE_COMPANY details. Editing either gives every invoice a new name, so
+stale PDFs are never served and nothing has to be purged. The invoice
+date is the payment date and reportlab runs in invariant mode, so a
+re-render produces the same bytes.
+
+    name = invoices.get_or_render(payment)      # storage name, renders if missing
+    invoices.prerender_on_commit(payment.pk)    # after a payment succeeds
+    invoices.zip_response(payments, 'invoices_2026-01.zip')
+
+Pre-rendering runs on a single background worker so a burst of webhooks
+cannot occupy every CPU with PDF work.
+"""
+
+import hashlib
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.template.loader import render_to_string
+
+from .models import ApplicationPayment
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'finance/invoice.html'
+STORAGE_DIR = 'invoices'
+READ_BLOCK = 64 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='invoices')
+
+
+class InvoiceError(Exception):
+    """The PDF could not be produced."""
+
+
+# ─── 1. Naming ────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def template_version():
+    """Short hash of the template source and company details."""
+    template = loader.get_template(TEMPLATE_NAME)
+    digest = hashlib.sha256(template.template.source.encode())
+    for key, value in sorted(settings.INVOICE_COMPANY.items()):
+        digest.update(f'{key}={value}'.encode())
+    return digest.hexdigest()[:12]
+
+
+def storage_name(payment):
+    paid = payment.paid_at or payment.created_at
+    return f'{STORAGE_DIR}/{paid:%Y}/{payment.payment_reference}-{template_version()}.pdf'
+
+
+def download_name(payment):
+    return f'invoice_{payment.payment_reference}.pdf'
+
+
+# ─── 2. Rendering ─────────────────────────────────────────────────────────────
+
+def render_pdf(payment):
+    """Return the invoice PDF as bytes."""
+    try:
+        from reportlab import rl_config
+        from xhtml2pdf import pisa
+    except ImportError:
+        raise InvoiceError('PDF library not installed. Run: pip install xhtml2pdf')
+
+    # No timestamps or random document IDs in the output
+    rl_config.invariant = 1
+
+    company = settings.INVOICE_COMPANY
+    html = render_to_string(TEMPLATE_NAME, {
+        'payment': payment,
+        'invoice_number': f'INV-{payment.payment_reference}',
+        'invoice_date': payment.paid_at or payment.created_at,
+        'company_name': company['name'],
+        'company_address': company['address'],
+        'company_city': company['city'],
+        'company_email': company['email'],
+        'company_phone': company['phone'],
+    })
+    buffer = BytesIO()
+    result = pisa.CreatePDF(html, dest=buffer)
+    if result.err:
+        raise InvoiceError(f'Error generating PDF invoice {payment.payment_reference}.')
+    return buffer.getvalue()
+
+
+def get_or_render(payment):
+    """Storage name of the current invoice PDF, rendering it on first use."""
+    name = storage_name(payment)
+    if default_storage.exists(name):
+        return name
+    saved = default_storage.save(name, ContentFile(render_pdf(payment)))
+    if saved != name:
+        # Another worker stored it first; the content is identical
+        default_storage.delete(saved)
+    return name
+
+
+# ─── 3. Background pre-rendering ──────────────────────────────────────────────
+
+def _prerender(payment_id):
+    close_old_connections()
+    try:
+        payment = (
+            ApplicationPayment.objects
+            .select_related('application__user', 'application__program')
+            .filter(pk=payment_id, status='success')
+            .first()
+        )
+        if payment:
+            get_or_render(payment)
+    except Exception:
+        logger.exception('invoices: pre-render of payment %s failed', payment_id)
+    finally:
+        close_old_connections()
+
+
+def prerender_on_commit(payment_id):
+    """Queue a pre-render once the surrounding transaction has committed."""
+    if not getattr(settings, 'INVOICE_PRERENDER', True):
+        return
+    transaction.on_commit(lambda: _executor.submit(_prerender, payment_id))
+
+
+# ─── 4. ZIP archives ──────────────────────────────────────────────────────────
+
+class _Pipe:
+    """Write-only, unseekable sink; zipfile then streams with data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(payments):
+    """
+    Yield a ZIP archive of the payments' invoices piece by piece. Missing
+    PDFs are rendered on the way; at most one read block is held in memory.
+    PDFs are already compressed, so entries are stored, not deflated.
+    """
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for payment in payments:
+            try:
+                name = get_or_render(payment)
+            except InvoiceError:
+                logger.exception('invoices: skipped %s in archive', payment.payment_reference)
+                continue
+            with default_storage.open(name, 'rb') as source, \
+                    archive.open(download_name(payment), 'w', force_zip64=True) as target:
+                while block := source.read(READ_BLOCK):
+                    target.write(block)
+                    yield pipe.drain()
+            yield pipe.drain()
+    yield pipe.drain()
+
+
+def zip_response(payments, filename):
+    response = StreamingHttpResponse(iter_zip(payments), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,292 @@
+"""
+listing.py — Shared engine for the large admin listings.
+
+Replaces the Paginator + icontains + one-COUNT-per-stat pattern, which
+scans the whole table on every page load and gets slower with every page:
+
+    stats = listing.conditional_stats(
+        User.objects.all(),
+        cache_key='users', total=None, active=Q(is_active=True),
+    )                                          # one SELECT with COUNT(...) FILTER
+    qs = listing.search(qs, term, ['username', 'email'])
+    page = listing.keyset_page(request, qs, ['-date_joined', '-pk'], per_page=20)
+    if listing.wants_json(request):
+        return listing.json_response(page, serialize_row)
+
+Search (settings.ADMIN_SEARCH_MODE):
+    prefix   → every word must be the start of one of the fields, matched as
+               a range on LOWER(field) so expression indexes are used
+               (default; see migration 0008 for the indexes)
+    contains → the old icontains scan, for small tables
+
+Pagination is keyset based: the page links carry an opaque cursor built from
+the ordering values of the first/last row, so page 10,000 costs the same as
+page 1. Ordering fields must be non-null and end with a unique field. The
+total is exact up to COUNT_CAP rows and shown as "COUNT_CAP+" beyond that.
+cursor_page() pages rows from any other source with the same cursors.
+
+Date filters go through date_filter(), which compares the bare column
+against [start of first day, start of the day after the last) instead of
+``__date`` lookups that wrap the column in a function.
+"""
+
+import base64
+import json
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .caching import get_or_set, make_key
+
+COUNT_CAP = 1000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1. STATS
+# ─────────────────────────────────────────────────────────────────────────────
+def conditional_stats(queryset, cache_key=None, timeout=None, **conditions):
+    """
+    Count ``queryset`` under several conditions in one query.
+    ``conditions`` maps a name to a Q object, or to None for the plain total.
+    With ``cache_key`` the result is cached for ``timeout`` seconds
+    (settings.ADMIN_STATS_CACHE_TIMEOUT by default; 0 disables caching).
+    """
+    def compute():
+        return queryset.aggregate(**{
+            name: Count('pk', filter=condition) if condition is not None else Count('pk')
+            for name, condition in conditions.items()
+        })
+
+    if timeout is None:
+        timeout = getattr(settings, 'ADMIN_STATS_CACHE_TIMEOUT', 60)
+    if not cache_key or not timeout:
+        return compute()
+    return get_or_set(make_key('listing-stats', cache_key), compute, timeout)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2. SEARCH
+# ─────────────────────────────────────────────────────────────────────────────
+def _prefix_upper_bound(term):
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def search(queryset, term, fields, mode=None):
+    """Filter ``queryset`` so every word of ``term`` matches one of ``fields``."""
+    words = (term or '').lower().split()
+    if not words:
+        return queryset
+    mode = mode or getattr(settings, 'ADMIN_SEARCH_MODE', 'prefix')
+
+    if mode == 'contains':
+        for word in words:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': word})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    aliases = {f'_lower_{field}': Lower(field) for field in fields}
+    queryset = queryset.alias(**aliases)
+    for word in words:
+        upper = _prefix_upper_bound(word)
+        condition = Q()
+        for alias in aliases:
+            condition |= Q(**{f'{alias}__gte': word, f'{alias}__lt': upper})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3. KEYSET PAGINATION
+# ─────────────────────────────────────────────────────────────────────────────
+def _encode_cursor(values):
+    # Plain isoformat(): DjangoJSONEncoder truncates microseconds, which
+    # would make the cursor skip or repeat rows
+    raw = json.dumps(values, default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v))
+    raw = raw.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, model, keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(keys):
+            return None
+        return [
+            model._meta.pk.to_python(v) if name == 'pk' else model._meta.get_field(name).to_python(v)
+            for (name, _), v in zip(keys, values)
+        ]
+    except Exception:
+        return None
+
+
+def _seek(keys, values, forward):
+    """WHERE clause for rows strictly after (forward) or before ``values``."""
+    condition = Q()
+    for i, (name, descending) in enumerate(keys):
+        op = 'lt' if descending == forward else 'gt'
+        step = Q(**{f'{name}__{op}': values[i]})
+        for prev_name, prev_value in zip((k[0] for k in keys[:i]), values[:i]):
+            step &= Q(**{prev_name: prev_value})
+        condition |= step
+    return condition
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing; iterate it like a Page."""
+
+    def __init__(self, object_list, has_next, has_previous, next_url, previous_url,
+                 count, count_is_estimate, next_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_url = next_url
+        self.previous_url = previous_url
+        self.count = count
+        self.count_is_estimate = count_is_estimate
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _page_url(request, **params):
+    query = request.GET.copy()
+    for key in ('after', 'before', 'page', 'format'):
+        query.pop(key, None)
+    query.update(params)
+    return '?' + query.urlencode()
+
+
+def keyset_page(request, queryset, ordering, per_page=20, total=None):
+    """
+    Return the KeysetPage selected by the ``after``/``before`` cursor in
+    request.GET. Pass ``total`` when the row count is already known (e.g.
+    from conditional_stats on an unfiltered listing) to skip the count.
+    """
+    keys = _keys(ordering)
+
+    def fetch(values, forward, limit):
+        page_qs = queryset
+        if values is not None:
+            page_qs = page_qs.filter(_seek(keys, values, forward))
+        return list(page_qs.order_by(*(ordering if forward else reverse_ordering(ordering)))[:limit])
+
+    if total is not None:
+        count, estimate = total, False
+    else:
+        count, estimate = capped_count(queryset)
+    return cursor_page(request, fetch, ordering, queryset.model, per_page, count, estimate)
+
+
+def _keys(ordering):
+    return [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+
+
+def reverse_ordering(ordering):
+    return [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+
+
+def capped_count(queryset):
+    """(count, is_estimate): exact up to COUNT_CAP rows."""
+    count = queryset.order_by()[:COUNT_CAP + 1].count()
+    return min(count, COUNT_CAP), count > COUNT_CAP
+
+
+def cursor_page(request, fetch, ordering, model, per_page, count, count_is_estimate=False):
+    """
+    keyset_page() for rows that do not come from a single queryset.
+    ``fetch(values, forward, limit)`` returns up to ``limit`` rows strictly
+    after (forward, in ``ordering``) or before (backward, in reverse order)
+    the cursor ``values``, or from the start when ``values`` is None.
+    """
+    keys = _keys(ordering)
+
+    cursor, forward = request.GET.get('after'), True
+    if not cursor and request.GET.get('before'):
+        cursor, forward = request.GET['before'], False
+    values = _decode_cursor(cursor, model, keys) if cursor else None
+    if values is None:
+        forward = True
+
+    rows = fetch(values, forward, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    if forward:
+        has_next, has_previous = has_more, values is not None
+    else:
+        has_next, has_previous = True, has_more
+
+    def cursor_of(obj):
+        return _encode_cursor([getattr(obj, name) for name, _ in keys])
+
+    next_cursor = cursor_of(rows[-1]) if rows and has_next else None
+    next_url = _page_url(request, after=next_cursor) if next_cursor else None
+    previous_url = _page_url(request, before=cursor_of(rows[0])) if rows and has_previous else None
+
+    return KeysetPage(rows, has_next, has_previous, next_url, previous_url,
+                      count, count_is_estimate, next_cursor)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4. JSON MODE (infinite scroll)
+# ─────────────────────────────────────────────────────────────────────────────
+def wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
+def json_response(page, serialize):
+    """{"results": [...], "next": cursor-or-null, "count": n, "count_is_estimate": bool}"""
+    return JsonResponse({
+        'results': [serialize(obj) for obj in page],
+        'next': page.next_cursor,
+        'next_url': f'{page.next_url}&format=json' if page.next_url else None,
+        'count': page.count,
+        'count_is_estimate': page.count_is_estimate,
+    }, encoder=DjangoJSONEncoder)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 5. DATE RANGES
+# ─────────────────────────────────────────────────────────────────────────────
+def day_bounds(date_from=None, date_to=None):
+    """
+    Aware datetimes [start, end) covering the local calendar days
+    ``date_from``..``date_to`` inclusive; either end may be None.
+    """
+    start = end = None
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return start, end
+
+
+def date_filter(queryset, field, date_from=None, date_to=None):
+    """
+    Rows whose ``field`` falls on the given days, as ``field >= start AND
+    field < end``. Unlike ``field__date__gte`` this leaves the column bare,
+    so an index on it is used.
+    """
+    start, end = day_bounds(date_from, date_to)
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from eduweb import auditarchive
+
+
+class Command(BaseCommand):
+    help = 'Move AuditLog months older than AUDIT_HOT_MONTHS into compressed archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=None,
+                            help='Months kept in the table besides the current one '
+                                 '(default: settings.AUDIT_HOT_MONTHS)')
+
+    def handle(self, *args, **options):
+        moved = auditarchive.archive(options['keep_months'])
+        for month, count in sorted(moved.items()):
+            self.stdout.write(f'{month:%Y-%m}: {count} row(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {sum(moved.values())} audit log row(s) to {auditarchive.archive_dir()}'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from eduweb import caching
+
+
+class Command(BaseCommand):
+    help = 'Show shared cache hit/miss counters (all workers combined)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing')
+
+    def handle(self, *args, **options):
+        data = caching.stats()
+        self.stdout.write(f"Backend : {caching.get_cache().__class__.__name__}")
+        self.stdout.write(f"Hits    : {data['hits']}")
+        self.stdout.write(f"Misses  : {data['misses']}")
+        self.stdout.write(f"Hit rate: {data['hit_rate'] * 100:.1f}%")
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from eduweb import certificates
+
+
+class Command(BaseCommand):
+    help = 'Measure certificate PDF throughput (certificates/second) in-process and with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=300, help='Certificates per run')
+        parser.add_argument('--workers', type=int, nargs='+', default=None,
+                            help='Worker counts to compare (default: 1 and CPU count)')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        workers = options['workers'] or sorted({1, os.cpu_count() or 1})
+        out = tempfile.mkdtemp(prefix='certificate-benchmark-')
+        try:
+            # Synthetic jobs: no database rows are touched
+            jobs = [
+                certificates.CertificateJob(
+                    pk=i,
+                    certificate_id=f'CERT-BENCH{i:06d}',
+                    verification_code='00000000-0000-0000-0000-000000000000',
+                    template='program' if i % 2 else 'lms_course',
+                    student_name=f'Student Number {i}',
+                    title='Introduction to Computer Science',
+                    subtitle='Bachelor',
+                    completion_date=date(2026, 6, 30),
+                    issued_date=date(2026, 7, 1),
+                    grade='A',
+                    name=f'bench_{i}.pdf',
+                    path=os.path.join(out, f'bench_{i}.pdf'),
+                )
+                for i in range(count)
+            ]
+            baseline = None
+            for n in workers:
+                started = time.perf_counter()
+                failed = sum(1 for _, _, error in certificates.render_all(jobs, n) if error)
+                elapsed = time.perf_counter() - started
+                rate = count / elapsed
+                baseline = baseline or rate
+                size = sum(os.path.getsize(job.path) for job in jobs) / count / 1024
+                self.stdout.write(
+                    f'workers={n:<3} {count} certificates in {elapsed:.2f}s · '
+                    f'{rate:.1f}/s · {rate / baseline:.1f}x · {size:.0f} KB avg · {failed} failed'
+                )
+        finally:
+            shutil.rmtree(out, ignore_errors=True)
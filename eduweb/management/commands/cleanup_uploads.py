@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from eduweb import uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned chunked uploads from UPLOAD_TEMP_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=None,
+                            help='Age in seconds (default: settings.UPLOAD_EXPIRY)')
+
+    def handle(self, *args, **options):
+        max_age = options['max_age']
+        if max_age is None:
+            max_age = getattr(settings, 'UPLOAD_EXPIRY', 24 * 3600)
+        removed = uploads.cleanup(max_age)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} stale upload file(s) from {uploads.temp_dir()}'
+        ))
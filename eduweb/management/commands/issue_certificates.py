@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from eduweb import audit, certificates
+from eduweb.models import Certificate, LMSCourse, Program
+from eduweb.notifications import notify_many
+
+
+class Command(BaseCommand):
+    help = 'Create and render certificates for a course or program cohort'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--course', help='LMS course slug or code')
+        target.add_argument('--program', help='Program code or ID')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Render processes (default: CPU count; 1 = in-process)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render certificates that already have a file')
+        parser.add_argument('--no-create', action='store_true',
+                            help='Only render existing certificates, do not create missing ones')
+        parser.add_argument('--no-notify', action='store_true',
+                            help='Do not notify students about new certificates')
+
+    def handle(self, *args, **options):
+        if options['course']:
+            course = LMSCourse.objects.filter(
+                Q(slug=options['course']) | Q(code=options['course'])
+            ).first()
+            if course is None:
+                raise CommandError(f"No LMS course '{options['course']}'.")
+            if not course.has_certificate:
+                self.stdout.write(self.style.WARNING(f'{course.title} is not marked as awarding a certificate.'))
+            label, title = f'course {course.slug}', course.title
+            queryset = Certificate.objects.filter(course=course)
+            create = certificates.create_for_course
+            subject = course
+        else:
+            value = options['program']
+            lookup = Q(code=value) | (Q(pk=value) if value.isdigit() else Q())
+            program = Program.objects.filter(lookup).first()
+            if program is None:
+                raise CommandError(f"No program '{value}'.")
+            label, title = f'program {program.code}', program.name
+            queryset = Certificate.objects.filter(program=program, certificate_type='program')
+            create = certificates.create_for_program
+            subject = program
+
+        created = [] if options['no_create'] else create(subject)
+        self.stdout.write(f'{label}: {len(created)} certificate(s) created')
+
+        def progress(done, total):
+            if done % 100 == 0 or done == total:
+                self.stdout.write(f'  {done}/{total}')
+
+        report = certificates.issue(
+            queryset, workers=options['workers'], force=options['force'], progress=progress,
+        )
+        for pk, error in report.failed:
+            self.stderr.write(f'  certificate {pk}: {error}')
+
+        rendered = set(report.rendered)
+        new_students = [c.student_id for c in created if c.pk in rendered]
+        if new_students and not options['no_notify']:
+            notify_many(
+                new_students,
+                'Certificate Issued',
+                f'Your certificate for "{title}" has been issued. Congratulations!',
+                notif_type='certificate',
+                link='/student/certificates/',
+            )
+
+        audit.record(
+            action='create',
+            model_name='Certificate',
+            description=f'issue_certificates {label}: {report.summary()}',
+            extra_data={
+                'target': label,
+                'created': len(created),
+                'rendered': len(report.rendered),
+                'skipped': report.skipped,
+                'failed': [pk for pk, _ in report.failed],
+                'seconds': round(report.seconds, 2),
+            },
+        )
+        style = self.style.ERROR if report.failed else self.style.SUCCESS
+        self.stdout.write(style(f'{label}: {report.summary()}'))
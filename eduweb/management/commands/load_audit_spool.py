@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from eduweb import audit
+
+
+class Command(BaseCommand):
+    help = 'Move spooled audit entries (AUDIT_MODE=spool) into the AuditLog table'
+
+    def handle(self, *args, **options):
+        loaded = audit.load_spool()
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {loaded} audit entr{"y" if loaded == 1 else "ies"} from {audit.spool_dir()}'
+        ))
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from eduweb.dbrouting import REPORTING_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Copy the default SQLite database into the reporting database (online backup)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Repeat every N seconds (0 = run once)')
+        parser.add_argument('--pages', type=int, default=1024,
+                            help='Pages copied per step; the source stays writable between steps')
+
+    def handle(self, *args, **options):
+        if REPORTING_ALIAS not in connections.settings:
+            raise CommandError('No "reporting" database configured (set DB_REPORTING_ALIAS=1).')
+
+        source = str(connections.settings['default']['NAME'])
+        target = str(connections.settings[REPORTING_ALIAS]['NAME'])
+        if connections.settings['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Snapshots are only supported for SQLite; use replication instead.')
+        if source == target:
+            raise CommandError('The reporting alias points at the default file; nothing to copy.')
+
+        while True:
+            started = time.monotonic()
+            self._snapshot(source, target, options['pages'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {source} → {target} in {time.monotonic() - started:.2f}s"
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def _snapshot(self, source, target, pages):
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target)
+        try:
+            # sqlite3 backup API: consistent copy even while default is being written
+            src.backup(dst, pages=pages)
+            dst.execute('PRAGMA journal_mode=WAL')
+        finally:
+            dst.close()
+            src.close()
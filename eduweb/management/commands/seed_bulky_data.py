@@ -3,10 +3,15 @@ import uuid
 from decimal import Decimal
 from datetime import timedelta, date
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db.models import Max
 from django.utils import timezone
+from django.utils.text import slugify
 from faker import Faker
 
+from eduweb import conversations, seeding, slugs
+
 from eduweb.models import (
     SiteConfig, SiteHistoryMilestone, InstitutionMember, Testimonial,
     Announcement, Assignment, AssignmentSubmission, AuditLog, Badge, StudentBadge,
@@ -19,11 +24,14 @@ from eduweb.models import (
     QuizAnswer, QuizAttempt, QuizResponse, Review, SubscriptionPlan,
     Subscription, SystemConfiguration, UserProfile, Vendor, StudyGroup,
     StudyGroupMember, StudyGroupMessage, BroadcastMessage, StaffPayroll,
-    ListOfCountry, FeePayment,
+    ListOfCountry, FeePayment, Conversation,
 )
 
 fake = Faker()
 
+# Students that go through the detailed pass when --bulk adds the rest
+DETAILED_STUDENTS = 8
+
 # ── Provided embed codes (iframe strings) for lesson video_url fields ──────────
 EMBED_CODES = [
     '<iframe width="560" height="315" src="https://www.youtube.com/embed/-mJFZp84TIY?si=GaHX9emFQiFb9uqa" title="YouTube video player" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>',
@@ -51,7 +59,26 @@ PROMO_VIDEO_EMBED = (
 class Command(BaseCommand):
     help = 'Seeds ALL tables with realistic data covering every single field'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=DETAILED_STUDENTS,
+                            help='Number of student accounts (benchmarks seed 1k/10k/100k)')
+        parser.add_argument('--bulk', action='store_true',
+                            help=f'Seed {DETAILED_STUDENTS} students in detail and bulk-insert the rest '
+                                 '(users, applications, enrollments, progress, quiz attempts)')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Random seed, for reproducible data')
+        parser.add_argument('--courses-per-student', type=int, default=4,
+                            help='Maximum LMS enrollments per bulk-inserted student')
+
     def handle(self, *args, **kwargs):
+        if kwargs['seed'] is not None:
+            random.seed(kwargs['seed'])
+            Faker.seed(kwargs['seed'])
+        # Course statistics are recomputed once at the end instead of per row
+        with seeding.deferred_statistics():
+            self._seed(**kwargs)
+
+    def _seed(self, **kwargs):
         self.stdout.write(self.style.WARNING(
             "🚀 Starting FULL database seeding — every table, every field..."
         ))
@@ -59,7 +86,7 @@ class Command(BaseCommand):
         # ── CLEANUP ──────────────────────────────────────────────────────────
         self.stdout.write("🧹 Clearing existing data...")
         models_to_clear = [
-            AuditLog, Notification, Message, TicketReply, SupportTicket,
+            AuditLog, Notification, Message, Conversation, TicketReply, SupportTicket,
             StudentBadge, Badge, QuizResponse, QuizAttempt, QuizAnswer,
             QuizQuestion, Quiz, AssignmentSubmission, Assignment,
             LessonProgress, Certificate, Review, Enrollment, DiscussionReply,
@@ -73,10 +100,13 @@ class Command(BaseCommand):
             StudyGroupMessage, StudyGroupMember, StudyGroup, BroadcastMessage,
             InstitutionMember, SiteHistoryMilestone, SiteConfig, Testimonial, ListOfCountry,
         ]
-        for model in models_to_clear:
-            model.objects.all().delete()
-        UserProfile.objects.all().delete()
-        User.objects.all().delete()
+        # Delete receivers only invalidate cache tags; the whole cache goes instead
+        with seeding.muted_delete_signals():
+            for model in models_to_clear:
+                model.objects.all().delete()
+            UserProfile.objects.all().delete()
+            User.objects.all().delete()
+        seeding.clear_cache()
         self.stdout.write(self.style.SUCCESS("   ✅ All data cleared"))
 
         # ── 0. LIST OF COUNTRIES ─────────────────────────────────────────────
@@ -159,21 +189,6 @@ class Command(BaseCommand):
             office_hours_saturday='Saturday: 9:00 AM - 1:00 PM',
             office_hours_sunday='Sunday: Closed',
 
-            # ── Labelled Emails ───────────────────────────────────────────────
-            email_admissions='admissions@miu.edu',
-            email_info='info@miu.edu',
-            email_international='international@miu.edu',
-
-            # ── Labelled Phone Lines ──────────────────────────────────────────
-            phone_admissions='+1 (555) 123-4567',
-            phone_general='+1 (555) 123-4568',
-            phone_international='+1 (555) 123-4569',
-
-            # ── Office Hours ──────────────────────────────────────────────────
-            office_hours_weekday='Monday - Friday: 8:00 AM - 6:00 PM',
-            office_hours_saturday='Saturday: 9:00 AM - 1:00 PM',
-            office_hours_sunday='Sunday: Closed',
-
             # ── Embed Codes ───────────────────────────────────────────────────
             promo_video_url=PROMO_VIDEO_EMBED,
             campus_map_embed_url=CAMPUS_MAP_EMBED,
@@ -311,14 +326,17 @@ class Command(BaseCommand):
             'support': [], 'content_managers': [], 'finance': [], 'qa': [],
         }
 
-        def make_users(username_prefix, role_key, count=6, is_staff=False):
+        # Hashing is deliberately slow; every account shares one hash
+        password_hash = make_password("12345")
+
+        def make_users(username_prefix, role_key, count=6, is_staff=False, verified=4):
             created = []
             for i in range(count):
                 uname = f"{username_prefix}{i + 1}" if i > 0 else username_prefix
-                u = User.objects.create_user(
+                u = User.objects.create(
                     username=uname,
                     email=f"{uname}@miu.edu",
-                    password="12345",
+                    password=password_hash,
                     first_name=fake.first_name(),
                     last_name=fake.last_name(),
                     is_staff=is_staff,
@@ -336,12 +354,17 @@ class Command(BaseCommand):
                 p.twitter = f"https://twitter.com/{uname}" if random.random() > 0.5 else ''
                 p.email_notifications = random.choice([True, False])
                 p.marketing_emails = random.choice([True, False])
-                p.email_verified = i < 4
+                p.email_verified = i < verified
                 p.save()
                 created.append(u)
             return created
 
-        users['students'] = make_users('student', 'student', 8)
+        student_count = kwargs['students']
+        if kwargs['bulk']:
+            student_count = min(student_count, DETAILED_STUDENTS)
+        users['students'] = make_users(
+            'student', 'student', student_count, verified=max(4, student_count * 3 // 4),
+        )
         users['instructors'] = make_users('instructor', 'instructor', 6)
         users['admins'] = make_users('admin', 'admin', 4, is_staff=True)
         users['content_managers'] = make_users('content_mgr', 'content_manager', 4)
@@ -888,13 +911,16 @@ class Command(BaseCommand):
             if not prog_intakes:
                 continue
             intake = random.choice(prog_intakes)
-            status = random.choice([
+            # A quarter of the students (at least one) get full portal access
+            # so the student pages have someone to render for
+            portal_ready = not applications or random.random() < 0.25
+            status = 'approved' if portal_ready else random.choice([
                 'draft', 'pending_payment', 'payment_complete',
                 'under_review', 'approved', 'rejected',
             ])
             is_approved = status == 'approved'
-            admitted = is_approved and random.random() > 0.4
-            dept_approved = admitted and random.random() > 0.5
+            admitted = portal_ready or (is_approved and random.random() > 0.4)
+            dept_approved = portal_ready or (admitted and random.random() > 0.5)
             adm_number = (
                 f"ADM-{timezone.now().year}-{uuid.uuid4().hex[:8].upper()}"
                 if admitted else None
@@ -1446,10 +1472,11 @@ class Command(BaseCommand):
         # ── 36. BLOG POSTS ────────────────────────────────────────────────────
         self.stdout.write("✍️  Creating blog posts...")
         authors = users['instructors'] + users['content_managers'] + users['admins']
+        blog_posts = []
         for author in authors:
             for _ in range(random.randint(1, 3)):
                 status = random.choice(['published', 'published', 'draft', 'archived'])
-                BlogPost.objects.create(
+                blog_posts.append(BlogPost(
                     title=fake.catch_phrase(),
                     subtitle=fake.sentence(),
                     excerpt=fake.text(max_nb_chars=300),
@@ -1468,7 +1495,10 @@ class Command(BaseCommand):
                     publish_date=timezone.now() - timedelta(days=random.randint(1, 180)),
                     meta_description=fake.text(max_nb_chars=155),
                     meta_keywords=', '.join([fake.word() for _ in range(4)]),
-                )
+                ))
+        # Slugs for every post in one query; catch phrases repeat
+        slugs.assign(blog_posts, lambda post: slugify(post.title))
+        BlogPost.objects.bulk_create(blog_posts)
 
         # ── 37. DISCUSSIONS & REPLIES ─────────────────────────────────────────
         self.stdout.write("💬 Creating discussions...")
@@ -1561,7 +1591,7 @@ class Command(BaseCommand):
             for _ in range(random.randint(2, 5)):
                 recipient = random.choice(others)
                 is_read = random.choice([True, False])
-                msg = Message.objects.create(
+                msg = Message(
                     sender=user, recipient=recipient,
                     subject=fake.sentence(),
                     body=fake.text(max_nb_chars=500),
@@ -1569,14 +1599,18 @@ class Command(BaseCommand):
                     read_at=timezone.now() - timedelta(hours=random.randint(1, 72))
                     if is_read else None,
                 )
+                # send() files the message in a conversation and its counters
+                conversations.send(msg)
                 if random.random() > 0.6:
-                    Message.objects.create(
+                    conversations.send(Message(
                         sender=recipient, recipient=user,
                         subject=f"Re: {msg.subject}",
                         body=fake.text(max_nb_chars=300),
                         parent=msg,
                         is_read=random.choice([True, False]),
-                    )
+                    ))
+        # send() counts every new message as unread; match the seeded is_read flags
+        conversations.recount()
 
         # ── 40. SUPPORT TICKETS ───────────────────────────────────────────────
         self.stdout.write("🎫 Creating support tickets...")
@@ -1671,9 +1705,10 @@ class Command(BaseCommand):
                    'access', 'export', 'permission_change']
         model_names = ['Course', 'User', 'Enrollment', 'Assignment',
                        'Payment', 'Review', 'Discussion', 'Application']
+        audit_logs = []
         for user in verified_all:
             for _ in range(random.randint(4, 12)):
-                AuditLog.objects.create(
+                audit_logs.append(AuditLog(
                     user=user,
                     action=random.choice(actions),
                     model_name=random.choice(model_names),
@@ -1687,7 +1722,8 @@ class Command(BaseCommand):
                         'location': fake.city(),
                         'session_id': uuid.uuid4().hex,
                     },
-                )
+                ))
+        AuditLog.objects.bulk_create(audit_logs)
 
         # ── 45. BROADCAST MESSAGES ────────────────────────────────────────────
         self.stdout.write("📡 Creating broadcast messages...")
@@ -1719,7 +1755,6 @@ class Command(BaseCommand):
             BroadcastMessage.objects.create(
                 subject=subject, message=fake.text(max_nb_chars=500),
                 filter_type=ftype, filter_values=fvals,
-                recipient_emails=emails,
                 recipient_count=len(emails),
                 status=status,
                 created_by=random.choice(broadcast_creators),
@@ -1770,10 +1805,27 @@ class Command(BaseCommand):
                     if pstatus == 'paid' else None,
                 )
 
+        # ── 47. BULK STUDENTS ─────────────────────────────────────────────────
+        if kwargs['bulk'] and kwargs['students'] > student_count:
+            bulk_count = kwargs['students'] - student_count
+            self.stdout.write(f"🚚 Bulk-inserting {bulk_count} students...")
+            last_detailed = User.objects.aggregate(last=Max('pk'))['last']
+            counts = seeding.bulk_students(
+                bulk_count, start=student_count + 1,
+                rng=random.Random(kwargs['seed']), fake=fake, password=password_hash,
+                max_courses=kwargs['courses_per_student'],
+                progress=lambda counts: self.stdout.write(f"   … {counts['users']} students"),
+            )
+            self.stdout.write("📈 Recomputing enrollment progress...")
+            seeding.recount_progress(Enrollment.objects.filter(student_id__gt=last_detailed))
+            self.stdout.write(self.style.SUCCESS(
+                "   ✅ " + ", ".join(f"{count} {label}" for label, count in counts.items())
+            ))
+
         # ── FINAL: UPDATE COURSE STATISTICS ──────────────────────────────────
         self.stdout.write("📊 Updating course statistics...")
-        for lc in lms_courses:
-            lc.update_statistics()
+        seeding.recount_courses()
+        seeding.clear_cache()
 
         # ── SUMMARY ───────────────────────────────────────────────────────────
         self.stdout.write(self.style.SUCCESS("\n" + "=" * 70))
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from eduweb.models import UserProfile
+
+
+# Stock setup this project used before eduweb.sessions
+BEFORE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'SESSION_SAVE_EVERY_REQUEST': True,
+    'MIDDLEWARE': [m for m in settings.MIDDLEWARE if m != 'eduweb.sessions.SessionRefreshMiddleware'],
+}
+AFTER = {
+    'SESSION_ENGINE': 'eduweb.sessions',
+    'SESSION_SAVE_EVERY_REQUEST': False,
+}
+
+USERNAME = 'session-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Compare django_session reads/writes per request: db engine vs eduweb.sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per run')
+        parser.add_argument('--path', default='/', help='URL requested by a logged-in user')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=USERNAME, defaults={'email': 'bench@example.com'})
+        # Verified student, so public pages redirect instead of logging out
+        UserProfile.objects.filter(user=user).update(role='student', email_verified=True)
+        user = User.objects.get(pk=user.pk)
+        try:
+            for name, overrides in (('before', BEFORE), ('after', AFTER)):
+                with override_settings(ALLOWED_HOSTS=['*'], **overrides):
+                    self._report(name, self._run(user, options['path'], options['requests']))
+        finally:
+            user.delete()
+
+    def _run(self, user, path, count):
+        client = Client()
+        client.force_login(user)
+        client.get(path)  # warm-up: fills the session cache
+
+        reads = writes = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(path)
+            for query in ctx.captured_queries:
+                sql = query['sql'].lstrip().upper()
+                if 'DJANGO_SESSION' not in sql:
+                    continue
+                if sql.startswith('SELECT'):
+                    reads += 1
+                else:
+                    writes += 1
+        elapsed = time.perf_counter() - started
+        return {
+            'reads': reads / count,
+            'writes': writes / count,
+            'ms': elapsed / count * 1000,
+        }
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"{name:<7} session SELECTs/request {result['reads']:.2f} · "
+            f"session writes/request {result['writes']:.2f} · {result['ms']:.1f} ms/request"
+        )
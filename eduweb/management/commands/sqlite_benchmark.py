@@ -0,0 +1,143 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from eduweb.dbtuning import get_pragmas, pragma_statements
+
+
+# Django's stock SQLite setup: rollback journal, full sync. Both runs wait
+# the same --timeout for locks, so only the PRAGMAs differ between them.
+BASELINE = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+    help = 'Compare SQLite throughput and lock errors: default vs tuned PRAGMAs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent connections (threads)')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of operations that write')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows seeded before each run')
+        parser.add_argument('--timeout', type=float, default=5.0,
+                            help='Busy timeout of both runs in seconds (default 5, as in Django)')
+
+    def handle(self, *args, **options):
+        timeout = options['timeout']
+        runs = [
+            ('default', BASELINE),
+            ('tuned', {**get_pragmas(), 'busy_timeout': int(timeout * 1000)}),
+        ]
+        self.stdout.write(
+            f"{options['workers']} workers · {options['seconds']}s · "
+            f"{options['write_ratio'] * 100:.0f}% writes · {options['rows']} rows"
+        )
+        results = {}
+        for name, pragmas in runs:
+            results[name] = self._run(pragmas, timeout, options)
+            self._report(name, results[name])
+
+        base, tuned = results['default'], results['tuned']
+        if base['ops_per_sec']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Throughput: {tuned['ops_per_sec'] / base['ops_per_sec']:.2f}x · "
+                f"lock errors {base['locked']} → {tuned['locked']}"
+            ))
+
+    # ── one benchmark run on a fresh temporary database ─────────────────────
+    def _run(self, pragmas, timeout, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            self._seed(path, pragmas, options['rows'])
+
+            totals = {'reads': 0, 'writes': 0, 'locked': 0, 'latencies': []}
+            lock = threading.Lock()
+            # Everybody connects and configures first, then the clock starts
+            ready = threading.Barrier(options['workers'] + 1)
+            deadline = {}
+
+            def worker(seed):
+                rng = random.Random(seed)
+                conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+                # journal_mode is persistent and was set by _seed(); switching it
+                # here would need an exclusive lock while other workers run
+                per_connection = {k: v for k, v in pragmas.items() if k != 'journal_mode'}
+                for statement in pragma_statements(per_connection):
+                    conn.execute(statement)
+                ready.wait()
+                stop = deadline['at']
+                local = {'reads': 0, 'writes': 0, 'locked': 0, 'latencies': []}
+                while time.monotonic() < stop:
+                    started = time.perf_counter()
+                    try:
+                        if rng.random() < options['write_ratio']:
+                            conn.execute('BEGIN IMMEDIATE')
+                            conn.execute(
+                                'UPDATE item SET views = views + 1 WHERE id = ?',
+                                (rng.randint(1, options['rows']),),
+                            )
+                            conn.execute(
+                                'INSERT INTO log (item_id, created) VALUES (?, ?)',
+                                (rng.randint(1, options['rows']), time.time()),
+                            )
+                            conn.execute('COMMIT')
+                            local['writes'] += 1
+                        else:
+                            low = rng.randint(1, options['rows'])
+                            conn.execute(
+                                'SELECT COUNT(*), SUM(views) FROM item WHERE id BETWEEN ? AND ?',
+                                (low, low + 500),
+                            ).fetchone()
+                            local['reads'] += 1
+                        local['latencies'].append(time.perf_counter() - started)
+                    except sqlite3.OperationalError as exc:
+                        if 'locked' not in str(exc) and 'busy' not in str(exc):
+                            raise
+                        local['locked'] += 1
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                conn.close()
+                with lock:
+                    for key in ('reads', 'writes', 'locked'):
+                        totals[key] += local[key]
+                    totals['latencies'].extend(local['latencies'])
+
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+            for thread in threads:
+                thread.start()
+            deadline['at'] = time.monotonic() + options['seconds']
+            ready.wait()
+            for thread in threads:
+                thread.join()
+
+        latencies = sorted(totals.pop('latencies')) or [0.0]
+        ops = totals['reads'] + totals['writes']
+        return {
+            **totals,
+            'ops_per_sec': ops / options['seconds'],
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        }
+
+    def _seed(self, path, pragmas, rows):
+        conn = sqlite3.connect(path, isolation_level=None)
+        for statement in pragma_statements(pragmas):
+            conn.execute(statement)
+        conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, views INTEGER NOT NULL DEFAULT 0)')
+        conn.execute('CREATE TABLE log (id INTEGER PRIMARY KEY, item_id INTEGER, created REAL)')
+        conn.execute('BEGIN')
+        conn.executemany('INSERT INTO item (views) VALUES (?)', ((0,) for _ in range(rows)))
+        conn.execute('COMMIT')
+        conn.close()
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"  {name:<8} {result['ops_per_sec']:>9.0f} ops/s · "
+            f"reads {result['reads']:>7} · writes {result['writes']:>6} · "
+            f"locked {result['locked']:>5} · p50 {result['p50_ms']:.2f}ms · p95 {result['p95_ms']:.2f}ms"
+        )
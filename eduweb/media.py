@@ -0,0 +1,254 @@
+"""
+media.py — Protected file delivery.
+
+Library files, lesson videos and materials, certificates, application
+documents and payroll attachments must not be reachable by guessing a
+/media/ URL, but streaming them through a Python worker keeps that worker
+busy for the whole download. Views do their permission check and then
+return serve_file():
+
+    return media.serve_file(request, item.file, as_attachment=True)
+
+PROTECTED_MEDIA_BACKEND decides who moves the bytes:
+
+    'nginx'     X-Accel-Redirect: PROTECTED_MEDIA_INTERNAL_URL + file name.
+                The location must be ``internal`` and alias MEDIA_ROOT:
+
+                    location /protected/ { internal; alias /srv/app/media/; }
+
+    'sendfile'  X-Sendfile: absolute path (Apache mod_xsendfile, lighttpd).
+
+    ''          Django serves the file itself (default, and under runserver).
+
+The front server then handles Range and conditional requests on its own.
+In the Python fallback:
+
+  * ETag (mtime + size) and Last-Modified are sent; If-None-Match and
+    If-Modified-Since answer 304 without opening the file.
+  * A single ``Range: bytes=…`` (optionally guarded by If-Range) answers
+    206, so seeking in a lesson video or resuming a download only sends
+    the missing bytes. Unsatisfiable ranges answer 416; multi-range
+    requests get the whole file.
+  * Whole files and open-ended ranges (``bytes=N-``) are a FileResponse
+    positioned at the start offset, so wsgi.file_wrapper can use
+    os.sendfile(). Bounded ranges are read in blocks up to the range end.
+
+In production the front server must deny direct access to the protected
+MEDIA_ROOT prefixes; only public images (thumbnails, avatars) should stay
+under MEDIA_URL.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+READ_BLOCK = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# ─── 1. Range parsing ─────────────────────────────────────────────────────────
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single-range header, or None when
+    the whole file should be sent (no header, multiple ranges, other unit).
+    Raises RangeNotSatisfiable for ranges outside the file.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def range_start(request):
+    """Start offset of a single-range request, None for a full request."""
+    match = RANGE_RE.match(request.headers.get('Range', '').strip())
+    if not match or not match.group(1):
+        return None
+    return int(match.group(1))
+
+
+def is_new_download(request, response):
+    """
+    True for responses that begin a transfer: used by download counters so
+    that resumed or seeking range requests and 304s are not counted again.
+    """
+    if response.status_code == 206:
+        return response['Content-Range'].startswith('bytes 0-')
+    if response.status_code != 200:
+        return False
+    if response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile'):
+        # The front server applies the Range header itself
+        return 'Range' not in request.headers or range_start(request) == 0
+    return True
+
+
+# ─── 2. Fallback streaming ────────────────────────────────────────────────────
+
+class _FileSlice:
+    """Read-only view of ``length`` bytes of an open file from its position."""
+
+    def __init__(self, fh, length):
+        self._fh = fh
+        self._remaining = length
+        self.name = fh.name
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._fh.close()
+
+
+def _etag(stat):
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def _if_range_matches(request, etag, mtime):
+    """A Range is only honoured if If-Range (when present) still matches."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _stream(request, path, stat, etag, filename, as_attachment, content_type):
+    size = stat.st_size
+    try:
+        byte_range = None
+        if _if_range_matches(request, etag, stat.st_mtime):
+            byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    fh = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        fh.seek(start)
+        if end == size - 1:
+            # Open-ended: the file object itself, so sendfile() can be used
+            body = fh
+        else:
+            body = _FileSlice(fh, length)
+        response = FileResponse(body, status=206, as_attachment=as_attachment, filename=filename)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    # FileResponse reads 4 KB at a time by default
+    response.block_size = READ_BLOCK
+    if content_type:
+        response['Content-Type'] = content_type
+    return response
+
+
+# ─── 3. Entry point ───────────────────────────────────────────────────────────
+
+def _backend():
+    return getattr(settings, 'PROTECTED_MEDIA_BACKEND', '').lower()
+
+
+def _disposition(filename, as_attachment):
+    kind = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{kind}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=utf-8''{quote(filename)}"
+
+
+def serve_file(request, fieldfile, filename=None, as_attachment=False, content_type=None):
+    """
+    Deliver a FileField value after the caller has checked permissions.
+    Raises Http404 when the field is empty or the file is missing.
+    """
+    if not fieldfile:
+        raise Http404('File not available.')
+    return serve_stored(
+        request, fieldfile.name, storage=fieldfile.storage,
+        filename=filename, as_attachment=as_attachment, content_type=content_type,
+    )
+
+
+def serve_stored(request, name, storage=None, filename=None, as_attachment=False, content_type=None):
+    """serve_file() for a storage name that is not attached to a model field."""
+    storage = storage or default_storage
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found on server.')
+
+    filename = filename or os.path.basename(name)
+    etag = _etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = 'private, no-cache'
+        return not_modified
+
+    backend = _backend()
+    if backend == 'nginx':
+        internal = settings.PROTECTED_MEDIA_INTERNAL_URL.rstrip('/') + '/'
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = internal + quote(name.replace(os.sep, '/'))
+    elif backend == 'sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+    else:
+        response = _stream(request, path, stat, etag, filename, as_attachment, content_type)
+        if response.status_code == 416:
+            return response
+
+    if backend:
+        guessed, encoding = mimetypes.guess_type(filename)
+        response['Content-Type'] = content_type or guessed or 'application/octet-stream'
+        response['Content-Disposition'] = _disposition(filename, as_attachment)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    # Revalidate every time: the permission check must run again
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
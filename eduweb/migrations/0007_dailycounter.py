@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eduweb', '0006_alter_certificate_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(help_text="e.g. 'eduweb.blogpost'", max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('field_name', models.CharField(help_text="e.g. 'views_count'", max_length=50)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Counter',
+                'verbose_name_plural': 'Daily Counters',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['model_label', 'field_name', 'day'], name='eduweb_dail_model_l_243e72_idx')],
+                'unique_together': {('model_label', 'object_id', 'field_name', 'day')},
+            },
+        ),
+    ]
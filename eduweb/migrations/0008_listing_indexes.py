@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:40
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+# auth_user belongs to django.contrib.auth, so its listing indexes for
+# management.users_list are created here with plain SQL.
+AUTH_USER_INDEXES = [
+    ('auth_user_joined_keyset', '"date_joined" DESC, "id" DESC'),
+    ('auth_user_username_lower', 'LOWER("username")'),
+    ('auth_user_first_name_lower', 'LOWER("first_name")'),
+    ('auth_user_last_name_lower', 'LOWER("last_name")'),
+    ('auth_user_email_lower', 'LOWER("email")'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eduweb', '0007_dailycounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(fields=['-created_at', '-id'], name='courseapp_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(django.db.models.functions.text.Lower('application_id'), name='courseapp_appid_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='courseapp_first_name_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='courseapp_last_name_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='courseapp_email_lower'),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX IF NOT EXISTS "{name}" ON "auth_user" ({columns})',
+            reverse_sql=f'DROP INDEX IF EXISTS "{name}"',
+        )
+        for name, columns in AUTH_USER_INDEXES
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def archive_sent_lists(apps, schema_editor):
+    """Keep the addresses of broadcasts that went out before the column goes."""
+    BroadcastMessage = apps.get_model('eduweb', 'BroadcastMessage')
+    BroadcastRecipientList = apps.get_model('eduweb', 'BroadcastRecipientList')
+    sent = (
+        BroadcastMessage.objects.exclude(status='draft')
+        .exclude(recipient_emails=[]).only('pk', 'recipient_emails')
+    )
+    BroadcastRecipientList.objects.bulk_create(
+        [BroadcastRecipientList(broadcast_id=broadcast.pk, emails=broadcast.recipient_emails)
+         for broadcast in sent.iterator(chunk_size=100)],
+        batch_size=100,
+    )
+
+
+def restore_sent_lists(apps, schema_editor):
+    BroadcastMessage = apps.get_model('eduweb', 'BroadcastMessage')
+    BroadcastRecipientList = apps.get_model('eduweb', 'BroadcastRecipientList')
+    for recipients in BroadcastRecipientList.objects.iterator(chunk_size=100):
+        BroadcastMessage.objects.filter(pk=recipients.broadcast_id).update(
+            recipient_emails=recipients.emails,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eduweb', '0008_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastRecipientList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emails', models.JSONField(default=list)),
+                ('recorded_at', models.DateTimeField(auto_now=True)),
+                ('broadcast', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recipient_list', to='eduweb.broadcastmessage')),
+            ],
+            options={
+                'verbose_name': 'Broadcast Recipient List',
+                'verbose_name_plural': 'Broadcast Recipient Lists',
+            },
+        ),
+        migrations.RunPython(archive_sent_lists, restore_sent_lists),
+        migrations.RemoveField(
+            model_name='broadcastmessage',
+            name='recipient_emails',
+        ),
+        migrations.AlterField(
+            model_name='broadcastmessage',
+            name='recipient_count',
+            field=models.IntegerField(default=0, help_text='Audience size when last saved, recipients reached once sent'),
+        ),
+    ]
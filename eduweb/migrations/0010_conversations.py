@@ -0,0 +1,184 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+BATCH = 500
+
+
+def _count(queryset, group_by, aggregate=None):
+    value = (
+        queryset.order_by().values(group_by)
+        .annotate(value=aggregate or Count('pk'))
+        .values('value')
+    )
+    return Coalesce(Subquery(value), 0)
+
+
+def build_conversations(apps, schema_editor):
+    """One conversation per root message, its replies attached to it."""
+    Message = apps.get_model('eduweb', 'Message')
+    Conversation = apps.get_model('eduweb', 'Conversation')
+    Participant = apps.get_model('eduweb', 'ConversationParticipant')
+    Mailbox = apps.get_model('eduweb', 'Mailbox')
+
+    roots = (
+        Message.objects.filter(parent__isnull=True)
+        .order_by('pk')
+        .values_list('pk', 'subject', 'sender_id', 'recipient_id')
+    )
+    batch = []
+    for row in roots.iterator(chunk_size=BATCH):
+        batch.append(row)
+        if len(batch) >= BATCH:
+            _build_batch(Message, Conversation, Participant, batch)
+            batch = []
+    if batch:
+        _build_batch(Message, Conversation, Participant, batch)
+
+    # Counters, as conversations.recount() computes them
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-pk')
+    Conversation.objects.update(
+        message_count=_count(Message.objects.filter(conversation=OuterRef('pk')), 'conversation'),
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+    )
+    Participant.objects.update(
+        unread_count=_count(
+            Message.objects.filter(
+                conversation=OuterRef('conversation'), recipient=OuterRef('user'), is_read=False,
+            ),
+            'conversation',
+        ),
+        last_message_at=Subquery(
+            Conversation.objects.filter(pk=OuterRef('conversation')).values('last_message_at')[:1]
+        ),
+    )
+    Mailbox.objects.bulk_create(
+        [Mailbox(user_id=user_id) for user_id in
+         Participant.objects.values_list('user_id', flat=True).distinct()],
+        ignore_conflicts=True,
+    )
+    memberships = Participant.objects.filter(user=OuterRef('user'))
+    Mailbox.objects.update(
+        unread_count=_count(memberships, 'user', Sum('unread_count')),
+        thread_count=_count(memberships, 'user'),
+        started_count=_count(memberships.filter(started=True), 'user'),
+    )
+
+
+def _build_batch(Message, Conversation, Participant, roots):
+    conversations = Conversation.objects.bulk_create([
+        Conversation(subject=subject, root_id=pk) for pk, subject, _, _ in roots
+    ])
+    participants = []
+    for conversation, (pk, _, sender_id, recipient_id) in zip(conversations, roots):
+        Message.objects.filter(pk=pk).update(conversation=conversation)
+        Message.objects.filter(parent_id=pk).update(conversation=conversation)
+        participants.append(Participant(
+            conversation=conversation, user_id=sender_id,
+            counterpart_id=recipient_id, started=True,
+        ))
+        if recipient_id != sender_id:
+            participants.append(Participant(
+                conversation=conversation, user_id=recipient_id, counterpart_id=sender_id,
+            ))
+    Participant.objects.bulk_create(participants, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('eduweb', '0009_broadcast_lazy_recipients'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.BooleanField(default=False)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Conversation Participant',
+                'verbose_name_plural': 'Conversation Participants',
+                'ordering': ['-last_message_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Mailbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mailbox', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('thread_count', models.PositiveIntegerField(default=0)),
+                ('started_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Mailbox',
+                'verbose_name_plural': 'Mailboxes',
+            },
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='eduweb.message')),
+                ('root', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='eduweb.message')),
+            ],
+            options={
+                'verbose_name': 'Conversation',
+                'verbose_name_plural': 'Conversations',
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='eduweb.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='eduweb_mess_convers_12a28c_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='eduweb.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='counterpart',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_message_at', '-id'], name='convpart_inbox_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', 'started', '-last_message_at', '-id'], name='convpart_sent_keyset'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversationparticipant',
+            unique_together={('conversation', 'user')},
+        ),
+        migrations.RunPython(build_conversations, migrations.RunPython.noop),
+    ]
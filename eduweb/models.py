@@ -3,14 +3,18 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.db.models import Avg
+from django.db.models.functions import Lower
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
+from django.urls import reverse
 import uuid
 import os
 from decimal import Decimal
 
+from . import counters, slugs
+
 
 DEGREE_LEVEL_CHOICES = [
     ('certificate', 'Certificate'),
@@ -484,14 +488,7 @@ class Announcement(models.Model):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            original_slug = self.slug
-            counter = 1
-            while Announcement.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.title), super().save, *args, **kwargs)
     
     @property
     def is_expired(self):
@@ -657,7 +654,8 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     extra_data = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens, not when a buffered entry is written
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
@@ -666,7 +664,8 @@ class AuditLog(models.Model):
         indexes = [
             models.Index(fields=['-timestamp']),
             models.Index(fields=['user', '-timestamp']),
-            models.Index(fields=['action']),
+            # Action filter in timestamp order (audit log listing)
+            models.Index(fields=['action', '-timestamp']),
         ]
     
     def __str__(self):
@@ -699,9 +698,7 @@ class Badge(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 class StudentBadge(models.Model):
@@ -742,9 +739,7 @@ class BlogCategory(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
     
     def get_post_count(self):
         return self.blog_posts.filter(status='published').count()
@@ -812,26 +807,18 @@ class BlogPost(models.Model):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            original_slug = self.slug
-            counter = 1
-            while BlogPost.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        
         if not self.meta_description and self.excerpt:
             self.meta_description = self.excerpt[:160]
         
         if not self.author_name and self.author:
             self.author_name = self.author.get_full_name() or self.author.username
         
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.title), super().save, *args, **kwargs)
     
     def increment_views(self):
-        """Increment view count"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Count a view — buffered and written in batches by eduweb.counters"""
+        counters.increment(self, 'views_count')
+        self.views_count = counters.current(self, 'views_count')
     
     def get_related_posts(self, limit=3):
         """Get related posts from same category"""
@@ -1035,9 +1022,7 @@ class Faculty(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 class InstitutionMember(models.Model):
     """Board members and institutional staff for About page"""
@@ -1097,14 +1082,7 @@ class Department(models.Model):
         return f"{self.name} ({self.faculty.code})"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-            original_slug = self.slug
-            counter = 1
-            while Department.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 
@@ -1280,14 +1258,7 @@ class Program(models.Model):
         return f"{self.name} ({self.code})"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-            original_slug = self.slug
-            counter = 1
-            while Program.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
     # ── Convenience Properties ─────────────────────────────────────────────────
     @property
@@ -1496,14 +1467,7 @@ class Course(models.Model):
         return f"{self.code} — {self.name}"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(f"{self.code}-{self.name}")
-            original_slug = self.slug
-            counter = 1
-            while Course.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(f"{self.code}-{self.name}"), super().save, *args, **kwargs)
 
     # ── Convenience Properties ─────────────────────────────────────────────────
     @property
@@ -1784,6 +1748,12 @@ class CourseApplication(models.Model):
             models.Index(fields=['application_id']),
             models.Index(fields=['email']),
             models.Index(fields=['status']),
+            # Keyset pagination + prefix search in management.applications_list
+            models.Index(fields=['-created_at', '-id'], name='courseapp_created_keyset'),
+            models.Index(Lower('application_id'), name='courseapp_appid_lower'),
+            models.Index(Lower('first_name'), name='courseapp_first_name_lower'),
+            models.Index(Lower('last_name'), name='courseapp_last_name_lower'),
+            models.Index(Lower('email'), name='courseapp_email_lower'),
         ]
     
     def __str__(self):
@@ -1994,9 +1964,7 @@ class CourseCategory(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 # ==================== DISCUSSIONS ====================
@@ -2378,21 +2346,13 @@ class LMSCourse(models.Model):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            original_slug = self.slug
-            counter = 1
-            while LMSCourse.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        
         if not self.instructor_name and self.instructor:
             self.instructor_name = self.instructor.get_full_name() or self.instructor.username
         
         if self.is_published and not self.published_at:
             self.published_at = timezone.now()
         
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.title), super().save, *args, **kwargs)
     
     def update_statistics(self):
         """Update course statistics"""
@@ -2532,6 +2492,13 @@ class Message(models.Model):
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='replies')
+    conversation = models.ForeignKey(
+        'Conversation',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='messages'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -2541,6 +2508,7 @@ class Message(models.Model):
         indexes = [
             models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['conversation', 'created_at']),
         ]
     
     def __str__(self):
@@ -2554,6 +2522,101 @@ class Message(models.Model):
             self.save(update_fields=['is_read', 'read_at'])
 
 
+class Conversation(models.Model):
+    """
+    A message thread: the root Message and its replies. Written only
+    through eduweb.conversations, which keeps the denormalized fields
+    here and on ConversationParticipant/Mailbox in step.
+    """
+    subject = models.CharField(max_length=200)
+    # Thread URLs keep using the root message id
+    root = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_at = models.DateTimeField(default=timezone.now)
+    message_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        verbose_name = 'Conversation'
+        verbose_name_plural = 'Conversations'
+
+    def __str__(self):
+        return self.subject
+
+
+class ConversationParticipant(models.Model):
+    """One user's view of a conversation: their unread count and sort key"""
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='participants'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='conversation_memberships'
+    )
+    # The other party of a two-person thread, for the inbox row
+    counterpart = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    started = models.BooleanField(default=False)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Copy of Conversation.last_message_at so the inbox is one index range
+    last_message_at = models.DateTimeField(default=timezone.now)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-last_message_at', '-id']
+        verbose_name = 'Conversation Participant'
+        verbose_name_plural = 'Conversation Participants'
+        unique_together = ['conversation', 'user']
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id'], name='convpart_inbox_keyset'),
+            models.Index(fields=['user', 'started', '-last_message_at', '-id'], name='convpart_sent_keyset'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} in {self.conversation_id} ({self.unread_count} unread)"
+
+
+class Mailbox(models.Model):
+    """Per-user message totals, so badges and inbox headers are one row read"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='mailbox'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    thread_count = models.PositiveIntegerField(default=0)
+    started_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Mailbox'
+        verbose_name_plural = 'Mailboxes'
+
+    def __str__(self):
+        return f"{self.user.username}: {self.unread_count} unread"
+
+
 # ==================== NOTIFICATIONS ====================
 class Notification(models.Model):
     """User notifications"""
@@ -2624,9 +2687,7 @@ class PaymentGateway(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 class Transaction(models.Model):
@@ -2910,9 +2971,7 @@ class SubscriptionPlan(models.Model):
         return f"{self.name} - {self.price} {self.currency}/{self.billing_cycle}"
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 class Subscription(models.Model):
@@ -3092,9 +3151,7 @@ class Vendor(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
 
 
 # ==================== SIGNALS ====================
@@ -3164,14 +3221,7 @@ class StudyGroup(models.Model):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-            original_slug = self.slug
-            counter = 1
-            while StudyGroup.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.name), super().save, *args, **kwargs)
     
     def member_count(self):
         """Get current member count"""
@@ -3289,11 +3339,11 @@ class BroadcastMessage(models.Model):
         help_text="Stores selected filters"
     )
     
-    # Recipients
-    recipient_count = models.IntegerField(default=0)
-    recipient_emails = models.JSONField(
-        default=list,
-        help_text="List of recipient emails"
+    # Recipients: resolved from the filters at send time (eduweb.audiences);
+    # the addresses a sent broadcast reached are kept in BroadcastRecipientList
+    recipient_count = models.IntegerField(
+        default=0,
+        help_text="Audience size when last saved, recipients reached once sent"
     )
     
     # Status
@@ -3331,15 +3381,37 @@ class BroadcastMessage(models.Model):
     
     def save(self, *args, **kwargs):
         # Auto-generate slug from subject
-        if not self.slug:
-            base_slug = slugify(self.subject)
-            slug = base_slug
-            counter = 1
-            while BroadcastMessage.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        slugs.save(self, slugify(self.subject), super().save, *args, **kwargs)
+
+
+class BroadcastRecipientList(models.Model):
+    """
+    Addresses a broadcast was actually sent to. Drafts resolve their
+    audience from the filters (eduweb.audiences); once sent, this list is
+    the record, as today's filters would pick different people.
+    """
+    broadcast = models.OneToOneField(
+        BroadcastMessage,
+        on_delete=models.CASCADE,
+        related_name='recipient_list'
+    )
+    emails = models.JSONField(default=list)
+    recorded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Broadcast Recipient List'
+        verbose_name_plural = 'Broadcast Recipient Lists'
+
+    def __str__(self):
+        return f"{self.broadcast.subject} ({len(self.emails)} recipients)"
+
+    @classmethod
+    def record(cls, broadcast, emails):
+        """Add ``emails`` to the broadcast's list (a resend after a failure adds up)."""
+        recipients, _ = cls.objects.get_or_create(broadcast=broadcast)
+        recipients.emails = list(dict.fromkeys([*recipients.emails, *emails]))
+        recipients.save()
+        return recipients
 
 class StaffPayroll(models.Model):
     """
@@ -3662,7 +3734,7 @@ class StaffPayroll(models.Model):
                     'number': i,
                     'file': file_field,
                     'name': getattr(self, f'attachment_{i}_name') or file_field.name.split('/')[-1],
-                    'url': file_field.url,
+                    'url': reverse('finance:payroll_attachment', args=[self.payroll_reference, i]),
                     'size': file_field.size if hasattr(file_field, 'size') else 0,
                 })
         return attachments
@@ -3985,16 +4057,6 @@ class LibraryItem(models.Model):
         return f"[{self.category} / {self.subcategory}] {self.title}{author_str}"
  
     def save(self, *args, **kwargs):
-        # Auto-generate unique slug
-        if not self.slug:
-            base    = slugify(f"{self.title} {self.author}")[:250]
-            slug    = base
-            counter = 1
-            while LibraryItem.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug    = f"{base}-{counter}"
-                counter += 1
-            self.slug = slug
- 
         # Auto-fill file metadata
         if self.file:
             try:
@@ -4003,7 +4065,8 @@ class LibraryItem(models.Model):
             except Exception:
                 pass
  
-        super().save(*args, **kwargs)
+        # Auto-generate unique slug
+        slugs.save(self, slugify(f"{self.title} {self.author}"), super().save, *args, **kwargs)
  
     # ── Convenience helpers used in templates / views ─────────────────────────
     def has_file(self):
@@ -4017,14 +4080,12 @@ class LibraryItem(models.Model):
         return self.has_file() or self.has_external_url()
  
     def increment_views(self):
-        LibraryItem.objects.filter(pk=self.pk).update(
-            view_count=models.F('view_count') + 1
-        )
+        counters.increment(self, 'view_count')
+        self.view_count = counters.current(self, 'view_count')
  
     def increment_downloads(self):
-        LibraryItem.objects.filter(pk=self.pk).update(
-            download_count=models.F('download_count') + 1
-        )
+        counters.increment(self, 'download_count')
+        self.download_count = counters.current(self, 'download_count')
  
     def get_file_icon(self):
         """Return a Bootstrap-icon class matching the detected file type."""
@@ -4052,4 +4113,29 @@ class LibraryItem(models.Model):
         """Return tags as a clean list, split on comma."""
         if not self.tags:
             return []
-        return [t.strip() for t in self.tags.split(',') if t.strip()]
\ No newline at end of file
+        return [t.strip() for t in self.tags.split(',') if t.strip()]
+
+
+# ==================== COUNTERS ====================
+class DailyCounter(models.Model):
+    """
+    Per-day totals of buffered counters (blog views, library views/downloads).
+    Written in batches by eduweb.counters.flush(); read via counters.daily_series().
+    """
+    model_label = models.CharField(max_length=100, help_text="e.g. 'eduweb.blogpost'")
+    object_id = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=50, help_text="e.g. 'views_count'")
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Daily Counter'
+        verbose_name_plural = 'Daily Counters'
+        unique_together = [['model_label', 'object_id', 'field_name', 'day']]
+        indexes = [
+            models.Index(fields=['model_label', 'field_name', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id} {self.field_name} {self.day}: {self.count}"
@@ -0,0 +1,44 @@
+"""
+notifications.py — Set-based Notification fan-out.
+
+The per-view ``_notify`` helpers create one row and then prune that user's
+history with a second query. For bulk operations that is two queries per
+recipient; notify_many() does the same for any number of users in two:
+
+    notify_many(user_ids, 'Enrolled in Python 101', 'You have been …',
+                notif_type='enrollment', link='/courses/python-101/')
+"""
+
+from django.db.models import Window
+from django.db.models.functions import RowNumber
+
+from .models import Notification
+
+# Notifications kept per user, matching the _notify helpers
+NOTIFICATIONS_KEPT = 100
+
+
+def notify_many(user_ids, title, message, notif_type='system', link='', batch_size=1000):
+    """Create the same Notification for every user and prune beyond NOTIFICATIONS_KEPT."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                user_id=uid, notification_type=notif_type,
+                title=title, message=message, link=link,
+            )
+            for uid in user_ids
+        ],
+        batch_size=batch_size,
+    )
+    for start in range(0, len(user_ids), batch_size):
+        stale = list(
+            Notification.objects.filter(user_id__in=user_ids[start:start + batch_size])
+            .annotate(rank=Window(RowNumber(), partition_by='user_id', order_by='-created_at'))
+            .filter(rank__gt=NOTIFICATIONS_KEPT)
+            .values_list('id', flat=True)
+        )
+        if stale:
+            Notification.objects.filter(id__in=stale).delete()
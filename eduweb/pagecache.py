@@ -0,0 +1,80 @@
+"""
+pagecache.py — Anonymous full-page cache for the public marketing site.
+
+Usage in views:
+
+    @check_for_auth
+    @public_page('blog')
+    def blog(request): ...
+
+Every public page also depends on the nav (faculties/programs) and on
+SiteConfig through base.html, so those tags are always included. Saving or
+deleting any model listed in MODEL_TAGS bumps its tag, which orphans every
+cached page that rendered it; bulk queryset.update() calls must bump it
+themselves with invalidate_model().
+"""
+
+import logging
+
+from django.db.models.signals import post_delete, post_save
+
+from .caching import cache_public_page, invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+# Tags every public page depends on (nav dropdowns + footer in base.html)
+BASE_TAGS = ('site', 'programs')
+
+# model name → tag invalidated when a row is saved or deleted
+MODEL_TAGS = {
+    'SiteConfig':           'site',
+    'Faculty':              'programs',
+    'Department':           'programs',
+    'Program':              'programs',
+    'Course':               'programs',
+    'CourseIntake':         'programs',
+    'BlogPost':             'blog',
+    'BlogCategory':         'blog',
+    'Testimonial':          'testimonials',
+    'InstitutionMember':    'institution',
+    'SiteHistoryMilestone': 'institution',
+    'InstitutionPartner':   'institution',
+}
+
+
+def public_page(*tags, timeout=None):
+    """Cache a public view for anonymous visitors, keyed on path + querystring."""
+    return cache_public_page(
+        timeout=timeout,
+        tags=BASE_TAGS + tags,
+        namespace='public-page',
+    )
+
+
+def invalidate_model(model):
+    """
+    Bump the tag of ``model``. Saves and deletes do this through signals;
+    call it after a queryset.update(), which sends none.
+    """
+    tag = MODEL_TAGS.get(model.__name__)
+    if tag:
+        try:
+            invalidate_tags(tag)
+        except Exception:
+            # A cache outage must never break the save itself
+            logger.exception('pagecache: failed to invalidate tag %s', tag)
+
+
+def _invalidate(sender, **kwargs):
+    invalidate_model(sender)
+
+
+def connect_signals():
+    """Wire post_save/post_delete of every MODEL_TAGS model. Called from AppConfig.ready()."""
+    from django.apps import apps
+
+    for model_name in MODEL_TAGS:
+        model = apps.get_model('eduweb', model_name)
+        uid = f'pagecache-{model_name}'
+        post_save.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_invalidate, sender=model, dispatch_uid=f'{uid}-delete')
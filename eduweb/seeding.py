@@ -0,0 +1,379 @@
+"""
+seeding.py — High-volume synthetic students for benchmarks.
+
+seed_bulky_data fills every table through save(), one row at a time, so
+each row fires its signals (profile creation, LMSCourse.update_statistics)
+and each user pays a full password hash. That is fine for a demo database
+and hopeless for 100k students. ``seed_bulky_data --bulk`` keeps the
+detailed pass for a handful of students and adds the rest here:
+
+    counts = seeding.bulk_students(100_000, start=9, rng=random.Random(1),
+                                   fake=fake, password=make_password('12345'))
+    seeding.recount_progress(Enrollment.objects.filter(student_id__gt=last_pk))
+    seeding.recount_courses()
+
+Students are generated BATCH_SIZE at a time and written in one
+transaction per batch: users, profiles, applications and enrollments with
+bulk_create, and the far more numerous lesson progress and quiz attempt
+rows with a plain executemany. Neither sends signals, so the
+denormalized counters are rebuilt afterwards with one UPDATE per table,
+and the cache is cleared instead of invalidated tag by tag.
+All randomness comes from ``rng`` (and ``fake``, seeded by the caller),
+so a seed reproduces the same rows.
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Avg, Count, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from .caching import get_cache
+from .models import (
+    CourseApplication, CourseIntake, Enrollment, Lesson, LessonProgress, LMSCourse,
+    Quiz, QuizAttempt, Review, UserProfile, update_course_enrollment_count,
+    update_course_rating,
+)
+
+BATCH_SIZE = 5000
+# Distinct first/last names drawn from Faker once, then reused
+NAME_POOL = 500
+
+VERIFIED_SHARE = 0.9        # of students, have verified their email
+PORTAL_SHARE = 0.8          # of verified students, fully admitted
+ATTEMPT_SHARE = 0.6         # of quizzes on completed lessons, attempted
+
+
+# ─── 1. Signals ───────────────────────────────────────────────────────────────
+
+# Receivers that recompute LMSCourse statistics on every saved row
+_STATISTICS_RECEIVERS = (
+    (update_course_enrollment_count, Enrollment),
+    (update_course_rating, Review),
+)
+
+
+@contextmanager
+def deferred_statistics():
+    """Mute the per-row statistics receivers; call recount_courses() afterwards."""
+    for receiver, sender in _STATISTICS_RECEIVERS:
+        post_save.disconnect(receiver, sender=sender)
+    try:
+        yield
+    finally:
+        for receiver, sender in _STATISTICS_RECEIVERS:
+            post_save.connect(receiver, sender=sender)
+
+
+@contextmanager
+def muted_delete_signals():
+    """
+    Delete without pre/post_delete receivers (they only bump cache tags;
+    call clear_cache() afterwards). With none connected Django
+    removes related rows with one DELETE per batch instead of loading and
+    signalling every instance.
+    """
+    saved = [(signal, signal.receivers) for signal in (pre_delete, post_delete)]
+    for signal, _ in saved:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+# ─── 2. Catalog ───────────────────────────────────────────────────────────────
+
+class Catalog:
+    """Programs, courses, lessons and quizzes the students are spread over."""
+
+    def __init__(self):
+        self.intakes = defaultdict(list)        # program id → [intake id]
+        for pk, program_id in CourseIntake.objects.values_list('pk', 'program_id').order_by('pk'):
+            self.intakes[program_id].append(pk)
+        self.programs = sorted(self.intakes)
+
+        self.lessons = defaultdict(list)        # course id → [lesson id], in course order
+        published = LMSCourse.objects.filter(is_published=True)
+        for course_id, pk in (Lesson.objects.filter(is_active=True, course__in=published)
+                              .values_list('course_id', 'pk')):
+            self.lessons[course_id].append(pk)
+        self.courses = sorted(self.lessons)
+
+        self.quizzes = defaultdict(list)        # lesson id → [(quiz id, passing score, points)]
+        quizzes = (Quiz.objects.filter(is_active=True, lesson_id__in=Lesson.objects.filter(is_active=True))
+                   .annotate(points=Sum('questions__points')).filter(points__gt=0).order_by('pk'))
+        for quiz in quizzes:
+            self.quizzes[quiz.lesson_id].append((quiz.pk, quiz.passing_score, quiz.points))
+
+        self.admins = list(User.objects.filter(profile__role='admin').order_by('pk')
+                           .values_list('pk', flat=True))
+
+
+# ─── 3. Students ──────────────────────────────────────────────────────────────
+
+def _application(rng, pools, user, catalog, portal_ready, now):
+    program = rng.choice(catalog.programs)
+    return CourseApplication(
+        application_id=f'APP-{rng.getrandbits(48):012X}',
+        user_id=user.pk,
+        program_id=program,
+        intake_id=rng.choice(catalog.intakes[program]),
+        study_mode='full_time',
+        first_name=user.first_name, last_name=user.last_name, email=user.email,
+        phone=f'+1555{rng.randint(0, 9_999_999):07d}',
+        date_of_birth=now.date() - timedelta(days=rng.randint(18 * 365, 35 * 365)),
+        gender=rng.choice(['male', 'female', 'other']),
+        nationality=rng.choice(pools.countries), country=rng.choice(pools.countries),
+        address_line1=f'{rng.randint(1, 999)} {rng.choice(pools.last_names)} Street',
+        city=rng.choice(pools.cities), state=rng.choice(pools.cities), postal_code=f'{rng.randint(10000, 99999)}',
+        highest_qualification=rng.choice(['High School', 'Associate Degree', 'Bachelor Degree']),
+        institution_name=f'{rng.choice(pools.last_names)} College',
+        graduation_year=str(rng.randint(2015, 2024)),
+        gpa_or_grade=f'{rng.uniform(2.5, 4.0):.2f}',
+        personal_statement='Seeded application.',
+        how_did_you_hear=rng.choice(['Social Media', 'Friend', 'Website', 'Advertisement']),
+        emergency_contact_name=f'{rng.choice(pools.first_names)} {user.last_name}',
+        emergency_contact_phone=f'+1555{rng.randint(0, 9_999_999):07d}',
+        emergency_contact_relationship=rng.choice(['Parent', 'Sibling', 'Spouse', 'Guardian']),
+        accept_privacy_policy=True,
+        accept_terms_conditions=True,
+        status='approved' if portal_ready else rng.choice(['draft', 'under_review', 'rejected']),
+        submitted_at=now - timedelta(days=rng.randint(30, 365)),
+        admission_accepted=portal_ready,
+        admission_accepted_at=now - timedelta(days=rng.randint(1, 30)) if portal_ready else None,
+        admission_number=f'ADM-{now.year}-{rng.getrandbits(32):08X}' if portal_ready else None,
+        department_approved=portal_ready,
+        department_approved_at=now - timedelta(days=rng.randint(1, 15)) if portal_ready else None,
+    )
+
+
+def _progress(rng, enrollment, lessons, now):
+    """LessonProgress rows: the first ``done`` lessons completed, the next one started."""
+    done = rng.randint(0, len(lessons))
+    rows = []
+    for position, lesson_id in enumerate(lessons[:done + 1]):
+        completed = position < done
+        rows.append({
+            'enrollment_id': enrollment.pk,
+            'lesson_id': lesson_id,
+            'is_completed': completed,
+            'completion_percentage': Decimal('100.00') if completed else Decimal(rng.randint(5, 95)),
+            'time_spent_minutes': rng.randint(5, 60),
+            'video_progress_seconds': rng.randint(0, 2700),
+            'started_at': now - timedelta(days=rng.randint(10, 60)),
+            'completed_at': now - timedelta(days=rng.randint(0, 9)) if completed else None,
+            'last_accessed': now - timedelta(hours=rng.randint(1, 240)),
+        })
+    return rows
+
+
+def _attempts(rng, student_id, completed_lessons, catalog, now):
+    rows = []
+    for lesson_id in completed_lessons:
+        for quiz_id, passing_score, points in catalog.quizzes.get(lesson_id, ()):
+            if rng.random() > ATTEMPT_SHARE:
+                continue
+            percentage = Decimal(rng.randint(4000, 10000)) / 100
+            completed_at = now - timedelta(days=rng.randint(0, 30))
+            rows.append({
+                'quiz_id': quiz_id, 'student_id': student_id,
+                'score': (points * percentage / 100).quantize(Decimal('0.01')),
+                'max_score': points, 'percentage': percentage,
+                'is_completed': True, 'passed': percentage >= passing_score,
+                'started_at': completed_at - timedelta(minutes=45),
+                'completed_at': completed_at,
+                'time_taken_minutes': rng.randint(5, 45),
+            })
+    return rows
+
+
+def _insert(model, rows):
+    """
+    INSERT dicts of attname → value with one executemany. bulk_create
+    spends most of its time in per-value field hooks, which rows of ints,
+    Decimals and datetimes that need no PK back can skip. Missing
+    columns get the field default.
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    ops = connection.ops
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    columns = []
+    for f in fields:
+        kind = f.get_internal_type()
+        if kind == 'DateTimeField':
+            adapt = ops.adapt_datetimefield_value
+        elif kind == 'DecimalField':
+            adapt = partial(ops.adapt_decimalfield_value,
+                            max_digits=f.max_digits, decimal_places=f.decimal_places)
+        else:
+            adapt = None
+        columns.append((f.attname, f.get_default(), adapt))
+
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        ops.quote_name(model._meta.db_table),
+        ', '.join(ops.quote_name(f.column) for f in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [
+        tuple(
+            value if adapt is None or value is None else adapt(value)
+            for attname, default, adapt in columns
+            for value in (row.get(attname, default),)
+        )
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _batch(numbers, *, rng, pools, password, catalog, max_courses, now):
+    counts = Counter()
+    users = []
+    for n in numbers:
+        username = f'student{n}'
+        users.append(User(
+            username=username, email=f'{username}@miu.edu', password=password,
+            first_name=rng.choice(pools.first_names), last_name=rng.choice(pools.last_names),
+            date_joined=now - timedelta(days=rng.randint(1, 720)),
+        ))
+    User.objects.bulk_create(users)
+
+    verified = [rng.random() < VERIFIED_SHARE for _ in users]
+    UserProfile.objects.bulk_create([
+        UserProfile(
+            user_id=user.pk, role='student', email_verified=is_verified,
+            city=rng.choice(pools.cities), country=rng.choice(pools.countries),
+            linkedin=f'https://linkedin.com/in/{user.username}',
+        )
+        for user, is_verified in zip(users, verified)
+    ])
+    counts['users'] += len(users)
+
+    applications, admitted = [], []
+    for user, is_verified in zip(users, verified):
+        if not is_verified or not catalog.programs:
+            continue
+        portal_ready = rng.random() < PORTAL_SHARE
+        applications.append(_application(rng, pools, user, catalog, portal_ready, now))
+        if portal_ready:
+            admitted.append(user)
+    CourseApplication.objects.bulk_create(applications)
+    counts['applications'] += len(applications)
+
+    enrollments = []
+    for user in admitted:
+        k = min(len(catalog.courses), rng.randint(1, max_courses))
+        for course_id in rng.sample(catalog.courses, k):
+            enrollments.append(Enrollment(
+                student_id=user.pk, course_id=course_id,
+                enrolled_by_id=rng.choice(catalog.admins) if catalog.admins else None,
+                last_accessed=now - timedelta(hours=rng.randint(1, 720)),
+            ))
+    Enrollment.objects.bulk_create(enrollments)
+    counts['enrollments'] += len(enrollments)
+
+    progress, attempts = [], []
+    for enrollment in enrollments:
+        rows = _progress(rng, enrollment, catalog.lessons[enrollment.course_id], now)
+        progress += rows
+        attempts += _attempts(
+            rng, enrollment.student_id, [row['lesson_id'] for row in rows if row['is_completed']],
+            catalog, now,
+        )
+    _insert(LessonProgress, progress)
+    _insert(QuizAttempt, attempts)
+    counts['lesson progress'] += len(progress)
+    counts['quiz attempts'] += len(attempts)
+    return counts
+
+
+class _Pools:
+    """Name, city and country lists drawn from Faker once."""
+
+    def __init__(self, fake):
+        self.first_names = [fake.first_name() for _ in range(NAME_POOL)]
+        self.last_names = [fake.last_name() for _ in range(NAME_POOL)]
+        self.cities = [fake.city() for _ in range(NAME_POOL // 5)]
+        self.countries = [fake.country() for _ in range(NAME_POOL // 5)]
+
+
+def bulk_students(count, *, start, rng, fake, password, max_courses=4, progress=None):
+    """
+    Create ``count`` students named student<start>… with their profile,
+    application, enrollments, lesson progress and quiz attempts. ``password``
+    is an already hashed password shared by all of them. ``progress`` is
+    called with the running Counter after every batch. Returns the Counter.
+    """
+    catalog = Catalog()
+    pools = _Pools(fake)
+    now = timezone.now()
+    counts = Counter()
+    for first in range(start, start + count, BATCH_SIZE):
+        numbers = range(first, min(first + BATCH_SIZE, start + count))
+        with transaction.atomic():
+            counts += _batch(numbers, rng=rng, pools=pools, password=password,
+                             catalog=catalog, max_courses=max_courses, now=now)
+        if progress is not None:
+            progress(counts)
+    return counts
+
+
+# ─── 4. Counters ──────────────────────────────────────────────────────────────
+
+def _count(queryset, group_by):
+    """Correlated COUNT(*) of ``queryset``, 0 when empty."""
+    value = queryset.order_by().values(group_by).annotate(value=Count('pk')).values('value')
+    return Coalesce(Subquery(value), 0)
+
+
+def recount_progress(enrollments):
+    """
+    Enrollment.completed_lessons / progress_percentage from LessonProgress,
+    as Enrollment.update_progress() computes them, for a whole queryset.
+    """
+    enrollments.update(completed_lessons=_count(
+        LessonProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True), 'enrollment',
+    ))
+    total = _count(Lesson.objects.filter(course=OuterRef('course'), is_active=True), 'course')
+    with_lessons = LMSCourse.objects.filter(lessons__is_active=True)
+    enrollments.filter(course__in=with_lessons).update(
+        progress_percentage=Round(F('completed_lessons') * 100.0 / total, 2),
+    )
+    enrollments.filter(status='active', progress_percentage__gte=100).update(
+        status='completed', completed_at=timezone.now(),
+    )
+
+
+def recount_courses():
+    """LMSCourse.update_statistics() for every course, in one UPDATE."""
+    ratings = (Review.objects.filter(course=OuterRef('pk')).order_by().values('course')
+               .annotate(value=Avg('rating')).values('value'))
+    LMSCourse.objects.update(
+        total_enrollments=_count(Enrollment.objects.filter(course=OuterRef('pk')), 'course'),
+        total_reviews=_count(Review.objects.filter(course=OuterRef('pk')), 'course'),
+        average_rating=Coalesce(
+            Subquery(ratings), 0, output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+
+
+def clear_cache():
+    """
+    Drop every cached value. After a reseed each cached page, counter and
+    tag version describes rows that are gone, and the signals that would
+    invalidate them were muted or bypassed. Sessions survive (cached_db).
+    """
+    get_cache().clear()
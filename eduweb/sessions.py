@@ -0,0 +1,95 @@
+"""
+sessions.py — Cache-first sessions with database write-through.
+
+The stock setup (db engine + SESSION_SAVE_EVERY_REQUEST) did a SELECT and
+an UPDATE on django_session for every authenticated page view, i.e. one
+SQLite write lock per request just to slide the expiry date.
+
+    SESSION_ENGINE = "eduweb.sessions"
+
+reads the session from the shared cache and only falls back to the
+database on a miss. Every save still goes to django_session first, so the
+database stays the source of truth: sessions created by the old db engine
+keep working and a cache flush logs nobody out.
+
+SessionRefreshMiddleware replaces SESSION_SAVE_EVERY_REQUEST: a session is
+only saved when it changed, or when its expiry was last extended more than
+SESSION_REFRESH_INTERVAL seconds ago. ``python manage.py session_benchmark``
+compares both setups.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+logger = logging.getLogger(__name__)
+
+# Session key holding the unix time of the last expiry refresh
+REFRESHED_KEY = '_refreshed_at'
+
+
+class SessionStore(CachedDBStore):
+    """cached_db store that treats the cache as optional."""
+
+    def load(self):
+        try:
+            return super().load()
+        except Exception:
+            logger.exception('sessions: cache read failed, using the database')
+            s = self._get_session_from_db()
+            return self.decode(s.session_data) if s else {}
+
+    def save(self, must_create=False):
+        # Database first: a failing cache must never lose the write
+        super(CachedDBStore, self).save(must_create)
+        try:
+            self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        except Exception:
+            logger.exception('sessions: cache write failed for a session')
+            self._cache_delete()
+
+    def delete(self, session_key=None):
+        try:
+            super().delete(session_key)
+        except Exception:
+            logger.exception('sessions: cache delete failed, deleting from the database')
+            super(CachedDBStore, self).delete(session_key)
+
+    def _cache_delete(self):
+        try:
+            self._cache.delete(self.cache_key)
+        except Exception:
+            pass
+
+
+class SessionRefreshMiddleware:
+    """
+    Extend an existing session's expiry at most once per interval.
+    Must come right after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or not session.session_key:
+            return response
+
+        now = int(time.time())
+        if session.modified:
+            # Saved anyway; remember that the expiry moved
+            if not session.is_empty():
+                session[REFRESHED_KEY] = now
+            return response
+
+        interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', 300)
+        if now - session.get(REFRESHED_KEY, 0) < interval:
+            return response
+        # get() may have found the key invalid; never create a session here
+        if session.session_key and session.keys() - {REFRESHED_KEY}:
+            session[REFRESHED_KEY] = now
+        return response
@@ -0,0 +1,143 @@
+"""
+slugs.py — Unique slug allocation.
+
+Models used to probe ``while Model.objects.filter(slug=…).exists()``, one
+query per taken suffix: the 500th "introduction-to-python" cost 500
+queries, and two saves racing for the same title picked the same slug and
+one of them died on the unique index. Now:
+
+    slugs.unique(instance, slugify(title))          # one startswith query
+    slugs.save(instance, slugify(title), super().save, *args, **kwargs)
+                                                    # allocate, save, retry a lost race
+    slugs.assign(objs, lambda obj: slugify(obj.title))
+                                                    # before bulk_create
+
+A taken base gets the suffix after the highest "<base>-<n>" in use (gaps
+are not reused). Bases are cut so that base-<n> fits the field's
+max_length; an empty base (a title slugify() drops entirely) falls back
+to the model name.
+"""
+
+import re
+from contextlib import nullcontext
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+
+FIELD = 'slug'
+# Characters kept free for "-<n>" when a base is cut to max_length
+SUFFIX_ROOM = 8
+# Saves retried after a concurrent insert took the slug
+RETRIES = 3
+# startswith conditions per query in assign()
+BULK_BATCH = 200
+
+_SUFFIXED = re.compile(r'(.+)-(\d+)')
+
+
+# ─── 1. Allocation ────────────────────────────────────────────────────────────
+
+def _bounds(model, base, field):
+    """(base, stem): base cut to the field, stem cut so that stem-<n> fits too."""
+    max_length = model._meta.get_field(field).max_length
+    base = base[:max_length].strip('-') or model._meta.model_name
+    stem = base
+    if len(base) + SUFFIX_ROOM > max_length:
+        stem = base[:max_length - SUFFIX_ROOM].rstrip('-') or model._meta.model_name
+    return base, stem
+
+
+class _Taken:
+    """Slugs in use, with the highest n of every "<stem>-<n>" among them."""
+
+    def __init__(self, slugs=()):
+        self.slugs = set()
+        self.highest = {}
+        for slug in slugs:
+            self.add(slug)
+
+    def add(self, slug):
+        self.slugs.add(slug)
+        match = _SUFFIXED.fullmatch(slug)
+        if match:
+            stem, n = match.group(1), int(match.group(2))
+            if n > self.highest.get(stem, 0):
+                self.highest[stem] = n
+
+    def pick(self, base, stem):
+        if base in self.slugs:
+            n = self.highest.get(stem, 0) + 1
+            while f'{stem}-{n}' in self.slugs:
+                n += 1
+            base = f'{stem}-{n}'
+        self.add(base)
+        return base
+
+
+def unique(instance, base, field=FIELD):
+    """A slug for ``instance`` derived from ``base`` that no other row uses."""
+    model = type(instance)
+    base, stem = _bounds(model, base, field)
+    rows = model._default_manager.filter(**{f'{field}__startswith': stem})
+    if instance.pk is not None:
+        rows = rows.exclude(pk=instance.pk)
+    return _Taken(rows.values_list(field, flat=True)).pick(base, stem)
+
+
+def _conflicts(instance, field):
+    rows = type(instance)._default_manager.filter(**{field: getattr(instance, field)})
+    if instance.pk is not None:
+        rows = rows.exclude(pk=instance.pk)
+    return rows.exists()
+
+
+def save(instance, base, super_save, *args, field=FIELD, **kwargs):
+    """
+    Save ``instance`` through ``super_save`` (the model's super().save), first
+    giving it a slug from ``base`` if it has none. When a concurrent insert
+    takes the slug in between, the unique index rejects the row; the slug
+    is then allocated again, up to RETRIES times. Slugs set by the caller
+    are saved as they are.
+    """
+    if getattr(instance, field):
+        return super_save(*args, **kwargs)
+    using = kwargs.get('using') or router.db_for_write(type(instance), instance=instance)
+    for attempt in range(1, RETRIES + 1):
+        setattr(instance, field, unique(instance, base, field))
+        # Inside a transaction the failed INSERT needs a savepoint to roll
+        # back to; in autocommit it is harmless on its own
+        savepoint = transaction.get_connection(using).in_atomic_block
+        try:
+            with transaction.atomic(using=using) if savepoint else nullcontext():
+                return super_save(*args, **kwargs)
+        except IntegrityError:
+            if attempt == RETRIES or not _conflicts(instance, field):
+                raise
+
+
+# ─── 2. Bulk ──────────────────────────────────────────────────────────────────
+
+def assign(objs, base, field=FIELD):
+    """
+    Fill the empty slugs of unsaved ``objs`` (imports, seeding, before
+    bulk_create), unique among the rows and each other. ``base(obj)`` gives
+    the slugified base. Costs one query per BULK_BATCH distinct stems.
+    """
+    pending = [obj for obj in objs if not getattr(obj, field)]
+    if not pending:
+        return objs
+    model = type(pending[0])
+    bounds = [_bounds(model, base(obj), field) for obj in pending]
+
+    taken = _Taken(getattr(obj, field) for obj in objs if getattr(obj, field))
+    stems = sorted({stem for _, stem in bounds})
+    for start in range(0, len(stems), BULK_BATCH):
+        condition = Q()
+        for stem in stems[start:start + BULK_BATCH]:
+            condition |= Q(**{f'{field}__startswith': stem})
+        for slug in model._default_manager.filter(condition).values_list(field, flat=True):
+            taken.add(slug)
+
+    for obj, (obj_base, stem) in zip(pending, bounds):
+        setattr(obj, field, taken.pick(obj_base, stem))
+    return objs
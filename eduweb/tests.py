@@ -1,3 +1,49 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from eduweb.instrumentation import assert_max_queries, capture, fingerprint, max_queries
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_placeholders_fold(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "auth_user" WHERE "id" = 42 AND "username" = \'ann\''),
+            fingerprint('SELECT * FROM "auth_user" WHERE "id" = %s AND "username" = %s'),
+        )
+
+    def test_in_lists_fold_whatever_their_length(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "auth_user" WHERE "id" IN (%s, %s, %s)'),
+            'SELECT * FROM "auth_user" WHERE "id" IN (...)',
+        )
+
+
+class MaxQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f'user{n}') for n in range(12))
+
+    def test_n_plus_one_loop_fails_with_its_fingerprint(self):
+        with self.assertRaises(AssertionError) as failure:
+            with max_queries(3, label='loop'):
+                for pk in User.objects.values_list('pk', flat=True):
+                    User.objects.get(pk=pk)
+        self.assertIn('loop ran 13 queries', str(failure.exception))
+        self.assertIn('12×', str(failure.exception))
+
+    def test_loop_shares_one_fingerprint(self):
+        with capture() as log:
+            for pk in User.objects.values_list('pk', flat=True):
+                User.objects.get(pk=pk)
+        self.assertEqual(log.count, 13)
+        self.assertEqual(list(log.repeated(threshold=10).values()), [12])
+        self.assertEqual(log.duplicates, 0)
+
+    def test_single_query_passes(self):
+        with max_queries(1) as log:
+            list(User.objects.all())
+        self.assertEqual(log.count, 1)
+
+    def test_login_redirect_does_not_pass_a_budget(self):
+        with self.assertRaisesMessage(AssertionError, 'answered 302, expected 200'):
+            assert_max_queries('students:dashboard', 50)
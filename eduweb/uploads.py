@@ -0,0 +1,430 @@
+"""
+uploads.py — Resumable chunked uploads for large files.
+
+A regular multipart upload keeps a worker busy for the whole transfer and
+is only size-checked once it has been received. Large lesson videos,
+library files, application documents and assignment attachments can
+instead be sent in chunks by static/js/chunked-upload.js:
+
+    POST  /uploads/                 {"target": "lesson_video", "filename": …, "size": …}
+                                    → {"upload_id": …, "chunk_size": …, "offset": 0}
+    PUT   /uploads/<id>/            one chunk; Content-Range: bytes 0-8388607/1073741824
+                                    X-Chunk-SHA256: <hex>        (optional)
+                                    → {"offset": …, "crc32": …}
+    GET   /uploads/<id>/            → current offset, to resume after a failure
+    POST  /uploads/<id>/complete/   {"crc32": …} → {"token": …}
+
+Each chunk is streamed straight into a ``.part`` file under
+UPLOAD_TEMP_DIR while a CRC32 of the whole file is kept up to date, so
+the server never holds more than one read block in memory. The size
+limit is checked against the declared size before the first byte and
+against Content-Length before every chunk.
+
+The form then posts the token in ``<field>_upload`` instead of the file.
+request_files() turns it back into an UploadedFile whose
+temporary_file_path() is the assembled ``.part``: the form's own
+validators run unchanged and FileSystemStorage moves the file into
+MEDIA_ROOT with a rename instead of a copy.
+
+State lives in a JSON sidecar next to the ``.part`` file rather than in
+the database, so chunk requests never take the SQLite write lock.
+``python manage.py cleanup_uploads`` removes abandoned uploads.
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import UploadedFile
+from django.http import HttpResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+READ_BLOCK = 64 * 1024
+TOKEN_SALT = 'eduweb.uploads'
+
+
+class UploadError(Exception):
+    """Rejected upload request; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1. TARGETS
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class UploadTarget:
+    max_size: int
+    extensions: tuple
+    roles: tuple = ()          # empty → any authenticated user
+    staff: bool = False        # staff/superusers always allowed when True
+
+    def allows(self, user, access):
+        if self.staff and (user.is_staff or user.is_superuser):
+            return True
+        return not self.roles or access.role in self.roles
+
+
+# Limits mirror the model / form validators of each field
+TARGETS = {
+    'lesson_video': UploadTarget(
+        max_size=getattr(settings, 'UPLOAD_MAX_VIDEO_SIZE', 2048 * MB),
+        extensions=('mp4', 'webm', 'ogg', 'avi', 'mov'),
+        roles=('instructor', 'admin', 'content_manager'), staff=True,
+    ),
+    'lesson_file': UploadTarget(
+        max_size=500 * MB,
+        extensions=('pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'zip', 'txt', 'mp3', 'png', 'jpg', 'jpeg'),
+        roles=('instructor', 'admin', 'content_manager'), staff=True,
+    ),
+    'library_file': UploadTarget(
+        max_size=500 * MB,
+        extensions=('pdf', 'doc', 'docx', 'epub', 'txt', 'pptx', 'xlsx'),
+        roles=('admin', 'content_manager'), staff=True,
+    ),
+    'application_document': UploadTarget(
+        max_size=5 * MB,
+        extensions=('pdf', 'jpg', 'jpeg', 'png'),
+    ),
+    'assignment_submission': UploadTarget(
+        max_size=10 * MB,
+        extensions=('pdf', 'doc', 'docx', 'txt', 'zip'),
+        roles=('student',),
+    ),
+}
+
+
+def get_target(name):
+    try:
+        return TARGETS[name]
+    except KeyError:
+        raise UploadError('Unknown upload target.') from None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2. STATE
+# ─────────────────────────────────────────────────────────────────────────────
+def temp_dir():
+    path = Path(getattr(settings, 'UPLOAD_TEMP_DIR', settings.BASE_DIR / 'uploads_tmp'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def chunk_size():
+    return getattr(settings, 'UPLOAD_CHUNK_SIZE', 8 * MB)
+
+
+def _paths(upload_id):
+    # upload ids are uuid4 hex; never let a client pick a path
+    try:
+        upload_id = uuid.UUID(hex=str(upload_id)).hex
+    except ValueError:
+        raise UploadError('Unknown upload.', status=404) from None
+    base = temp_dir() / upload_id
+    return base.with_suffix('.part'), base.with_suffix('.json')
+
+
+def _write_state(state):
+    _, meta = _paths(state['id'])
+    tmp = meta.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, meta)
+
+
+def load_state(upload_id, user=None):
+    part, meta = _paths(upload_id)
+    try:
+        state = json.loads(meta.read_text())
+    except (OSError, ValueError):
+        raise UploadError('Unknown upload.', status=404) from None
+    if user is not None and state['user_id'] != user.pk:
+        raise UploadError('Unknown upload.', status=404)
+    return state
+
+
+def public_state(state):
+    return {
+        'upload_id': state['id'],
+        'offset': state['offset'],
+        'size': state['size'],
+        'crc32': f"{state['crc32']:08x}",
+        'chunk_size': chunk_size(),
+        'complete': state['complete'],
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3. PROTOCOL
+# ─────────────────────────────────────────────────────────────────────────────
+def start(user, access, target_name, filename, size):
+    """Validate the declared file and create an empty upload."""
+    target = get_target(target_name)
+    if not target.allows(user, access):
+        raise UploadError('You cannot upload files here.', status=403)
+
+    filename = os.path.basename(str(filename or '')).strip()
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if not filename or ext not in target.extensions:
+        raise UploadError(f'File type not allowed. Accepted: {", ".join(target.extensions)}')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('File size is required.') from None
+    if size <= 0:
+        raise UploadError('The file is empty.')
+    if size > target.max_size:
+        raise UploadError(
+            f'File size cannot exceed {target.max_size // MB}MB.', status=413,
+        )
+
+    state = {
+        'id': uuid.uuid4().hex,
+        'user_id': user.pk,
+        'target': target_name,
+        'filename': filename,
+        'size': size,
+        'offset': 0,
+        'crc32': 0,
+        'complete': False,
+        'created': time.time(),
+    }
+    part, _ = _paths(state['id'])
+    part.touch()
+    _write_state(state)
+    return state
+
+
+def _parse_content_range(header, size):
+    # "bytes <start>-<end>/<total>"
+    try:
+        unit, spec = header.split(' ', 1)
+        span, total = spec.split('/', 1)
+        first, last = (int(v) for v in span.split('-', 1))
+        if unit != 'bytes' or int(total) != size or last < first:
+            raise ValueError
+    except (AttributeError, ValueError):
+        raise UploadError('A valid Content-Range header is required.') from None
+    return first, last
+
+
+def write_chunk(user, upload_id, stream, content_length, content_range, sha256=None):
+    """Append one chunk read from ``stream``; returns the updated state."""
+    state = load_state(upload_id, user)
+    if state['complete']:
+        raise UploadError('This upload is already complete.', status=409, offset=state['offset'])
+
+    first, last = _parse_content_range(content_range, state['size'])
+    length = last - first + 1
+    if content_length != length:
+        raise UploadError('Content-Length does not match Content-Range.')
+    if length > chunk_size() or last >= state['size']:
+        raise UploadError('Chunk too large.', status=413)
+
+    part, _ = _paths(upload_id)
+    with open(part, 'r+b') as fh:
+        if fcntl:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        # Re-read under the lock: a retried chunk may have landed meanwhile
+        state = load_state(upload_id, user)
+        if first != state['offset']:
+            raise UploadError('Unexpected offset.', status=409, offset=state['offset'])
+
+        digest = hashlib.sha256() if sha256 else None
+        crc = state['crc32']
+        received = 0
+        fh.seek(first)
+        while received < length:
+            block = stream.read(min(READ_BLOCK, length - received))
+            if not block:
+                break
+            fh.write(block)
+            crc = zlib.crc32(block, crc)
+            if digest:
+                digest.update(block)
+            received += len(block)
+
+        if received != length or (digest and digest.hexdigest() != sha256.lower()):
+            # Drop the partial chunk so the client can simply retry it
+            fh.truncate(first)
+            raise UploadError(
+                'Chunk incomplete or corrupted; please retry.', status=422, offset=first,
+            )
+        fh.truncate(first + length)
+
+        state['offset'] = first + length
+        state['crc32'] = crc
+        _write_state(state)
+    return state
+
+
+def _parse_crc32(value):
+    # The client sends the CRC32 of the whole file as (up to) 8 hex digits
+    try:
+        crc = int(str(value), 16)
+    except ValueError:
+        crc = -1
+    if not 0 <= crc <= 0xFFFFFFFF:
+        raise UploadError('Invalid checksum; expected the CRC32 as hex digits.')
+    return crc
+
+
+def complete(user, upload_id, crc32=None):
+    """Check the assembled file and return the form token for it."""
+    state = load_state(upload_id, user)
+    if state['offset'] != state['size']:
+        raise UploadError('Upload is not finished.', status=409, offset=state['offset'])
+    if crc32 is not None and _parse_crc32(crc32) != state['crc32']:
+        discard(upload_id)
+        raise UploadError('Checksum mismatch; the upload was discarded.', status=422)
+    part, _ = _paths(upload_id)
+    if part.stat().st_size != state['size']:
+        raise UploadError('Upload is not finished.', status=409, offset=part.stat().st_size)
+    state['complete'] = True
+    _write_state(state)
+    return signing.dumps({'id': state['id'], 'target': state['target']}, salt=TOKEN_SALT)
+
+
+def discard(upload_id):
+    for path in _paths(upload_id):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4. FORM INTEGRATION
+# ─────────────────────────────────────────────────────────────────────────────
+class ChunkedUploadedFile(UploadedFile):
+    """An assembled chunked upload, handed to forms like a TemporaryUploadedFile."""
+
+    def __init__(self, path, name, size, meta=None):
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        super().__init__(open(path, 'rb'), name, content_type, size, None)
+        self._path = str(path)
+        self._meta = meta
+
+    def temporary_file_path(self):
+        return self._path
+
+    def close(self):
+        try:
+            self.file.close()
+        except FileNotFoundError:
+            # Moved into storage already
+            pass
+        # Once storage has moved the file away the upload is used up. While
+        # the .part is still here (the form failed on another field) the
+        # sidecar stays, so the token resolves again on the next submit.
+        if self._meta is not None and not os.path.exists(self._path):
+            self._meta.unlink(missing_ok=True)
+
+
+def resolve(user, token, target_name):
+    """ChunkedUploadedFile for a completed upload token, or raise UploadError."""
+    max_age = getattr(settings, 'UPLOAD_EXPIRY', 24 * 3600)
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=max_age)
+    except signing.BadSignature:
+        raise UploadError('The upload has expired; please upload the file again.') from None
+    if data.get('target') != target_name:
+        raise UploadError('Unknown upload.', status=404)
+    state = load_state(data['id'], user)
+    if not state['complete']:
+        raise UploadError('Upload is not finished.', status=409)
+    part, meta = _paths(state['id'])
+    if not part.exists():
+        # Saved by an earlier request; the sidecar outlived it
+        meta.unlink(missing_ok=True)
+        raise UploadError('This upload has already been used.', status=410)
+    return ChunkedUploadedFile(part, state['filename'], state['size'], meta)
+
+
+def request_files(request, fields):
+    """
+    request.FILES plus any chunked uploads posted as ``<field>_upload``
+    tokens; ``fields`` maps form field names to upload target names.
+    Invalid tokens are logged and ignored so the form reports the field as
+    missing instead of failing the request.
+
+    The uploads are added to request.FILES itself, which Django closes
+    when the response is done; ChunkedUploadedFile.close() then drops the
+    sidecar of every upload that made it into storage.
+    """
+    files = request.FILES
+    for field, target_name in fields.items():
+        token = request.POST.get(f'{field}_upload')
+        if not token or field in request.FILES:
+            continue
+        try:
+            files[field] = resolve(request.user, token, target_name)
+        except UploadError as exc:
+            logger.warning('uploads: could not attach %s for user %s: %s', field, request.user.pk, exc)
+    return files
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 5. EARLY REQUEST LIMIT
+# ─────────────────────────────────────────────────────────────────────────────
+class RequestSizeLimitMiddleware:
+    """
+    Reject requests whose Content-Length exceeds UPLOAD_MAX_REQUEST_SIZE
+    before any of the body is read. Files above the limit must use the
+    chunked endpoints.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limit = getattr(settings, 'UPLOAD_MAX_REQUEST_SIZE', None)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if limit and length > limit:
+            return HttpResponse(
+                f'Request body too large (limit {limit // MB}MB). '
+                'Large files must be sent with the chunked uploader.',
+                status=413, content_type='text/plain',
+            )
+        return self.get_response(request)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 6. CLEANUP
+# ─────────────────────────────────────────────────────────────────────────────
+def cleanup(max_age=None):
+    """Delete uploads older than ``max_age`` seconds; returns the number removed."""
+    max_age = max_age if max_age is not None else getattr(settings, 'UPLOAD_EXPIRY', 24 * 3600)
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in temp_dir().iterdir():
+        if path.suffix not in ('.part', '.json', '.tmp'):
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
@@ -27,6 +27,11 @@ urlpatterns = [
 
 
     path('admission-letter/<str:application_id>/', views.admission_letter, name='admission_letter'),
+    path(
+        'application/<str:application_id>/documents/<int:document_id>/',
+        views.application_document,
+        name='application_document',
+    ),
 
     # Faculty Pages
     path('faculty/<slug:slug>/', views.faculty_detail, name='faculty_detail'),
@@ -51,6 +56,17 @@ urlpatterns = [
         name='accept_admission'
     ),
 
+    # Resumable chunked uploads (eduweb/uploads.py)
+    path('uploads/', views.upload_start, name='upload_start'),
+    path('uploads/<str:upload_id>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<str:upload_id>/complete/', views.upload_complete, name='upload_complete'),
+
+    # Search-as-you-type choice fields (eduweb/autocomplete.py)
+    path('autocomplete/<slug:source>/', views.autocomplete_search, name='autocomplete'),
+
+    # Per-view latency and query totals (eduweb/instrumentation.py)
+    path('metrics/', views.metrics, name='metrics'),
+
     ############### PAYMENT GATEWAY URLS################
 
     
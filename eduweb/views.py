@@ -41,7 +41,10 @@ from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_GET, require_POST
 
 # ─── Local ───────────────────────────────────────────────────────────────────
+from . import autocomplete, instrumentation, invoices, media, uploads
+from .access import get_access
 from .decorators import applicant_required, check_for_auth, smart_redirect_applicant
+from .pagecache import public_page
 from .emailservices import (
     send_admin_email,
     send_application_confirmation_email,
@@ -120,16 +123,7 @@ def get_application_secure(application_id, user):
 
 def application_status_context(request):
     """Context processor — adds has_pending_application to every template."""
-    has_pending = False
-    if request.user.is_authenticated:
-        has_pending = CourseApplication.objects.filter(
-            user=request.user,
-            status__in=[
-                'draft', 'pending_payment', 'payment_complete',
-                'documents_uploaded', 'under_review',
-            ],
-        ).exists()
-    return {'has_pending_application': has_pending}
+    return {'has_pending_application': get_access(request).has_pending_application}
 
 
 def redirect_after_login(user):
@@ -449,6 +443,7 @@ def reset_password(request, token):
 # =============================================================================
 
 @check_for_auth
+@public_page('testimonials', 'blog')
 def index(request):
     from .models import Testimonial
     return render(request, 'index.html', {
@@ -474,6 +469,7 @@ def index(request):
 
 
 @check_for_auth
+@public_page('institution')
 def about(request):
     from .models import InstitutionMember, SiteConfig, SiteHistoryMilestone, InstitutionPartner
     partners_qs = InstitutionPartner.objects.filter(is_active=True)
@@ -505,6 +501,7 @@ def about(request):
     })
 
 @check_for_auth
+@public_page()
 def all_programs(request):
     faculties = (
         Faculty.objects
@@ -569,6 +566,7 @@ def blank_page(request):
 # =============================================================================
 
 @check_for_auth
+@public_page('blog')
 def blog(request):
     """Blog listing with category filter, search, and pagination."""
     posts = (
@@ -678,6 +676,7 @@ def contact_submit(request):
 # FACULTY & PROGRAM PAGES
 # =============================================================================
 @check_for_auth
+@public_page()
 def faculty_detail(request, slug):
     """
     Faculty detail: Faculty → Departments → Programs → Courses
@@ -709,6 +708,7 @@ def faculty_detail(request, slug):
 
 
 @check_for_auth
+@public_page()
 def program_detail(request, slug):
     """Program detail: program info, courses grouped by year/semester, intakes."""
     program = get_object_or_404(
@@ -925,6 +925,33 @@ def admission_letter(request, application_id):
     return render(request, 'applications/admission_letter.html', {'application': application})
 
 
+@login_required(login_url='eduweb:auth_page')
+def application_document(request, application_id, document_id):
+    """
+    Serve an uploaded application document.
+    Accessible by the application owner and admin/staff; ?download=1 saves it.
+    """
+    document = get_object_or_404(
+        ApplicationDocument.objects.select_related('application'),
+        pk=document_id,
+        application__application_id=application_id,
+    )
+    application = document.application
+
+    user     = request.user
+    is_owner = application.user_id == user.id or application.email == user.email
+    is_admin = user.is_staff or user.is_superuser or get_access(request).role == 'admin'
+
+    if not (is_owner or is_admin):
+        return HttpResponseForbidden("You don't have permission to view this document.")
+
+    return media.serve_file(
+        request, document.file,
+        filename=document.original_filename or None,
+        as_attachment=bool(request.GET.get('download')),
+    )
+
+
 @login_required(login_url='eduweb:auth_page')
 def submit_application(request, application_id):
     """
@@ -1175,7 +1202,7 @@ def upload_application_file(request, application_id):
         })
 
     file_type   = request.POST.get('file_type')
-    file        = request.FILES.get('file')
+    file        = uploads.request_files(request, {'file': 'application_document'}).get('file')
     auto_submit = request.POST.get('auto_submit') == 'true'
 
     if not file_type or not file:
@@ -1228,6 +1255,109 @@ def upload_application_file(request, application_id):
         return JsonResponse({'success': False, 'error': f'Upload failed: {e}'})
 
 
+# =============================================================================
+# CHUNKED UPLOADS (see eduweb/uploads.py)
+# =============================================================================
+
+def _upload_error(exc):
+    return JsonResponse({'error': str(exc), **exc.extra}, status=exc.status)
+
+
+@login_required(login_url='eduweb:auth_page')
+@require_POST
+def upload_start(request):
+    """Create a resumable upload after checking the declared name and size"""
+    try:
+        data = json.loads(request.body or b'{}')
+        state = uploads.start(
+            request.user, get_access(request),
+            data.get('target'), data.get('filename'), data.get('size'),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+    except uploads.UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse(uploads.public_state(state), status=201)
+
+
+@login_required(login_url='eduweb:auth_page')
+def upload_chunk(request, upload_id):
+    """GET: resume status. PUT: append one chunk, streamed from the request"""
+    try:
+        if request.method == 'GET':
+            return JsonResponse(uploads.public_state(uploads.load_state(upload_id, request.user)))
+        if request.method != 'PUT':
+            return HttpResponse(status=405, headers={'Allow': 'GET, PUT'})
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        state = uploads.write_chunk(
+            request.user, upload_id, request,
+            content_length=length,
+            content_range=request.headers.get('Content-Range'),
+            sha256=request.headers.get('X-Chunk-SHA256'),
+        )
+    except uploads.UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse(uploads.public_state(state))
+
+
+@login_required(login_url='eduweb:auth_page')
+@require_POST
+def upload_complete(request, upload_id):
+    """Verify the whole-file checksum and hand back the form token"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+    try:
+        token = uploads.complete(request.user, upload_id, crc32=data.get('crc32'))
+    except uploads.UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse({'token': token})
+
+
+# =============================================================================
+# AUTOCOMPLETE (see eduweb/autocomplete.py)
+# =============================================================================
+
+@login_required(login_url='eduweb:auth_page')
+@require_GET
+def autocomplete_search(request, source):
+    """Prefix matches for an AutocompleteField: {"results": [{"id", "text"}]}"""
+    try:
+        definition = autocomplete.get_source(source)
+    except LookupError:
+        return JsonResponse({'error': 'Unknown source.'}, status=404)
+    try:
+        limit = int(request.GET.get('limit', autocomplete.LIMIT))
+    except ValueError:
+        limit = autocomplete.LIMIT
+    try:
+        results = autocomplete.search(definition, get_access(request), request.GET.get('q', ''), limit)
+    except PermissionError:
+        return JsonResponse({'error': 'Not allowed.'}, status=403)
+    response = JsonResponse({'results': results})
+    response['Cache-Control'] = 'private, max-age=30'
+    return response
+
+
+# =============================================================================
+# METRICS (see eduweb/instrumentation.py)
+# =============================================================================
+
+@require_GET
+def metrics(request):
+    """Per-view latency and query totals in the Prometheus text format"""
+    if not instrumentation.metrics_allowed(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(
+        instrumentation.render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
 # =============================================================================
 # PAYMENTS
 # =============================================================================
@@ -1547,6 +1677,7 @@ def confirm_payment(request):
         application.status         = 'payment_complete'
         application.payment_status = 'success'
         application.save(update_fields=['status', 'payment_status'])
+        invoices.prerender_on_commit(payment.pk)
 
     return JsonResponse({
         'success':      True,
@@ -1667,5 +1798,6 @@ def stripe_webhook(request):
                 application.status         = 'payment_complete'
                 application.payment_status = 'success'
                 application.save(update_fields=['status', 'payment_status'])
+                invoices.prerender_on_commit(payment.pk)
 
     return HttpResponse(status=200)
\ No newline at end of file
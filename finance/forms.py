@@ -1,8 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from eduweb.autocomplete import AutocompleteField, AutocompleteWidget
 from eduweb.models import (
-    ApplicationPayment,
     Subscription, 
     CourseApplication,
     StaffPayroll,
@@ -223,21 +223,19 @@ class DateRangeForm(forms.Form):
 class InvoiceGenerateForm(forms.Form):
     """Form to select payment for invoice generation"""
     
-    payment = forms.ModelChoiceField(
-        queryset=ApplicationPayment.objects.filter(
-            status='completed'
-        ).select_related(
-            'application__user',
-            'application__course'
+    payment = AutocompleteField(
+        'paid_application_payments',
+        widget=AutocompleteWidget(
+            'paid_application_payments',
+            placeholder='Type reference or name…',
+            attrs={
+                'class': (
+                    'w-full px-4 py-2.5 border border-gray-300 '
+                    'rounded-lg focus:ring-2 focus:ring-primary-500 '
+                    'focus:border-primary-500 bg-white'
+                )
+            },
         ),
-        widget=forms.Select(attrs={
-            'class': (
-                'w-full px-4 py-2.5 border border-gray-300 '
-                'rounded-lg focus:ring-2 focus:ring-primary-500 '
-                'focus:border-primary-500 bg-white'
-            )
-        }),
-        empty_label="Select a payment..."
     )
 
 
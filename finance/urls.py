@@ -31,6 +31,11 @@ urlpatterns = [
         views.payroll_delete,
         name='payroll_delete',
     ),
+    path(
+        'payroll/<str:payroll_reference>/attachment/<int:attachment_number>/',
+        views.payroll_attachment,
+        name='payroll_attachment',
+    ),
     path(
         'payroll/<str:payroll_reference>/attachment/'
         '<int:attachment_number>/delete/',
@@ -174,7 +174,8 @@ class LessonForm(forms.ModelForm):
             }),
             'video_file': forms.FileInput(attrs={
                 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 transition-colors file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-primary-50 file:text-primary-700 hover:file:bg-primary-100',
-                'accept': 'video/mp4,video/webm,video/ogg,video/x-msvideo,video/quicktime'
+                'accept': 'video/mp4,video/webm,video/ogg,video/x-msvideo,video/quicktime',
+                'data-chunked-upload': 'lesson_video',
             }),
             'video_duration_minutes': forms.NumberInput(attrs={
                 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 transition-colors',
@@ -185,7 +186,8 @@ class LessonForm(forms.ModelForm):
                 'value': 0
             }),
             'file': forms.FileInput(attrs={
-                'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 transition-colors file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-primary-50 file:text-primary-700 hover:file:bg-primary-100'
+                'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 transition-colors file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-primary-50 file:text-primary-700 hover:file:bg-primary-100',
+                'data-chunked-upload': 'lesson_file',
             }),
             'is_preview': forms.CheckboxInput(attrs={
                 'class': 'w-4 h-4 text-primary-600 border-gray-300 rounded focus:ring-primary-500'
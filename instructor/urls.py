@@ -46,6 +46,7 @@ urlpatterns = [
     path('courses/<slug:course_slug>/students/', views.students_list, name='students_list'),
     path('courses/<slug:course_slug>/students/<int:student_id>/progress/', views.student_progress, name='student_progress'),
     path('courses/<slug:course_slug>/students/enroll/', views.enroll_student, name='enroll_student'),
+    path('courses/<slug:course_slug>/students/enroll/bulk/', views.bulk_enroll_students, name='bulk_enroll_students'),
     
     # Announcements
     path('courses/<slug:course_slug>/announcements/create/', views.announcement_create, name='announcement_create'),
@@ -178,6 +179,11 @@ urlpatterns = [
         views.discussion_detail,
         name='discussion_detail',
     ),
+    path(
+        'courses/<slug:course_slug>/discussions/<slug:discussion_slug>/events/',
+        views.discussion_events,
+        name='discussion_events',
+    ),
     path(
         'courses/<slug:course_slug>/discussions/<slug:discussion_slug>/reply/',
         views.discussion_reply,
@@ -6,7 +6,7 @@ from django.db.models import Count, Avg, Sum, Q, F
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models.functions import TruncMonth
 from django.contrib.auth import update_session_auth_hash
 from django.core.mail import send_mail
 from django.conf import settings
@@ -14,6 +14,7 @@ from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
+from django.urls import reverse
 
 from eduweb.models import (
     LMSCourse, Lesson, LessonSection, Quiz, QuizQuestion,
@@ -25,7 +26,10 @@ from .forms import (
     QuizForm, QuizQuestionForm, QuizAnswerForm, AssignmentForm,
     AnnouncementForm, InstructorProfileForm, InstructorSettingsForm, PasswordChangeForm, SupportTicketForm
 )
+from eduweb import conversations, enrollments, events, listing, timeseries, uploads
 from eduweb.decorators import instructor_required
+from eduweb.forms import BulkEnrollmentForm
+from eduweb.dbrouting import reporting_view
 
 from eduweb.models import (
     LMSCourse, Lesson, LessonSection, Quiz, QuizQuestion,
@@ -34,6 +38,9 @@ from eduweb.models import (
     QuizAttempt, QuizResponse, Message, Discussion, DiscussionReply
 )
 
+# Form field → chunked upload target (eduweb/uploads.py)
+LESSON_UPLOADS = {'video_file': 'lesson_video', 'file': 'lesson_file'}
+
 # ── Notification helper ────────────────────────────────────────────────────
 def _notify_instructor(instructor, title, message, notif_type='system', link=''):
     """
@@ -386,7 +393,7 @@ def lesson_create(request, course_slug):
     )
     
     if request.method == 'POST':
-        form = LessonForm(request.POST, request.FILES, course=course)
+        form = LessonForm(request.POST, uploads.request_files(request, LESSON_UPLOADS), course=course)
         if form.is_valid():
             lesson = form.save(commit=False)
             lesson.course = course
@@ -437,7 +444,7 @@ def lesson_edit(request, course_slug, lesson_slug):
     if request.method == 'POST':
         form = LessonForm(
             request.POST,
-            request.FILES,
+            uploads.request_files(request, LESSON_UPLOADS),
             instance=lesson,
             course=course
         )
@@ -1068,6 +1075,40 @@ def enroll_student(request, course_slug):
     
     return redirect('instructor:students_list', course_slug=course.slug)
 
+
+@login_required(login_url='auth')
+@instructor_required
+def bulk_enroll_students(request, course_slug):
+    """Enroll a cohort from a CSV or an applicant filter"""
+    course = get_object_or_404(
+        LMSCourse,
+        slug=course_slug,
+        instructor=request.user
+    )
+    
+    context = {}
+    if request.method == 'POST':
+        form = BulkEnrollmentForm(request.POST, request.FILES)
+        if form.is_valid():
+            report = enrollments.bulk_enroll(
+                course, form.rows(),
+                enrolled_by=request.user,
+                notify=form.cleaned_data['notify'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            messages.success(request, report.summary())
+            context.update(report.as_context())
+    else:
+        form = BulkEnrollmentForm()
+    
+    return render(request, 'management/enrollment_import.html', {
+        **context,
+        'form': form,
+        'course': course,
+        'back_url': reverse('instructor:students_list', args=[course.slug]),
+        'back_label': 'Students',
+    })
+
 # ==================== ANNOUNCEMENTS ====================
 @login_required(login_url='auth')
 @instructor_required
@@ -1193,6 +1234,7 @@ def delete_question(request, course_slug, lesson_slug, quiz_slug, question_id):
 
 @login_required(login_url='auth')
 @instructor_required
+@reporting_view
 def course_statistics(request):
     """
     Course statistics overview
@@ -1229,24 +1271,18 @@ def course_statistics(request):
         is_approved=True
     ).aggregate(Avg('rating'))['rating__avg'] or 0
     
-    # Enrollment trends (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    daily_enrollments = Enrollment.objects.filter(
-        course__instructor=request.user,
-        enrolled_at__gte=thirty_days_ago
-    ).annotate(
-        date=TruncDate('enrolled_at')
-    ).values('date').annotate(
-        count=Count('id')
-    ).order_by('date')
+    # Enrollment trends (last 30 days, one GROUP BY, empty days included)
+    today = timezone.localdate()
+    daily_enrollments = timeseries.time_series(
+        Enrollment.objects.filter(course__instructor=request.user),
+        'enrolled_at', today - timedelta(days=29), today,
+    )
     
     # Convert to list for JSON serialization
-    enrollment_data = []
-    for item in daily_enrollments:
-        enrollment_data.append({
-            'date': item['date'].isoformat(),
-            'count': item['count']
-        })
+    enrollment_data = [
+        {'date': item['bucket'].isoformat(), 'count': item['count']}
+        for item in daily_enrollments
+    ]
     
     context = {
         'courses': courses,
@@ -1266,6 +1302,7 @@ def course_statistics(request):
 
 @login_required(login_url='auth')
 @instructor_required
+@reporting_view
 def student_analytics_progress(request):
     """
     Student progress tracking
@@ -1928,36 +1965,34 @@ def quiz_attempt_detail(request, course_slug, lesson_slug, quiz_slug, attempt_id
 # 3.  MESSAGES — Inbox / Sent / Thread / Compose / Reply
 # ============================================================
 
+def _conversation_list(request, folder):
+    mailbox = conversations.mailbox(request.user)
+    threads = listing.keyset_page(
+        request,
+        conversations.threads(request.user, folder),
+        conversations.INBOX_ORDERING,
+        per_page=20,
+        total=mailbox.started_count if folder == 'sent' else mailbox.thread_count,
+    )
+    return render(request, 'instructor/messages_inbox.html', {
+        'messages_list': threads,
+        'active_folder': folder,
+        'unread_count':  mailbox.unread_count,
+    })
+
+
 @login_required(login_url='auth')
 @instructor_required
 def messages_inbox(request):
-    """Show received messages (most recent per thread)."""
-    received = Message.objects.filter(
-        recipient=request.user, parent__isnull=True
-    ).select_related('sender').order_by('-created_at')
-
-    unread_count = received.filter(is_read=False).count()
-
-    return render(request, 'instructor/messages_inbox.html', {
-        'messages_list': received,
-        'active_folder': 'inbox',
-        'unread_count':  unread_count,
-    })
+    """Show every conversation, most recent activity first."""
+    return _conversation_list(request, 'inbox')
 
 
 @login_required(login_url='auth')
 @instructor_required
 def messages_sent(request):
-    """Show sent messages."""
-    sent = Message.objects.filter(
-        sender=request.user, parent__isnull=True
-    ).select_related('recipient').order_by('-created_at')
-
-    return render(request, 'instructor/messages_inbox.html', {
-        'messages_list': sent,
-        'active_folder': 'sent',
-        'unread_count':  0,
-    })
+    """Show the conversations this instructor started."""
+    return _conversation_list(request, 'sent')
 
 
 @login_required(login_url='auth')
@@ -1965,19 +2000,20 @@ def messages_sent(request):
 def message_thread(request, message_id):
     """Display a full conversation thread."""
     root = get_object_or_404(
-        Message, id=message_id
+        Message.objects.select_related('sender', 'recipient'), id=message_id
     )
-    # Security: only sender or recipient may view
-    if root.sender != request.user and root.recipient != request.user:
+    conversation = conversations.for_participant(root, request.user)
+    # Security: only participants may view
+    if conversation is None:
         messages.error(request, 'You do not have access to this message.')
         return redirect('instructor:messages_inbox')
 
-    # Mark as read if viewing as recipient
-    if root.recipient == request.user and not root.is_read:
-        root.mark_as_read()
+    if conversation.root_id and conversation.root_id != root.pk:
+        root = conversation.root
+    conversations.mark_read(conversation, request.user)
 
-    thread_messages = [root] + list(
-        Message.objects.filter(parent=root).order_by('created_at')
+    thread_messages = list(
+        conversation.messages.select_related('sender', 'recipient').order_by('created_at')
     )
     other_user = root.recipient if root.sender == request.user else root.sender
 
@@ -2060,7 +2096,7 @@ def message_compose(request):
         if form.is_valid():
             msg = form.save(commit=False)
             msg.sender = request.user
-            msg.save()
+            conversations.send(msg)
             messages.success(request, f'Message sent to {msg.recipient.get_full_name()}!')
             _notify_instructor(
                 instructor=msg.recipient,
@@ -2095,21 +2131,24 @@ def message_compose(request):
 def message_reply(request, message_id):
     """Post a reply to an existing thread (POST only)."""
     root = get_object_or_404(Message, id=message_id)
-    if root.sender != request.user and root.recipient != request.user:
+    conversation = conversations.for_participant(root, request.user)
+    if conversation is None:
         messages.error(request, 'Access denied.')
         return redirect('instructor:messages_inbox')
+    if conversation.root_id and conversation.root_id != root.pk:
+        root = conversation.root
 
     if request.method == 'POST':
         body = request.POST.get('body', '').strip()
         if body:
             other = root.recipient if root.sender == request.user else root.sender
-            reply_msg = Message.objects.create(
+            conversations.send(Message(
                 sender    = request.user,
                 recipient = other,
                 subject   = f'Re: {root.subject}',
                 body      = body,
                 parent    = root,
-            )
+            ))
             messages.success(request, 'Reply sent.')
             _notify_instructor(
                 instructor=other,
@@ -2130,9 +2169,7 @@ def message_reply(request, message_id):
 @instructor_required
 def messages_mark_all_read(request):
     """Mark all inbox messages as read."""
-    Message.objects.filter(recipient=request.user, is_read=False).update(
-        is_read=True, read_at=timezone.now()
-    )
+    conversations.mark_all_read(request.user)
     messages.success(request, 'All messages marked as read.')
     return redirect('instructor:messages_inbox')
 
@@ -2167,15 +2204,28 @@ def discussion_detail(request, course_slug, discussion_slug):
     discussion.views_count += 1
     discussion.save(update_fields=['views_count'])
 
-    replies = discussion.replies.select_related('author').order_by('created_at')
+    replies = list(discussion.replies.select_related('author').order_by('created_at'))
 
     return render(request, 'instructor/discussion_detail.html', {
-        'course':     course,
-        'discussion': discussion,
-        'replies':    replies,
+        'course':       course,
+        'discussion':   discussion,
+        'replies':      replies,
+        'events_since': max((reply.pk for reply in replies), default=0),
     })
 
 
+@login_required(login_url='auth')
+@instructor_required
+def discussion_events(request, course_slug, discussion_slug):
+    """Live feed of new replies to a discussion (Server-Sent Events)."""
+    course     = get_object_or_404(LMSCourse, slug=course_slug, instructor=request.user)
+    discussion = get_object_or_404(Discussion, slug=discussion_slug, course=course)
+    return events.respond(
+        request, 'discussion', discussion.pk, 'instructor/discussion_reply.html', 'reply',
+        context={'course': course, 'discussion': discussion},
+    )
+
+
 @login_required(login_url='auth')
 @instructor_required
 def discussion_reply(request, course_slug, discussion_slug):
@@ -18,4 +18,5 @@ urlpatterns = [
 
     # Download — /library/item/<slug>/download/
     path('item/<slug:slug>/download/', views.download, name='download'),
+    path('item/<slug:slug>/read/', views.read, name='read'),
 ]
\ No newline at end of file
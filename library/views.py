@@ -6,10 +6,11 @@ CATEGORY_META is kept only for UI decoration (gradient, icon, description fallba
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.utils.text import slugify
 from django.conf import settings
 
+from eduweb import counters, media
 from eduweb.models import LibraryItem
 
 
@@ -243,6 +244,7 @@ def detail(request, slug):
     item = get_object_or_404(qs, slug=slug)
 
     item.increment_views()
+    counters.apply_pending([item], 'download_count')
 
     related_items = (
         _base_qs(request.user)
@@ -261,25 +263,45 @@ def detail(request, slug):
     })
 
 
-def download(request, slug):
-    """Serve file as attachment and increment counter."""
-    qs   = LibraryItem.objects.filter(is_active=True)
-    item = get_object_or_404(qs, slug=slug)
+def _servable_item(request, slug):
+    """Active item whose file the current user may fetch, or a login redirect."""
+    item = get_object_or_404(LibraryItem.objects.filter(is_active=True), slug=slug)
 
     if item.access == 'members' and not request.user.is_authenticated:
         login_url = getattr(settings, 'LOGIN_URL', '/accounts/login/')
-        return redirect(f"{login_url}?next={request.path}")
+        return item, redirect(f"{login_url}?next={request.path}")
+
+    if not item.has_file():
+        raise Http404("File not available.")
+    return item, None
+
 
-    if not item.allow_download or not item.has_file():
+def download(request, slug):
+    """Serve file as attachment and increment counter."""
+    item, login = _servable_item(request, slug)
+    if login:
+        return login
+
+    if not item.allow_download:
         raise Http404("File not available for download.")
 
-    item.increment_downloads()
+    response = media.serve_file(request, item.file, as_attachment=True)
+    # Resumed (Range) requests and 304s are the same download
+    if media.is_new_download(request, response):
+        item.increment_downloads()
+    return response
+
+
+def read(request, slug):
+    """Serve the file inline for the online reader."""
+    item, login = _servable_item(request, slug)
+    if login:
+        return login
+
+    if not item.allow_read_online:
+        raise Http404("File not available for online reading.")
 
-    try:
-        filename = item.file.name.split('/')[-1]
-        return FileResponse(item.file.open('rb'), as_attachment=True, filename=filename)
-    except FileNotFoundError:
-        raise Http404("File not found on server.")
+    return media.serve_file(request, item.file)
 
 
 def search(request):
@@ -0,0 +1,237 @@
+"""
+bulk.py — Bulk user operations for management.views.bulk_user_action.
+
+    run = BulkUserAction(action='activate', actor=request.user)
+    run.execute(user_ids)               # chunked, one transaction per chunk
+
+Every chunk of CHUNK_SIZE users is handled in its own transaction with
+set-based queries: one UPDATE / DELETE / bulk_create per chunk, the
+notifications fanned out with a single bulk_create, and one audit entry
+describing the whole chunk. Selections larger than SYNC_LIMIT run in a
+background thread (the same pattern as broadcast_send) so the request
+returns immediately; actions that send email (BACKGROUND_ACTIONS) always
+do, as every message is an SMTP round trip. Exports stream a CSV instead
+and never load the selection into memory.
+
+Administrators (superusers, staff, the admin role) are never deleted,
+deactivated or re-roled in bulk (PROTECTED_ACTIONS, see protect()); that
+stays a one-user-at-a-time change on the user detail page.
+"""
+
+import csv
+import logging
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from eduweb import audit, enrollments
+from eduweb.access import invalidate_users
+from eduweb.models import Enrollment, UserProfile
+from eduweb.notifications import notify_many
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+SYNC_LIMIT = 2000
+# One email per user: never inside the request, whatever the selection size
+BACKGROUND_ACTIONS = {'password_reset'}
+# Actions that could lock every administrator out of the portal
+PROTECTED_ACTIONS = {'delete', 'deactivate', 'change_role'}
+# Accounts management.views.is_admin lets into the portal
+ADMINS = Q(is_superuser=True) | Q(is_staff=True) | Q(profile__role='admin')
+
+ACTIONS = {
+    'activate': 'Activate',
+    'deactivate': 'Deactivate',
+    'change_role': 'Change role',
+    'password_reset': 'Send password reset',
+    'enroll': 'Enroll in LMS course',
+    'export': 'Export to CSV',
+    'delete': 'Delete',
+}
+
+# action → AuditLog.action
+AUDIT_ACTIONS = {
+    'activate': 'update',
+    'deactivate': 'update',
+    'change_role': 'permission_change',
+    'password_reset': 'update',
+    'enroll': 'create',
+    'export': 'export',
+    'delete': 'delete',
+}
+
+
+def protect(action, users):
+    """``users`` without administrators when ``action`` could lock them out."""
+    if action in PROTECTED_ACTIONS:
+        return users.exclude(ADMINS)
+    return users
+
+
+def chunked(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkUserAction:
+    """One bulk operation over a list of user ids."""
+
+    def __init__(self, action, actor, request=None, role=None, course=None):
+        if action not in ACTIONS:
+            raise ValueError(f'Unknown bulk action: {action}')
+        self.action = action
+        self.actor = actor
+        self.request = request
+        self.role = role
+        self.course = course
+        self.processed = 0
+
+    # ── entry points ────────────────────────────────────────────────────────
+    def execute(self, user_ids):
+        """Run every chunk; returns the number of users processed."""
+        handler = getattr(self, f'_{self.action}')
+        for chunk in chunked(list(user_ids)):
+            with transaction.atomic():
+                handler(chunk)
+                self._audit(chunk)
+            self.processed += len(chunk)
+        self._finish()
+        return self.processed
+
+    def runs_in_background(self, count):
+        """Whether a selection of ``count`` users should be handed to a thread."""
+        return self.action in BACKGROUND_ACTIONS or count > SYNC_LIMIT
+
+    def execute_in_background(self, user_ids):
+        """Run execute() in a daemon thread (large selections)."""
+        user_ids = list(user_ids)
+
+        def run():
+            try:
+                self.execute(user_ids)
+            except Exception:
+                logger.exception('bulk: %s failed after %d users', self.action, self.processed)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    # ── actions ─────────────────────────────────────────────────────────────
+    def _activate(self, chunk):
+        User.objects.filter(id__in=chunk).update(is_active=True)
+        notify_many(
+            chunk,
+            title='Account Activated',
+            message='Your account has been activated by an administrator. You can now log in and access the portal.',
+            notif_type='account',
+            link='/dashboard/',
+        )
+
+    def _deactivate(self, chunk):
+        User.objects.filter(id__in=chunk).update(is_active=False)
+        notify_many(
+            chunk,
+            title='Account Deactivated',
+            message='Your account has been deactivated by an administrator. Please contact support if you believe this is an error.',
+            notif_type='account',
+            link='/',
+        )
+
+    def _change_role(self, chunk):
+        UserProfile.objects.filter(user_id__in=chunk).update(role=self.role)
+        # update() sends no post_save, so drop the cached access contexts here
+        invalidate_users(chunk)
+        role_display = dict(UserProfile.ROLE_CHOICES).get(self.role, self.role)
+        notify_many(
+            chunk,
+            title='Your Role Has Been Updated',
+            message=f'Your account role has been changed to "{role_display}" by an administrator.',
+            notif_type='account',
+            link='/dashboard/',
+        )
+
+    def _password_reset(self, chunk):
+        from eduweb.emailservices import send_password_reset_email
+
+        users = User.objects.filter(id__in=chunk, is_active=True).select_related('profile')
+        for user in users:
+            if not send_password_reset_email(self.request, user):
+                logger.warning('bulk: password reset email failed for user %s', user.pk)
+
+    def _enroll(self, chunk):
+        already = set(
+            Enrollment.objects.filter(course=self.course, student_id__in=chunk)
+            .values_list('student_id', flat=True)
+        )
+        enrollments.enroll_users(
+            self.course, [uid for uid in chunk if uid not in already], enrolled_by=self.actor,
+        )
+
+    def _delete(self, chunk):
+        User.objects.filter(id__in=chunk).delete()
+
+    def _finish(self):
+        if self.action == 'enroll':
+            # bulk_create skips the Enrollment post_save signal; recount once
+            self.course.update_statistics()
+
+    def _audit(self, chunk):
+        audit.record(
+            action=AUDIT_ACTIONS[self.action],
+            model_name='User',
+            description=f'Bulk {ACTIONS[self.action].lower()}: {len(chunk)} user(s)',
+            user=self.actor,
+            request=self.request,
+            extra_data={
+                'bulk_action': self.action,
+                'user_ids': list(chunk),
+                **({'role': self.role} if self.role else {}),
+                **({'course_id': str(self.course.pk)} if self.course else {}),
+            },
+        )
+
+    # ── export ──────────────────────────────────────────────────────────────
+    def export_response(self, queryset, filename='users.csv'):
+        """StreamingHttpResponse with a CSV of ``queryset``; audited in chunks."""
+
+        class _Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(_Echo())
+        action = self
+
+        def rows():
+            yield writer.writerow(['ID', 'Username', 'Full Name', 'Email', 'Role', 'Active', 'Staff', 'Date Joined', 'Last Login'])
+            chunk = []
+            for user in queryset.select_related('profile').order_by('pk').iterator(chunk_size=CHUNK_SIZE):
+                profile = getattr(user, 'profile', None)
+                chunk.append(user.pk)
+                yield writer.writerow([
+                    user.pk,
+                    user.username,
+                    user.get_full_name(),
+                    user.email,
+                    profile.get_role_display() if profile else '',
+                    'Yes' if user.is_active else 'No',
+                    'Yes' if user.is_staff else 'No',
+                    user.date_joined.strftime('%Y-%m-%d %H:%M'),
+                    user.last_login.strftime('%Y-%m-%d %H:%M') if user.last_login else '',
+                ])
+                if len(chunk) >= CHUNK_SIZE:
+                    action._audit(chunk)
+                    chunk = []
+            if chunk:
+                action._audit(chunk)
+
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
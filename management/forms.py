@@ -2,6 +2,8 @@ from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
+from eduweb import audiences
+from eduweb.autocomplete import AutocompleteField, AutocompleteWidget
 from eduweb.models import (
     Faculty,
     Department,
@@ -1140,12 +1142,11 @@ class AuditLogFilterForm(forms.Form):
         ('permission_change', 'Permission Change'),
     ]
 
-    user = forms.ModelChoiceField(
-        queryset=User.objects.filter(is_active=True),
+    user = AutocompleteField(
+        'users',
         required=False,
-        empty_label='All Users',
-        widget=forms.Select(attrs={
-            'class': 'px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 bg-white'
+        widget=AutocompleteWidget('users', placeholder='All Users', attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-primary-500 bg-white'
         })
     )
     action = forms.ChoiceField(
@@ -1236,6 +1237,28 @@ class BroadcastMessageForm(forms.ModelForm):
         label="Select Enrollment Statuses"
     )
 
+    # Extra segments: added to / removed from the primary filter
+    include_roles = forms.MultipleChoiceField(
+        choices=UserProfile.ROLE_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        label="Also Send to Roles"
+    )
+
+    exclude_roles = forms.MultipleChoiceField(
+        choices=UserProfile.ROLE_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        label="Never Send to Roles"
+    )
+
+    exclude_enrollment_statuses = forms.MultipleChoiceField(
+        choices=Enrollment.STATUS_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        label="Never Send to Enrollment Statuses"
+    )
+
     class Meta:
         model = BroadcastMessage
         fields = ['subject', 'message', 'filter_type']
@@ -1276,6 +1299,46 @@ class BroadcastMessageForm(forms.ModelForm):
 
         return cleaned_data
 
+    def audience_definition(self):
+        """filter_values for the selected filter and extra segments."""
+        data = self.cleaned_data
+        filter_type = data['filter_type']
+        values = []
+        if filter_type in audiences.VALUE_KEYS:
+            selected = data.get(audiences.VALUE_KEYS[filter_type]) or []
+            values = [getattr(v, 'pk', v) for v in selected]
+        return audiences.definition(
+            filter_type,
+            values,
+            include=[('role', data.get('include_roles'))],
+            exclude=[
+                ('role', data.get('exclude_roles')),
+                ('enrollment_status', data.get('exclude_enrollment_statuses')),
+            ],
+        )
+
+    @staticmethod
+    def initial_for(broadcast):
+        """Form initial data from a stored definition."""
+        filter_values = broadcast.filter_values or {}
+        initial = {
+            'subject': broadcast.subject,
+            'message': broadcast.message,
+            'filter_type': broadcast.filter_type,
+        }
+        key = audiences.VALUE_KEYS.get(broadcast.filter_type)
+        if key and key in filter_values:
+            initial[key] = filter_values[key]
+        for segment in filter_values.get('include', []):
+            if segment['type'] == 'role':
+                initial['include_roles'] = segment['values']
+        for segment in filter_values.get('exclude', []):
+            if segment['type'] == 'role':
+                initial['exclude_roles'] = segment['values']
+            elif segment['type'] == 'enrollment_status':
+                initial['exclude_enrollment_statuses'] = segment['values']
+        return initial
+
 from django import forms
 from eduweb.models import (
     Department, Program, AcademicSession, CourseIntake,
@@ -2236,6 +2299,7 @@ class LibraryItemForm(forms.ModelForm):
                 'class': 'sr-only',
                 'accept': '.pdf,.doc,.docx,.epub,.txt,.pptx,.xlsx',
                 'id': 'id_file',
+                'data-chunked-upload': 'library_file',
             }),
             # ── booleans — styled as toggles by JS in the template ────────
             'allow_download':    forms.CheckboxInput(),
@@ -2278,16 +2342,14 @@ class LibraryItemForm(forms.ModelForm):
 class AdminMessageComposeForm(forms.ModelForm):
     """
     Form for admins/staff to compose a message to any user.
-    Unlike the student version, recipient is a visible dropdown
+    Unlike the student version, recipient is a search box
     covering all active users.
     """
     from eduweb.models import Message as _Msg
 
-    recipient = forms.ModelChoiceField(
-        queryset=User.objects.filter(is_active=True)
-            .select_related('profile')
-            .order_by('profile__role', 'first_name', 'last_name'),
-        widget=forms.Select(attrs={
+    recipient = AutocompleteField(
+        'users',
+        widget=AutocompleteWidget('users', placeholder='Search by name, username or email…', attrs={
             'class': (
                 'w-full px-4 py-3 border border-gray-300 rounded-lg '
                 'focus:ring-2 focus:ring-primary-blue-500 focus:border-transparent '
@@ -2321,7 +2383,7 @@ class AdminMessageComposeForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Show username + role in the dropdown label
+        # Show username + role in the search results and selected value
         self.fields['recipient'].label_from_instance = lambda u: (
             f"{u.get_full_name() or u.username} "
             f"[{u.profile.get_role_display() if hasattr(u, 'profile') else 'User'}]"
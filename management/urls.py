@@ -115,6 +115,8 @@ urlpatterns = [
     # Broadcast
     path('broadcast/', views.broadcast_center, name='broadcast_center'),
     path('broadcast/create/', views.broadcast_create, name='broadcast_create'),
+    path('broadcast/preview-count/', views.broadcast_preview_count, name='broadcast_preview_count'),
+    path('broadcast/<slug:slug>/recipients/', views.broadcast_recipients, name='broadcast_recipients'),
     path('broadcast/<slug:slug>/edit/', views.broadcast_edit, name='broadcast_edit'),
     path('broadcast/<slug:slug>/send/', views.broadcast_send, name='broadcast_send'),
     path('broadcast/<slug:slug>/delete/', views.broadcast_delete, name='broadcast_delete'),
@@ -141,6 +143,7 @@ urlpatterns = [
     # Enrollments
     path('enrollments/', views.enrollments_list, name='enrollments_list'),
     path('enrollments/create/', views.enrollment_create, name='enrollment_create'),
+    path('enrollments/import/', views.enrollment_import, name='enrollment_import'),
     path('enrollments/<int:pk>/edit/', views.enrollment_edit, name='enrollment_edit'),
     path('enrollments/<int:pk>/delete/', views.enrollment_delete, name='enrollment_delete'),
 
@@ -16,14 +16,22 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives, send_mail, send_mass_mail
 from django.core.paginator import Paginator
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Q, Count
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+# Project
+from eduweb import audit, auditarchive, certificates, conversations, enrollments, listing, timeseries, uploads
+from eduweb.audiences import Audience
+from eduweb.caching import get_or_set, make_key
+from eduweb.dbrouting import reporting_view
+from eduweb.forms import BulkEnrollmentForm
+from management import bulk
+
 # Models
 from eduweb.models import (
     AcademicSession,
@@ -34,6 +42,7 @@ from eduweb.models import (
     BlogCategory,
     BlogPost,
     BroadcastMessage,
+    BroadcastRecipientList,
     Certificate,
     ContactMessage,
     Course,
@@ -126,40 +135,27 @@ def _notify(user, title, message, notif_type='system', link=''):
 @login_required(login_url='eduweb:auth_page')
 def admin_inbox(request):
     """
-    Admin/staff inbox — shows all received and sent messages.
-    Marks all unread received messages as read on open.
+    Admin/staff inbox — one row per conversation, newest activity first.
+    ?tab=sent lists the threads this user started. Threads are marked
+    read when opened.
     """
     user = request.user
+    tab = 'sent' if request.GET.get('tab') == 'sent' else 'received'
+    folder = 'sent' if tab == 'sent' else 'inbox'
+    mailbox = conversations.mailbox(user)
 
-    received = (
-        Message.objects
-        .filter(recipient=user, parent__isnull=True)
-        .select_related('sender', 'sender__profile')
-        .order_by('-created_at')
-    )
-    sent = (
-        Message.objects
-        .filter(sender=user, parent__isnull=True)
-        .select_related('recipient', 'recipient__profile')
-        .order_by('-created_at')
+    threads = listing.keyset_page(
+        request,
+        conversations.threads(user, folder),
+        conversations.INBOX_ORDERING,
+        per_page=20,
+        total=mailbox.started_count if folder == 'sent' else mailbox.thread_count,
     )
 
-    unread_count = received.filter(is_read=False).count()
-
-    Message.objects.filter(
-        recipient=user, is_read=False, parent__isnull=True
-    ).update(is_read=True, read_at=timezone.now())
-
-    tab = request.GET.get('tab', 'received')
-    paginator_received = Paginator(received, 20)
-    paginator_sent = Paginator(sent, 20)
-    page = request.GET.get('page', 1)
-
     return render(request, 'management/inbox.html', {
         'page_title': 'Inbox',
-        'received': paginator_received.get_page(page),
-        'sent': paginator_sent.get_page(page),
-        'unread_count': unread_count,
+        'threads': threads,
+        'unread_count': mailbox.unread_count,
         'tab': tab,
     })
 
@@ -177,7 +173,7 @@ def admin_compose_message(request):
         if form.is_valid():
             msg = form.save(commit=False)
             msg.sender = request.user
-            msg.save()
+            conversations.send(msg)
             # In-app notification to recipient
             _notify(
                 user=msg.recipient,
@@ -215,7 +211,7 @@ def admin_compose_message(request):
 def admin_message_thread(request, message_id):
     """
     View a full message thread and reply.
-    Only sender or recipient may access.
+    Only participants of the conversation may access.
     """
     msg = get_object_or_404(
         Message.objects.select_related(
@@ -225,16 +221,18 @@ def admin_message_thread(request, message_id):
         pk=message_id,
     )
 
-    if msg.sender != request.user and msg.recipient != request.user:
+    conversation = conversations.for_participant(msg, request.user)
+    if conversation is None:
         messages.error(request, 'You do not have permission to view this message.')
         return redirect('management:admin_inbox')
 
-    if msg.recipient == request.user and not msg.is_read:
-        msg.mark_as_read()
+    if conversation.root_id and conversation.root_id != msg.pk:
+        msg = conversation.root
+    conversations.mark_read(conversation, request.user)
 
     thread_replies = (
-        Message.objects
-        .filter(parent=msg)
+        conversation.messages
+        .exclude(pk=msg.pk)
         .select_related('sender', 'sender__profile', 'recipient', 'recipient__profile')
         .order_by('created_at')
     )
@@ -243,13 +241,13 @@ def admin_message_thread(request, message_id):
         body = request.POST.get('body', '').strip()
         if len(body) >= 5:
             reply_to = msg.sender if msg.recipient == request.user else msg.recipient
-            Message.objects.create(
+            conversations.send(Message(
                 sender=request.user,
                 recipient=reply_to,
                 subject=f'Re: {msg.subject}',
                 body=body,
                 parent=msg,
-            )
+            ))
             _notify(
                 user=reply_to,
                 title=f'Reply from {request.user.get_full_name() or request.user.username}',
@@ -263,7 +261,7 @@ def admin_message_thread(request, message_id):
             except Exception:
                 pass
             messages.success(request, 'Reply sent!')
-            return redirect('management:admin_message_thread', message_id=message_id)
+            return redirect('management:admin_message_thread', message_id=msg.pk)
         messages.error(request, 'Reply must be at least 5 characters.')
 
     return render(request, 'management/message_thread.html', {
@@ -326,39 +324,57 @@ def is_admin(user):
     )
 
 
+def _applications_chart_ranges():
+    """Chart series for every dashboard range; the 7-day range is the default."""
+    today = timezone.localdate()
+    daily = timeseries.time_series(
+        CourseApplication.objects.all(), 'created_at',
+        today - timedelta(days=364), today,
+    )
+    ranges = {}
+    for days, period in timeseries.RANGE_PERIODS.items():
+        points = daily[-days:]
+        if period != 'day':
+            points = timeseries.rollup(points, period)
+        ranges[str(days)] = {
+            'labels': [
+                point['bucket'].strftime('%a') if days == 7
+                else timeseries.bucket_label(point['bucket'], period)
+                for point in points
+            ],
+            'data': [point['count'] for point in points],
+        }
+    return {**ranges['7'], 'ranges': ranges}
+
+
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
+@reporting_view
 def dashboard(request):
     """Admin dashboard with statistics and recent applications"""
     
-    # Get statistics
-    total_applications = CourseApplication.objects.count()
-    pending_applications = CourseApplication.objects.filter(status__in=['payment_complete', 'under_review', 'documents_uploaded']).count()
-    approved_applications = CourseApplication.objects.filter(status='approved').count()
+    # Get statistics (one conditional-aggregate query, briefly cached)
+    app_stats = listing.conditional_stats(
+        CourseApplication.objects.all(),
+        cache_key='dashboard-applications',
+        total=None,
+        pending=Q(status__in=['payment_complete', 'under_review', 'documents_uploaded']),
+        approved=Q(status='approved'),
+    )
+    total_applications = app_stats['total']
+    pending_applications = app_stats['pending']
+    approved_applications = app_stats['approved']
     total_students = User.objects.filter(is_staff=False, is_active=True).count()
     
     # Get recent applications (last 10)
     recent_applications = CourseApplication.objects.select_related('user').order_by('-created_at')[:10]
     
-    # Prepare chart data for applications over time (last 7 days)
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=6)
-    
-    applications_by_day = []
-    labels = []
-    
-    for i in range(7):
-        date = week_ago + timedelta(days=i)
-        count = CourseApplication.objects.filter(
-            created_at__date=date
-        ).count()
-        applications_by_day.append(count)
-        labels.append(date.strftime('%a'))
-    
-    applications_chart_data = json.dumps({
-        'labels': labels,
-        'data': applications_by_day
-    })
+    # Applications over time: 7/30/90/365-day ranges from one GROUP BY
+    applications_chart_data = json.dumps(get_or_set(
+        make_key('dashboard', 'applications-chart', timezone.localdate()),
+        _applications_chart_ranges,
+        settings.ADMIN_STATS_CACHE_TIMEOUT,
+    ))
     
     program_distribution = CourseApplication.objects.values(
         'program__name', 'program__department__faculty__name'
@@ -394,22 +410,20 @@ def dashboard(request):
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
 def applications_list(request):
-    """List all applications with filtering and pagination"""
+    """List all applications with filtering and keyset pagination"""
     
-    applications = CourseApplication.objects.select_related('user').order_by('-created_at')
+    applications = CourseApplication.objects.select_related('user')
     
     # Get filter parameters
     search_query = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
     program_filter = request.GET.get('program', '')
     
-    # Apply search filter
+    # Apply search filter (prefix match on indexed LOWER() columns)
     if search_query:
-        applications = applications.filter(
-            Q(application_id__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query)
+        applications = listing.search(
+            applications, search_query,
+            ['application_id', 'first_name', 'last_name', 'email'],
         )
     
     # Apply status filter
@@ -420,14 +434,22 @@ def applications_list(request):
     if program_filter:
         applications = applications.filter(program__id=program_filter)
     
-    # Pagination
-    paginator = Paginator(applications, 15)  # 15 applications per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
-    
-    # Get pending count for sidebar
-    pending_count = CourseApplication.objects.filter(status__in=['payment_complete', 'documents_uploaded', 'under_review']).count()
+    # Total + sidebar pending count in one query
+    stats = listing.conditional_stats(
+        CourseApplication.objects.all(),
+        cache_key='applications',
+        total=None,
+        pending=Q(status__in=['payment_complete', 'documents_uploaded', 'under_review']),
+    )
+    filtered = bool(search_query or status_filter or program_filter)
     
+    # Keyset pagination, 15 applications per page
+    page_obj = listing.keyset_page(
+        request, applications, ['-created_at', '-pk'], per_page=15,
+        total=None if filtered else stats['total'],
+    )
+    if listing.wants_json(request):
+        return listing.json_response(page_obj, _application_row)
 
     context = {
         'applications': page_obj,
@@ -435,12 +457,25 @@ def applications_list(request):
             (str(p.id), f"{p.name} ({p.department.faculty.name})")
             for p in Program.objects.filter(is_active=True).select_related('department__faculty')
         ],
-        'pending_count': pending_count,
+        'pending_count': stats['pending'],
     }
     
     return render(request, 'management/applications.html', context)
 
 
+def _application_row(application):
+    """JSON row for the applications infinite-scroll mode"""
+    return {
+        'application_id': application.application_id,
+        'name': application.get_full_name(),
+        'email': application.email,
+        'status': application.status,
+        'status_display': application.get_status_display(),
+        'created_at': application.created_at,
+        'url': reverse('management:application_detail', args=[application.application_id]),
+    }
+
+
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
 def application_detail(request, application_id):
@@ -1151,52 +1186,77 @@ def users_list(request):
     """List all users with search and filter functionality"""
     # Get search and filter parameters
     search_form = UserSearchForm(request.GET or None)
-    users = User.objects.select_related('profile').all()
-    
-    # Apply filters
-    if search_form.is_valid():
-        search = search_form.cleaned_data.get('search')
-        role = search_form.cleaned_data.get('role')
-        is_active = search_form.cleaned_data.get('is_active')
-        
-        if search:
-            users = users.filter(
-                Q(username__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search)
-            )
-        
-        if role:
-            users = users.filter(profile__role=role)
-        
-        if is_active:
-            users = users.filter(is_active=(is_active == 'true'))
-    
-    # Calculate statistics
-    stats = {
-        'total_users': User.objects.count(),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'staff_users': User.objects.filter(is_staff=True).count(),
-        'students': UserProfile.objects.filter(role='student').count(),
-        'instructors': UserProfile.objects.filter(role='instructor').count(),
-    }
-    
-    # Order QuerySet before pagination to avoid inconsistent results
-    users = users.order_by('-date_joined')
+    users, filtered = _filter_users(search_form)
+    
+    # All statistics in a single conditional-aggregate query (briefly cached)
+    stats = listing.conditional_stats(
+        User.objects.all(),
+        cache_key='users',
+        total_users=None,
+        active_users=Q(is_active=True),
+        staff_users=Q(is_staff=True),
+        students=Q(profile__role='student'),
+        instructors=Q(profile__role='instructor'),
+    )
     
-    # Pagination
-    paginator = Paginator(users, 20)
-    page_number = request.GET.get('page')
-    users_page = paginator.get_page(page_number)
+    # Keyset pagination: newest first, pk breaks ties
+    users_page = listing.keyset_page(
+        request, users, ['-date_joined', '-pk'], per_page=20,
+        total=None if filtered else stats['total_users'],
+    )
+    if listing.wants_json(request):
+        return listing.json_response(users_page, _user_row)
     
     return render(request, 'management/users/list.html', {
         'users': users_page,
         'search_form': search_form,
-        'stats': stats
+        'stats': stats,
+        'filtered': filtered,
+        'bulk_actions': bulk.ACTIONS,
+        'role_choices': UserProfile.ROLE_CHOICES,
+        'lms_courses': LMSCourse.objects.only('id', 'title').order_by('title'),
     })
 
 
+def _filter_users(search_form):
+    """Apply the users_list filters; returns (queryset, filtered)"""
+    users = User.objects.select_related('profile')
+    if not search_form.is_valid():
+        return users, False
+    
+    search = search_form.cleaned_data.get('search')
+    role = search_form.cleaned_data.get('role')
+    is_active = search_form.cleaned_data.get('is_active')
+    
+    if search:
+        users = listing.search(
+            users, search, ['username', 'first_name', 'last_name', 'email'],
+        )
+    
+    if role:
+        users = users.filter(profile__role=role)
+    
+    if is_active:
+        users = users.filter(is_active=(is_active == 'true'))
+    
+    return users, bool(search or role or is_active)
+
+
+def _user_row(user):
+    """JSON row for the users infinite-scroll mode"""
+    profile = getattr(user, 'profile', None)
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'name': user.get_full_name(),
+        'email': user.email,
+        'role': profile.role if profile else '',
+        'is_active': user.is_active,
+        'date_joined': user.date_joined,
+        'url': reverse('management:user_detail', args=[user.pk]),
+    }
+
+
 @login_required
 @user_passes_test(is_admin)
 def user_detail(request, pk):
@@ -1372,50 +1432,83 @@ def user_change_role(request, pk):
 @user_passes_test(is_admin)
 @require_POST
 def bulk_user_action(request):
-    """Handle bulk actions on users"""
+    """
+    Handle bulk actions on users.
+
+    The selection is either the checked ``user_ids`` or, with
+    ``select_all``, every user matching the users_list filters posted with
+    the form. Work is chunked by management.bulk; selections above
+    bulk.SYNC_LIMIT, and every password reset run, continue in the
+    background. Administrators are left out of delete, deactivate and
+    role changes.
+    """
     action = request.POST.get('action')
-    user_ids = request.POST.get('user_ids', '').split(',')
-    
-    if not action or not user_ids:
-        messages.error(request, 'Invalid bulk action request.')
+    if action not in bulk.ACTIONS:
+        messages.error(request, 'Invalid action specified.')
         return redirect('management:users_list')
     
-    # Filter out current user to prevent self-modification
-    user_ids = [int(uid) for uid in user_ids if uid and int(uid) != request.user.id]
+    if request.POST.get('select_all') == '1':
+        # 'role' is the bulk role-change target; the filter travels as role_filter
+        users, _ = _filter_users(UserSearchForm({
+            'search': request.POST.get('search', ''),
+            'role': request.POST.get('role_filter', ''),
+            'is_active': request.POST.get('is_active', ''),
+        }))
+    else:
+        raw_ids = request.POST.getlist('user_ids')
+        if len(raw_ids) == 1:
+            raw_ids = raw_ids[0].split(',')
+        user_ids = [int(uid) for uid in raw_ids if uid.strip().isdigit()]
+        users = User.objects.filter(id__in=user_ids)
+    
+    if action == 'export':
+        return bulk.BulkUserAction(action, request.user, request=request).export_response(
+            users, filename=f'users_{timezone.now():%Y%m%d_%H%M}.csv',
+        )
+    
+    # Never modify the acting user
+    users = users.exclude(id=request.user.id)
+    if action in bulk.PROTECTED_ACTIONS:
+        skipped = users.filter(bulk.ADMINS).count()
+        users = bulk.protect(action, users)
+        if skipped:
+            messages.warning(
+                request,
+                f'{skipped} administrator account(s) skipped; change those from their own user page.'
+            )
+    
+    options = {}
+    if action == 'change_role':
+        options['role'] = request.POST.get('role')
+        if options['role'] not in dict(UserProfile.ROLE_CHOICES):
+            messages.error(request, 'Please choose a valid role.')
+            return redirect('management:users_list')
+    elif action == 'enroll':
+        course_id = request.POST.get('course_id', '')
+        options['course'] = (
+            LMSCourse.objects.filter(pk=course_id).first() if course_id.isdigit() else None
+        )
+        if options['course'] is None:
+            messages.error(request, 'Please choose a course to enroll the users in.')
+            return redirect('management:users_list')
     
+    user_ids = list(users.order_by('pk').values_list('pk', flat=True))
     if not user_ids:
         messages.warning(request, 'No valid users selected.')
         return redirect('management:users_list')
     
-    users = User.objects.filter(id__in=user_ids)
-    count = users.count()
-    
-    if action == 'activate':
-        users.update(is_active=True)
-        messages.success(request, f'{count} user(s) activated successfully.')
-        for u in User.objects.filter(id__in=user_ids):
-            _notify(
-                user=u,
-                title='Account Activated',
-                message='Your account has been activated by an administrator. You can now log in and access the portal.',
-                notif_type='account',
-                link='/dashboard/',
-            )
-
-    elif action == 'deactivate':
-        users.update(is_active=False)
-        messages.success(request, f'{count} user(s) deactivated successfully.')
-        for u in User.objects.filter(id__in=user_ids):
-            _notify(
-                user=u,
-                title='Account Deactivated',
-                message='Your account has been deactivated by an administrator. Please contact support if you believe this is an error.',
-                notif_type='account',
-                link='/',
-            )
-
+    run = bulk.BulkUserAction(action, request.user, request=request, **options)
+    label = bulk.ACTIONS[action].lower()
+    if run.runs_in_background(len(user_ids)):
+        run.execute_in_background(user_ids)
+        messages.info(
+            request,
+            f'{label.capitalize()} started for {len(user_ids)} users. '
+            'It runs in the background; the audit log records each batch.'
+        )
     else:
-        messages.error(request, 'Invalid action specified.')
+        count = run.execute(user_ids)
+        messages.success(request, f'{label.capitalize()}: {count} user(s) processed successfully.')
     
     return redirect('management:users_list')
 
@@ -1494,8 +1587,7 @@ def system_config_create(request):
             config.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='create',
                 model_name='SystemConfiguration',
                 object_id=config.id,
@@ -1524,8 +1616,7 @@ def system_config_edit(request, pk):
             config.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='SystemConfiguration',
                 object_id=config.id,
@@ -1553,8 +1644,7 @@ def system_config_delete(request, pk):
         config_key = config.key
         
         # Create audit log before deletion
-        AuditLog.objects.create(
-            user=request.user,
+        audit.record(
             action='delete',
             model_name='SystemConfiguration',
             object_id=config.id,
@@ -1591,8 +1681,7 @@ def branding_config(request):
                     config.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='SystemConfiguration',
                 description='Updated branding configuration'
@@ -1637,8 +1726,7 @@ def email_config(request):
                 config.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='SystemConfiguration',
                 description='Updated email configuration'
@@ -1683,8 +1771,7 @@ def notification_config(request):
                 config.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='SystemConfiguration',
                 description='Updated notification configuration'
@@ -1748,8 +1835,7 @@ def course_category_create(request):
             category = form.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='create',
                 model_name='CourseCategory',
                 object_id=category.id,
@@ -1776,8 +1862,7 @@ def course_category_edit(request, pk):
             category = form.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='CourseCategory',
                 object_id=category.id,
@@ -1808,8 +1893,7 @@ def course_category_delete(request, pk):
         category_name = category.name
         
         # Create audit log before deletion
-        AuditLog.objects.create(
-            user=request.user,
+        audit.record(
             action='delete',
             model_name='CourseCategory',
             object_id=category.id,
@@ -1874,8 +1958,7 @@ def lms_course_create(request):
             course = form.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='create',
                 model_name='LMSCourse',
                 object_id=course.id,
@@ -1904,8 +1987,7 @@ def lms_course_edit(request, pk):
             course = form.save()
 
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
+            audit.record(
                 action='update',
                 model_name='LMSCourse',
                 object_id=course.id,
@@ -1966,8 +2048,7 @@ def lms_course_delete(request, pk):
         course_title = course.title
         
         # Create audit log before deletion
-        AuditLog.objects.create(
-            user=request.user,
+        audit.record(
             action='delete',
             model_name='LMSCourse',
             object_id=course.id,
@@ -1986,51 +2067,51 @@ def lms_course_delete(request, pk):
 
 
 # ==================== AUDIT LOG VIEWS ====================
+# Older months live in compressed archives (eduweb.auditarchive); AuditQuery
+# reads them together with the table, so these views never touch AuditLog
+# filters directly.
+
+def _audit_query(form):
+    """AuditQuery for the AuditLogFilterForm in request.GET"""
+    if not form.is_valid():
+        return auditarchive.AuditQuery()
+    data = form.cleaned_data
+    return auditarchive.AuditQuery(
+        user=data.get('user'),
+        action=data.get('action'),
+        date_from=data.get('date_from'),
+        date_to=data.get('date_to'),
+        search=data.get('search'),
+    )
+
+
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
 def audit_logs_list(request):
     """List all audit logs with filtering"""
-    logs = AuditLog.objects.select_related('user').order_by('-timestamp')
-    
-    # Apply filters
     form = AuditLogFilterForm(request.GET)
-    if form.is_valid():
-        if form.cleaned_data.get('user'):
-            logs = logs.filter(user=form.cleaned_data['user'])
-        if form.cleaned_data.get('action'):
-            logs = logs.filter(action=form.cleaned_data['action'])
-        if form.cleaned_data.get('date_from'):
-            logs = logs.filter(timestamp__date__gte=form.cleaned_data['date_from'])
-        if form.cleaned_data.get('date_to'):
-            logs = logs.filter(timestamp__date__lte=form.cleaned_data['date_to'])
-        if form.cleaned_data.get('search'):
-            logs = logs.filter(
-                Q(description__icontains=form.cleaned_data['search']) |
-                Q(model_name__icontains=form.cleaned_data['search'])
-            )
-    
-    # Pagination
-    paginator = Paginator(logs, 50)
-    page = request.GET.get('page', 1)
-    logs_page = paginator.get_page(page)
+    logs_page = _audit_query(form).page(request, per_page=50)
     
-    # Statistics
+    # Statistics: index range scans; the action breakdown reads the whole
+    # table plus the archive manifests, so it is cached
+    now = timezone.now()
+    today_start, _ = listing.day_bounds(timezone.localdate())
     stats = {
-        'total_logs': logs.count(),
-        'today_logs': AuditLog.objects.filter(timestamp__date=timezone.now().date()).count(),
-        'week_logs': AuditLog.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(days=7)
-        ).count(),
-        'action_breakdown': AuditLog.objects.values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
+        'total_logs': logs_page.count,
+        'today_logs': AuditLog.objects.filter(timestamp__gte=today_start).count(),
+        'week_logs': AuditLog.objects.filter(timestamp__gte=now - timedelta(days=7)).count(),
+        'action_breakdown': get_or_set(
+            make_key('listing-stats', 'audit-actions'),
+            auditarchive.action_counts,
+            settings.ADMIN_STATS_CACHE_TIMEOUT,
+        ),
     }
     
     context = {
         'logs': logs_page,
         'form': form,
         'stats': stats,
-        'total_logs': logs.count()
+        'total_logs': logs_page.count,
     }
     return render(request, 'management/audit_logs/list.html', context)
 
@@ -2039,9 +2120,11 @@ def audit_logs_list(request):
 @user_passes_test(is_admin)
 def audit_log_detail(request, pk):
     """View detailed audit log entry"""
-    log = get_object_or_404(AuditLog, pk=pk)
+    log = auditarchive.get(pk)
+    if log is None:
+        raise Http404('No audit log entry matches the given query.')
     
-    # Get related logs (same object)
+    # Get related logs (same object); recent ones only, archives are not scanned
     related_logs = []
     if log.model_name and log.object_id:
         related_logs = AuditLog.objects.filter(
@@ -2059,44 +2142,36 @@ def audit_log_detail(request, pk):
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
 def audit_logs_export(request):
-    """Export audit logs to CSV"""
-    logs = AuditLog.objects.select_related('user').order_by('-timestamp')
-    
-    # Apply same filters as list view
-    form = AuditLogFilterForm(request.GET)
-    if form.is_valid():
-        if form.cleaned_data.get('user'):
-            logs = logs.filter(user=form.cleaned_data['user'])
-        if form.cleaned_data.get('action'):
-            logs = logs.filter(action=form.cleaned_data['action'])
-        if form.cleaned_data.get('date_from'):
-            logs = logs.filter(timestamp__date__gte=form.cleaned_data['date_from'])
-        if form.cleaned_data.get('date_to'):
-            logs = logs.filter(timestamp__date__lte=form.cleaned_data['date_to'])
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
+    """Export audit logs to CSV, archived months included"""
+    query = _audit_query(AuditLogFilterForm(request.GET))
+    
+    class _Echo:
+        def write(self, value):
+            return value
+
+    writer = csv.writer(_Echo())
+
+    def rows():
+        yield writer.writerow(['Timestamp', 'User', 'Action', 'Model', 'Object ID', 'Description', 'IP Address'])
+        for log in query.iterate():
+            yield writer.writerow([
+                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                log.user.username if log.user else 'System',
+                log.action,
+                log.model_name or '',
+                log.object_id or '',
+                log.description,
+                log.ip_address or ''
+            ])
+    
+    response = StreamingHttpResponse(rows(), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="audit_logs.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Timestamp', 'User', 'Action', 'Model', 'Object ID', 'Description', 'IP Address'])
-    
-    for log in logs:
-        writer.writerow([
-            log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            log.user.username if log.user else 'System',
-            log.action,
-            log.model_name or '',
-            log.object_id or '',
-            log.description,
-            log.ip_address or ''
-        ])
-    
     return response
 
 
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
+@reporting_view
 def security_dashboard(request):
     """Security overview dashboard"""
     # Recent security events
@@ -2113,21 +2188,40 @@ def security_dashboard(request):
         last_login__gte=timezone.now() - timedelta(hours=24)
     ).count()
     
-    # Permission changes in last 30 days
-    recent_permission_changes = AuditLog.objects.filter(
-        action='permission_change',
-        timestamp__gte=timezone.now() - timedelta(days=30)
-    ).count()
+    # Security events per day over 30 days, incl. permission changes (one query)
+    today = timezone.localdate()
+    security_series = timeseries.time_series(
+        AuditLog.objects.filter(
+            action__in=['login', 'logout', 'password_reset', 'permission_change']
+        ),
+        'timestamp', today - timedelta(days=29), today,
+        events=Count('pk'),
+        permission_changes=Count('pk', filter=Q(action='permission_change')),
+    )
+    recent_permission_changes = sum(p['permission_changes'] for p in security_series)
     
     context = {
         'security_logs': security_logs,
         'failed_logins': failed_logins,
         'active_users': active_users,
-        'recent_permission_changes': recent_permission_changes
+        'recent_permission_changes': recent_permission_changes,
+        'security_chart_data': json.dumps({
+            'labels': [timeseries.bucket_label(p['bucket'], 'day') for p in security_series],
+            'events': [p['events'] for p in security_series],
+            'permission_changes': [p['permission_changes'] for p in security_series],
+        }),
     }
     return render(request, 'management/security/dashboard.html', context)
 
 # ==================== BROADCAST CENTER ====================
+# Audiences are stored as filter definitions (eduweb.audiences) and only
+# resolved to addresses for the preview count, the recipients modal and
+# the send itself.
+
+BROADCAST_SEND_BATCH = 50
+BROADCAST_SAMPLE_SIZE = 100
+
+
 @login_required
 @user_passes_test(
     lambda u: u.is_staff or u.is_superuser or u.profile.role == 'admin'
@@ -2136,16 +2230,18 @@ def broadcast_center(request):
     """List all broadcasts with status counts"""
     broadcasts = BroadcastMessage.objects.select_related('created_by').all()
     
-    # Calculate status counts
-    sent_count = broadcasts.filter(status='sent').count()
-    draft_count = broadcasts.filter(status='draft').count()
-    failed_count = broadcasts.filter(status='failed').count()
+    # Calculate status counts in one query
+    status_counts = dict(
+        BroadcastMessage.objects.order_by()
+        .values_list('status')
+        .annotate(total=Count('id'))
+    )
     
     context = {
         'broadcasts': broadcasts,
-        'sent_count': sent_count,
-        'draft_count': draft_count,
-        'failed_count': failed_count,
+        'sent_count': status_counts.get('sent', 0),
+        'draft_count': status_counts.get('draft', 0),
+        'failed_count': status_counts.get('failed', 0),
         'page_title': 'Broadcast Center',
     }
     return render(
@@ -2166,49 +2262,15 @@ def broadcast_create(request):
         if form.is_valid():
             broadcast = form.save(commit=False)
             broadcast.created_by = request.user
+            broadcast.filter_values = form.audience_definition()
             
-            # Collect filter values
-            filter_values = {}
-            filter_type = form.cleaned_data['filter_type']
-            
-            if filter_type == 'faculty':
-                filter_values['faculties'] = list(
-                    form.cleaned_data['faculties']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'course':
-                filter_values['courses'] = list(
-                    form.cleaned_data['courses']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'lms_course':
-                filter_values['lms_courses'] = list(
-                    form.cleaned_data['lms_courses']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'role':
-                filter_values['roles'] = form.cleaned_data['roles']
-            elif filter_type == 'application_status':
-                filter_values['application_statuses'] = (
-                    form.cleaned_data['application_statuses']
-                )
-            elif filter_type == 'enrollment_status':
-                filter_values['enrollment_statuses'] = (
-                    form.cleaned_data['enrollment_statuses']
-                )
-            
-            broadcast.filter_values = filter_values
-            
-            # Get recipient emails
-            emails = get_recipient_emails(filter_type, filter_values)
-            broadcast.recipient_emails = emails
-            broadcast.recipient_count = len(emails)
-            
+            # Snapshot of the audience size; addresses are resolved on send
+            broadcast.recipient_count = Audience.for_broadcast(broadcast).count()
             broadcast.save()
             
             messages.success(
                 request, 
-                f'Broadcast created! {len(emails)} recipients identified.'
+                f'Broadcast created! {broadcast.recipient_count} recipients identified.'
             )
             return redirect('management:broadcast_center')
     else:
@@ -2244,89 +2306,20 @@ def broadcast_edit(request, slug):
         form = BroadcastMessageForm(request.POST, instance=broadcast)
         if form.is_valid():
             broadcast = form.save(commit=False)
-            
-            # Update filter values
-            filter_values = {}
-            filter_type = form.cleaned_data['filter_type']
-            
-            if filter_type == 'faculty':
-                filter_values['faculties'] = list(
-                    form.cleaned_data['faculties']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'course':
-                filter_values['courses'] = list(
-                    form.cleaned_data['courses']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'lms_course':
-                filter_values['lms_courses'] = list(
-                    form.cleaned_data['lms_courses']
-                    .values_list('id', flat=True)
-                )
-            elif filter_type == 'role':
-                filter_values['roles'] = form.cleaned_data['roles']
-            elif filter_type == 'application_status':
-                filter_values['application_statuses'] = (
-                    form.cleaned_data['application_statuses']
-                )
-            elif filter_type == 'enrollment_status':
-                filter_values['enrollment_statuses'] = (
-                    form.cleaned_data['enrollment_statuses']
-                )
-            
-            broadcast.filter_values = filter_values
-            
-            # Recalculate recipient emails
-            emails = get_recipient_emails(filter_type, filter_values)
-            broadcast.recipient_emails = emails
-            broadcast.recipient_count = len(emails)
-            
+            broadcast.filter_values = form.audience_definition()
+            broadcast.recipient_count = Audience.for_broadcast(broadcast).count()
             broadcast.save()
             
             messages.success(
                 request, 
-                f'Broadcast updated! {len(emails)} recipients identified.'
+                f'Broadcast updated! {broadcast.recipient_count} recipients identified.'
             )
             return redirect('management:broadcast_center')
     else:
-        # Pre-populate form with existing data
-        initial_data = {
-            'subject': broadcast.subject,
-            'message': broadcast.message,
-            'filter_type': broadcast.filter_type,
-        }
-        
-        # Pre-populate filter selections
-        filter_type = broadcast.filter_type
-        filter_values = broadcast.filter_values
-        
-        if filter_type == 'faculty' and 'faculties' in filter_values:
-            initial_data['faculties'] = Faculty.objects.filter(
-                id__in=filter_values['faculties']
-            )
-        elif filter_type == 'course' and 'courses' in filter_values:
-            initial_data['courses'] = Course.objects.filter(
-                id__in=filter_values['courses']
-            )
-        elif filter_type == 'lms_course' and 'lms_courses' in filter_values:
-            initial_data['lms_courses'] = LMSCourse.objects.filter(
-                id__in=filter_values['lms_courses']
-            )
-        elif filter_type == 'role' and 'roles' in filter_values:
-            initial_data['roles'] = filter_values['roles']
-        elif (filter_type == 'application_status' and 
-              'application_statuses' in filter_values):
-            initial_data['application_statuses'] = (
-                filter_values['application_statuses']
-            )
-        elif (filter_type == 'enrollment_status' and 
-              'enrollment_statuses' in filter_values):
-            initial_data['enrollment_statuses'] = (
-                filter_values['enrollment_statuses']
-            )
-        
-        form = BroadcastMessageForm(instance=broadcast, initial=initial_data)
+        form = BroadcastMessageForm(
+            instance=broadcast,
+            initial=BroadcastMessageForm.initial_for(broadcast),
+        )
     
     context = {
         'form': form,
@@ -2340,6 +2333,75 @@ def broadcast_edit(request, slug):
         context
     )
 
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.profile.role == 'admin')
+def broadcast_preview_count(request):
+    """Audience size for the compose form (AJAX, same fields as the form)"""
+    form = BroadcastMessageForm(request.GET)
+    # Subject and message are not needed for a count
+    form.fields['subject'].required = False
+    form.fields['message'].required = False
+    if not form.is_valid():
+        return JsonResponse({'count': None, 'error': ' '.join(form.non_field_errors())})
+    count = Audience.from_definition(
+        form.cleaned_data['filter_type'], form.audience_definition()
+    ).count()
+    return JsonResponse({'count': count})
+
+def _recipients_csv(broadcast, emails):
+    """Streamed CSV download of a broadcast's recipient addresses"""
+    class _Echo:
+        def write(self, value):
+            return value
+
+    writer = csv.writer(_Echo())
+
+    def rows():
+        yield writer.writerow(['email'])
+        for email in emails:
+            yield writer.writerow([email])
+
+    response = StreamingHttpResponse(rows(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="broadcast_{broadcast.slug}_recipients.csv"'
+    return response
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.profile.role == 'admin')
+def broadcast_recipients(request, slug):
+    """
+    Audience of a broadcast: count and a sample as JSON, or all as CSV.
+    Drafts resolve their filters; sent and failed broadcasts answer with
+    the addresses they were sent to, or 404 when that list was not kept.
+    """
+    broadcast = get_object_or_404(
+        BroadcastMessage.objects.only('slug', 'status', 'filter_type', 'filter_values'), slug=slug
+    )
+    as_csv = request.GET.get('format') == 'csv'
+    
+    if broadcast.status == 'draft':
+        audience = Audience.for_broadcast(broadcast)
+        if as_csv:
+            return _recipients_csv(broadcast, audience.iter_emails())
+        return JsonResponse({
+            'count': audience.count(),
+            'sample': audience.sample(BROADCAST_SAMPLE_SIZE),
+        })
+    
+    # Today's filters would pick other people than the broadcast reached
+    recorded = BroadcastRecipientList.objects.filter(broadcast=broadcast).first()
+    if recorded is None:
+        return JsonResponse({
+            'count': None,
+            'sample': [],
+            'error': 'The recipient list of this broadcast was not kept.',
+        }, status=404)
+    if as_csv:
+        return _recipients_csv(broadcast, recorded.emails)
+    return JsonResponse({
+        'count': len(recorded.emails),
+        'sample': recorded.emails[:BROADCAST_SAMPLE_SIZE],
+    })
+
 @login_required
 @user_passes_test(lambda u: u.is_staff or u.is_superuser or u.profile.role == 'admin')
 def broadcast_send(request, slug):
@@ -2354,13 +2416,10 @@ def broadcast_send(request, slug):
         
         def send_emails_background():
             """Background thread to send emails"""
+            sent = []
             try:
-                # Send emails in smaller batches for better performance
-                batch_size = 50
-                email_list = broadcast.recipient_emails
-                
-                for i in range(0, len(email_list), batch_size):
-                    batch = email_list[i:i + batch_size]
+                # Addresses are streamed from the database batch by batch
+                for batch in Audience.for_broadcast(broadcast).batches(BROADCAST_SEND_BATCH):
                     email_messages = [
                         (
                             broadcast.subject,
@@ -2371,16 +2430,26 @@ def broadcast_send(request, slug):
                         for email in batch
                     ]
                     send_mass_mail(email_messages, fail_silently=False)
+                    sent.extend(batch)
                 
                 # Update status after all sent
                 broadcast.status = 'sent'
                 broadcast.sent_at = timezone.now()
-                broadcast.save()
+                broadcast.recipient_count = len(sent)
+                broadcast.save(update_fields=['status', 'sent_at', 'recipient_count', 'updated_at'])
                 
             except Exception as e:
                 broadcast.status = 'failed'
-                broadcast.error_message = str(e)
-                broadcast.save()
+                broadcast.error_message = f'{e} (after {len(sent)} recipients)'
+                broadcast.save(update_fields=['status', 'error_message', 'updated_at'])
+            finally:
+                try:
+                    # Who got it, for the recipients view once the filters
+                    # match other people
+                    if sent:
+                        BroadcastRecipientList.record(broadcast, sent)
+                finally:
+                    connection.close()
         
         # Start background thread
         thread = threading.Thread(target=send_emails_background)
@@ -2408,75 +2477,6 @@ def broadcast_delete(request, slug):
     return redirect('management:broadcast_center')
 
 
-# ==================== HELPER FUNCTIONS ====================
-def get_recipient_emails(filter_type, filter_values):
-    """Get recipient emails based on filter"""
-    emails = set()
-    
-    if filter_type == 'all_users':
-        # All active users
-        emails = set(
-            User.objects.filter(is_active=True)
-            .values_list('email', flat=True)
-        )
-    
-    elif filter_type == 'faculty':
-        # Users who applied to courses in selected faculties
-        faculty_ids = filter_values.get('faculties', [])
-        emails = set(
-            CourseApplication.objects.filter(
-                program__department__faculty_id__in=faculty_ids
-            ).values_list('email', flat=True)
-        )
-    
-    elif filter_type == 'course':
-        # Users who applied to selected programs
-        program_ids = filter_values.get('courses', [])
-        emails = set(
-            CourseApplication.objects.filter(
-                program_id__in=program_ids
-            ).values_list('email', flat=True)
-        )
-    
-    elif filter_type == 'lms_course':
-        # Users enrolled in selected LMS courses
-        lms_course_ids = filter_values.get('lms_courses', [])
-        user_emails = User.objects.filter(
-            enrollments__course_id__in=lms_course_ids
-        ).values_list('email', flat=True)
-        emails = set(user_emails)
-    
-    elif filter_type == 'role':
-        # Users with selected roles
-        roles = filter_values.get('roles', [])
-        user_emails = User.objects.filter(
-            profile__role__in=roles
-        ).values_list('email', flat=True)
-        emails = set(user_emails)
-    
-    elif filter_type == 'application_status':
-        # Users with specific application statuses
-        statuses = filter_values.get('application_statuses', [])
-        emails = set(
-            CourseApplication.objects.filter(
-                status__in=statuses
-            ).values_list('email', flat=True)
-        )
-    
-    elif filter_type == 'enrollment_status':
-        # Users with specific enrollment statuses
-        statuses = filter_values.get('enrollment_statuses', [])
-        user_emails = User.objects.filter(
-            enrollments__status__in=statuses
-        ).values_list('email', flat=True)
-        emails = set(user_emails)
-    
-    # Remove empty emails
-    emails = {e for e in emails if e}
-    
-    return list(emails)
-
-
 @login_required(login_url='eduweb:auth_page')
 @user_passes_test(is_admin)
 def approve_department(request, pk):
@@ -3374,6 +3374,35 @@ def enrollment_create(request):
     })
 
 
+@login_required
+@user_passes_test(is_admin)
+def enrollment_import(request):
+    """Bulk-enroll students into an LMS course from a CSV or applicant filter"""
+    courses = LMSCourse.objects.order_by('title')
+    context = {}
+    
+    if request.method == 'POST':
+        form = BulkEnrollmentForm(request.POST, request.FILES, courses=courses)
+        if form.is_valid():
+            report = enrollments.bulk_enroll(
+                form.cleaned_data['course'], form.rows(),
+                enrolled_by=request.user,
+                notify=form.cleaned_data['notify'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            messages.success(request, report.summary())
+            context.update(report.as_context())
+    else:
+        form = BulkEnrollmentForm(courses=courses, initial={'course': request.GET.get('course')})
+    
+    return render(request, 'management/enrollment_import.html', {
+        **context,
+        'form': form,
+        'back_url': reverse('management:enrollments_list'),
+        'back_label': 'Enrollments',
+    })
+
+
 @login_required
 @user_passes_test(is_admin)
 def enrollment_edit(request, pk):
@@ -3471,6 +3500,9 @@ def certificate_create(request):
         form = CertificateForm(request.POST, request.FILES)
         if form.is_valid():
             certificate = form.save()
+            if not certificate.certificate_file:
+                # No uploaded file: render one from the certificate template
+                certificates.issue(Certificate.objects.filter(pk=certificate.pk), workers=1)
             messages.success(request, 'Certificate issued successfully.')
             _notify(
                 user=certificate.student,
@@ -4112,8 +4144,8 @@ def site_config_general(request):
         form = SiteConfigGeneralForm(request.POST, request.FILES, instance=site)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='SiteConfig',
                 description='Updated general site configuration'
             )
@@ -4133,8 +4165,8 @@ def site_config_index(request):
         form = SiteConfigIndexForm(request.POST, request.FILES, instance=site)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='SiteConfig',
                 description='Updated index page configuration'
             )
@@ -4154,8 +4186,8 @@ def site_config_about(request):
         form = SiteConfigAboutForm(request.POST, request.FILES, instance=site)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='SiteConfig',
                 description='Updated about page configuration'
             )
@@ -4186,8 +4218,8 @@ def site_milestone_create(request):
             milestone = form.save(commit=False)
             milestone.site = SiteConfig.objects.first()
             milestone.save()
-            AuditLog.objects.create(
-                user=request.user, action='create',
+            audit.record(
+                action='create',
                 model_name='SiteHistoryMilestone',
                 description=f'Created milestone: {milestone}'
             )
@@ -4208,8 +4240,8 @@ def site_milestone_edit(request, pk):
         form = SiteHistoryMilestoneForm(request.POST, instance=milestone)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='SiteHistoryMilestone',
                 description=f'Updated milestone: {milestone}'
             )
@@ -4251,8 +4283,8 @@ def testimonial_create(request):
         form = TestimonialForm(request.POST, request.FILES)
         if form.is_valid():
             t = form.save()
-            AuditLog.objects.create(
-                user=request.user, action='create',
+            audit.record(
+                action='create',
                 model_name='Testimonial',
                 description=f'Created testimonial: {t}'
             )
@@ -4273,8 +4305,8 @@ def testimonial_edit(request, pk):
         form = TestimonialForm(request.POST, request.FILES, instance=testimonial)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='Testimonial',
                 description=f'Updated testimonial: {testimonial}'
             )
@@ -4319,8 +4351,8 @@ def institution_member_create(request):
         form = InstitutionMemberForm(request.POST, request.FILES)
         if form.is_valid():
             m = form.save()
-            AuditLog.objects.create(
-                user=request.user, action='create',
+            audit.record(
+                action='create',
                 model_name='InstitutionMember',
                 description=f'Created member: {m}'
             )
@@ -4341,8 +4373,8 @@ def institution_member_edit(request, pk):
         form = InstitutionMemberForm(request.POST, request.FILES, instance=member)
         if form.is_valid():
             form.save()
-            AuditLog.objects.create(
-                user=request.user, action='update',
+            audit.record(
+                action='update',
                 model_name='InstitutionMember',
                 description=f'Updated member: {member}'
             )
@@ -4429,7 +4461,7 @@ def library_items_list(request):
 def library_item_create(request):
     """Create a new LibraryItem. Records created_by from request.user."""
     if request.method == 'POST':
-        form = LibraryItemForm(request.POST, request.FILES)
+        form = LibraryItemForm(request.POST, uploads.request_files(request, {'file': 'library_file'}))
         if form.is_valid():
             item = form.save(commit=False)
             item.created_by = request.user
@@ -4459,7 +4491,9 @@ def library_item_edit(request, pk):
     item = get_object_or_404(LibraryItem, pk=pk)
  
     if request.method == 'POST':
-        form = LibraryItemForm(request.POST, request.FILES, instance=item)
+        form = LibraryItemForm(
+            request.POST, uploads.request_files(request, {'file': 'library_file'}), instance=item,
+        )
         if form.is_valid():
             form.save()
             messages.success(request, f'"{item.title}" updated successfully.')
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from eduweb.models import Faculty, Department, Program, BlogPost
+from eduweb.pagecache import public_page
 
 
 # ──────────────────────────────────────────────
@@ -13,6 +14,7 @@ MELBAC_FACULTY_SLUGS = [
 # ──────────────────────────────────────────────
 
 
+@public_page('blog')
 def index(request):
     """MELBAC public homepage."""
     faculties = (
@@ -34,11 +36,13 @@ def index(request):
     return render(request, 'melbac/index.html', context)
 
 
+@public_page()
 def about(request):
     """MELBAC About page."""
     return render(request, 'melbac/about.html', {})
 
 
+@public_page()
 def academics(request):
     """Academics overview — faculties, departments, programs, calendar."""
     faculties = (
@@ -50,6 +54,7 @@ def academics(request):
     return render(request, 'melbac/academics.html', {'faculties': faculties})
 
 
+@public_page()
 def admissions(request):
     """
     Admissions page — all degree levels, requirements, programs.
@@ -58,11 +63,13 @@ def admissions(request):
     return render(request, 'melbac/admissions.html', {})
 
 
+@public_page()
 def activities(request):
     """Student Activities page."""
     return render(request, 'melbac/activities.html', {})
 
 
+@public_page()
 def contact(request):
     """Contact page — renders form and handles POST submission."""
     from eduweb.models import ContactMessage
@@ -89,6 +96,7 @@ def contact(request):
     return render(request, 'melbac/contact.html', {})
 
 
+@public_page('blog')
 def blog_list(request):
     """MELBAC blog listing."""
     posts = (
@@ -100,6 +108,7 @@ def blog_list(request):
     return render(request, 'melbac/blog.html', {'posts': posts})
 
 
+@public_page('blog')
 def blog_detail(request, slug):
     """
     Blog post detail page.
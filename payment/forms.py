@@ -1,5 +1,5 @@
 from django import forms
-from eduweb.models import ApplicationPayment
+from eduweb.autocomplete import AutocompleteField, AutocompleteWidget
 
 
 # ==================== PAYMENT FORMS ====================
@@ -138,19 +138,51 @@ class RefundForm(forms.Form):
 class InvoiceGenerateForm(forms.Form):
     """Form to select a successful payment for invoice generation"""
 
-    payment = forms.ModelChoiceField(
-        queryset=ApplicationPayment.objects.filter(
-            status='success'
-        ).select_related(
-            'application__user',
-            'application__course'
+    payment = AutocompleteField(
+        'paid_application_payments',
+        widget=AutocompleteWidget(
+            'paid_application_payments',
+            placeholder='Type reference or name…',
+            attrs={
+                'class': (
+                    'w-full px-4 py-2.5 border border-gray-300 '
+                    'rounded-lg focus:ring-2 focus:ring-primary-500 '
+                    'focus:border-primary-500 bg-white'
+                )
+            },
         ),
-        widget=forms.Select(attrs={
-            'class': (
-                'w-full px-4 py-2.5 border border-gray-300 '
-                'rounded-lg focus:ring-2 focus:ring-primary-500 '
-                'focus:border-primary-500 bg-white'
-            )
-        }),
-        empty_label="Select a payment..."
-    )
\ No newline at end of file
+    )
+
+
+class InvoiceArchiveForm(forms.Form):
+    """Date range for downloading all invoices as one ZIP"""
+
+    MAX_DAYS = 366
+
+    _cls = (
+        'w-full px-3 py-2.5 border border-gray-300 rounded-lg '
+        'focus:ring-2 focus:ring-indigo-500 focus:border-indigo-500 '
+        'focus:outline-none bg-white text-sm'
+    )
+
+    date_from = forms.DateField(
+        label='Paid from',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': _cls}),
+    )
+    date_to = forms.DateField(
+        label='Paid to',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': _cls}),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        date_from = cleaned.get('date_from')
+        date_to = cleaned.get('date_to')
+        if date_from and date_to:
+            if date_to < date_from:
+                raise forms.ValidationError('The end date is before the start date.')
+            if (date_to - date_from).days >= self.MAX_DAYS:
+                raise forms.ValidationError(
+                    f'Choose a range of at most {self.MAX_DAYS} days.'
+                )
+        return cleaned
@@ -39,6 +39,11 @@ urlpatterns = [
         views.invoice_generation,
         name='invoice_generation',
     ),
+    path(
+        'invoices/archive/',
+        views.invoice_archive,
+        name='invoice_archive',
+    ),
     path(
         'invoices/<str:payment_reference>/pdf/',
         views.generate_invoice_pdf,
@@ -2,18 +2,20 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Sum, Q
-from django.http import HttpResponse
-from django.template.loader import render_to_string
 from django.utils import timezone
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from django.core.paginator import Paginator
 
+from eduweb import invoices, media
+from eduweb.dbrouting import reporting_view
 from eduweb.models import ApplicationPayment
 
 from .forms import (
     PaymentFilterForm,
     RefundForm,
     InvoiceGenerateForm,
+    InvoiceArchiveForm,
 )
 
 
@@ -191,6 +193,7 @@ def refund_payment(request, payment_reference):
 
 @login_required
 @user_passes_test(is_finance_manager)
+@reporting_view
 def transaction_reports(request):
     """All-payments report. Filtering handled client-side via DataTables."""
 
@@ -245,6 +248,7 @@ def invoice_generation(request):
 
     context = {
         'invoice_form': invoice_form,
+        'archive_form': InvoiceArchiveForm(),
         'recent_payments': recent_payments,
     }
 
@@ -258,16 +262,7 @@ def invoice_generation(request):
 @login_required
 @user_passes_test(is_finance_manager)
 def generate_invoice_pdf(request, payment_reference):
-    """Generate and stream a PDF invoice for a successful payment"""
-
-    try:
-        from xhtml2pdf import pisa
-    except ImportError:
-        messages.error(
-            request,
-            'PDF library not installed. Run: pip install xhtml2pdf'
-        )
-        return redirect('payments:invoice_generation')
+    """Serve the PDF invoice for a successful payment, rendering it once"""
 
     payment = get_object_or_404(
         ApplicationPayment.objects.select_related(
@@ -278,32 +273,47 @@ def generate_invoice_pdf(request, payment_reference):
         status='success',
     )
 
-    invoice_context = {
-        'payment': payment,
-        'invoice_number': f'INV-{payment.payment_reference}',
-        'invoice_date': timezone.now(),
-        'company_name': 'MIU Education',
-        'company_address': '123 Education Street',
-        'company_city': 'Learning City, LC 12345',
-        'company_email': 'billing@miuedu.com',
-        'company_phone': '+1 (555) 123-4567',
-    }
-
-    html = render_to_string('finance/invoice.html', invoice_context)
+    try:
+        name = invoices.get_or_render(payment)
+    except invoices.InvoiceError as exc:
+        messages.error(request, str(exc))
+        return redirect('payments:invoice_generation')
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        f'attachment; '
-        f'filename="invoice_{payment.payment_reference}.pdf"'
+    return media.serve_stored(
+        request, name,
+        filename=invoices.download_name(payment),
+        as_attachment=True,
     )
 
-    result = pisa.CreatePDF(html, dest=response)
 
-    if result.err:
-        messages.error(request, 'Error generating PDF invoice.')
+@login_required
+@user_passes_test(is_finance_manager)
+def invoice_archive(request):
+    """Stream every invoice paid within a date range as one ZIP"""
+
+    form = InvoiceArchiveForm(request.GET or None)
+    if not form.is_valid():
+        for error in form.errors.get('__all__', []) or ['Choose a valid date range.']:
+            messages.error(request, error)
         return redirect('payments:invoice_generation')
 
-    return response
+    date_from = form.cleaned_data['date_from']
+    date_to = form.cleaned_data['date_to']
+    tz = timezone.get_current_timezone()
+    start = datetime.combine(date_from, time.min, tzinfo=tz)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+
+    payments = (
+        ApplicationPayment.objects
+        .select_related('application__user', 'application__program')
+        .filter(status='success', paid_at__gte=start, paid_at__lt=end)
+        .order_by('paid_at', 'pk')
+    )
+
+    return invoices.zip_response(
+        payments.iterator(chunk_size=200),
+        f'invoices_{date_from:%Y%m%d}-{date_to:%Y%m%d}.zip',
+    )
 
 # ==================== REFUND ====================
 
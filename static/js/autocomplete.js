@@ -0,0 +1,141 @@
+// Search-as-you-type choice fields (server side: eduweb/autocomplete.py)
+//
+// AutocompleteWidget renders a hidden input holding the value and a text
+// box marked with data-autocomplete-url. Typing asks the endpoint for
+// matches; picking one fills the hidden input. Editing the text again
+// clears the value, so a half-typed name is never submitted as a choice.
+//
+// The widget includes this script once per field, so it guards against
+// running twice.
+(function () {
+    'use strict';
+
+    if (window.EduAutocomplete) return;
+
+    const DEBOUNCE_MS = 200;
+
+    function attach(input) {
+        if (input.dataset.autocompleteReady) return;
+        input.dataset.autocompleteReady = '1';
+
+        const hidden = document.getElementById(input.id.replace(/_search$/, ''));
+        const url = input.dataset.autocompleteUrl;
+        const minChars = parseInt(input.dataset.autocompleteMin || '2', 10);
+        const cache = new Map();
+        let timer = null;
+        let latest = 0;
+        let active = -1;
+        let results = [];
+
+        const list = document.createElement('ul');
+        list.setAttribute('role', 'listbox');
+        list.className = 'absolute z-50 mt-1 w-full max-h-64 overflow-y-auto bg-white border border-gray-200 rounded-lg shadow-lg hidden';
+        input.parentNode.appendChild(list);
+
+        function close() {
+            list.classList.add('hidden');
+            input.setAttribute('aria-expanded', 'false');
+            active = -1;
+        }
+
+        function choose(item) {
+            hidden.value = item.id;
+            input.value = item.text;
+            close();
+            hidden.dispatchEvent(new Event('change', { bubbles: true }));
+        }
+
+        function highlight(index) {
+            Array.from(list.children).forEach((li, i) => {
+                li.classList.toggle('bg-primary-50', i === index);
+            });
+            active = index;
+        }
+
+        function show(items) {
+            results = items;
+            list.innerHTML = '';
+            if (items.length === 0) {
+                const empty = document.createElement('li');
+                empty.className = 'px-4 py-2 text-sm text-gray-500';
+                empty.textContent = 'No matches';
+                list.appendChild(empty);
+            }
+            items.forEach((item, index) => {
+                const li = document.createElement('li');
+                li.setAttribute('role', 'option');
+                li.className = 'px-4 py-2 text-sm text-gray-800 cursor-pointer hover:bg-gray-50';
+                li.textContent = item.text;
+                // mousedown fires before the input's blur
+                li.addEventListener('mousedown', (event) => {
+                    event.preventDefault();
+                    choose(item);
+                });
+                li.addEventListener('mouseenter', () => highlight(index));
+                list.appendChild(li);
+            });
+            list.classList.remove('hidden');
+            input.setAttribute('aria-expanded', 'true');
+            active = -1;
+        }
+
+        function lookup(term) {
+            if (cache.has(term)) {
+                show(cache.get(term));
+                return;
+            }
+            const request = ++latest;
+            fetch(url + '?q=' + encodeURIComponent(term), {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                credentials: 'same-origin',
+            })
+                .then((response) => (response.ok ? response.json() : { results: [] }))
+                .then((data) => {
+                    cache.set(term, data.results);
+                    if (request === latest) show(data.results);
+                })
+                .catch(close);
+        }
+
+        input.addEventListener('input', () => {
+            hidden.value = '';
+            clearTimeout(timer);
+            const term = input.value.trim();
+            if (term.length < minChars) {
+                close();
+                return;
+            }
+            timer = setTimeout(() => lookup(term.toLowerCase()), DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', (event) => {
+            if (list.classList.contains('hidden') || results.length === 0) return;
+            if (event.key === 'ArrowDown') {
+                event.preventDefault();
+                highlight(Math.min(active + 1, results.length - 1));
+            } else if (event.key === 'ArrowUp') {
+                event.preventDefault();
+                highlight(Math.max(active - 1, 0));
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                choose(results[active]);
+            } else if (event.key === 'Escape') {
+                close();
+            }
+        });
+
+        input.addEventListener('blur', close);
+    }
+
+    function init(root) {
+        (root || document).querySelectorAll('input[data-autocomplete-url]').forEach(attach);
+    }
+
+    window.EduAutocomplete = { init: init };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', () => init());
+    } else {
+        init();
+    }
+})();
@@ -0,0 +1,248 @@
+// Resumable chunked uploads (server side: eduweb/uploads.py)
+//
+// Any file input marked with data-chunked-upload="<target>" is uploaded in
+// chunks as soon as a file is picked. The input is then cleared and a hidden
+// "<name>_upload" field carries the server token, so the form itself only
+// posts a few bytes:
+//
+//   <input type="file" name="video_file" data-chunked-upload="lesson_video">
+//
+// Programmatic use:
+//
+//   const token = await new ChunkedUploader('/uploads/').upload(file, 'lesson_video', {
+//       onProgress: (sent, total) => { ... },
+//   });
+(function () {
+    'use strict';
+
+    const MAX_RETRIES = 5;
+
+    // ── CRC32 (running, matches zlib.crc32 on the server) ──────────────────
+    const CRC_TABLE = (() => {
+        const table = new Uint32Array(256);
+        for (let n = 0; n < 256; n++) {
+            let c = n;
+            for (let k = 0; k < 8; k++) {
+                c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+            }
+            table[n] = c >>> 0;
+        }
+        return table;
+    })();
+
+    function crc32(bytes, previous) {
+        let crc = (previous ^ 0xFFFFFFFF) >>> 0;
+        for (let i = 0; i < bytes.length; i++) {
+            crc = CRC_TABLE[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+        }
+        return (crc ^ 0xFFFFFFFF) >>> 0;
+    }
+
+    function hex32(value) {
+        return value.toString(16).padStart(8, '0');
+    }
+
+    async function sha256(buffer) {
+        if (!(window.crypto && crypto.subtle)) {
+            return null;  // insecure context: the running CRC32 still protects the file
+        }
+        const digest = await crypto.subtle.digest('SHA-256', buffer);
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    function csrfToken() {
+        const field = document.querySelector('[name=csrfmiddlewaretoken]');
+        if (field) {
+            return field.value;
+        }
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    class UploadFailed extends Error {}
+
+    class ChunkedUploader {
+        constructor(baseUrl) {
+            this.baseUrl = (baseUrl || '/uploads/').replace(/\/?$/, '/');
+        }
+
+        async request(method, url, body, headers) {
+            const response = await fetch(url, {
+                method,
+                body,
+                credentials: 'same-origin',
+                headers: Object.assign({'X-CSRFToken': csrfToken(), 'X-Requested-With': 'XMLHttpRequest'}, headers || {}),
+            });
+            let data = {};
+            try {
+                data = await response.json();
+            } catch (e) {
+                data = {error: response.statusText};
+            }
+            return {status: response.status, ok: response.ok, data};
+        }
+
+        resumeKey(file, target) {
+            return `chunked-upload:${target}:${file.name}:${file.size}:${file.lastModified}`;
+        }
+
+        async start(file, target) {
+            const key = this.resumeKey(file, target);
+            const previous = localStorage.getItem(key);
+            if (previous) {
+                const status = await this.request('GET', `${this.baseUrl}${previous}/`);
+                if (status.ok && !status.data.complete) {
+                    // Only trust the stored prefix if it matches this file
+                    const prefix = new Uint8Array(await file.slice(0, status.data.offset).arrayBuffer());
+                    if (hex32(crc32(prefix, 0)) === status.data.crc32) {
+                        return status.data;
+                    }
+                }
+                localStorage.removeItem(key);
+            }
+            const created = await this.request('POST', this.baseUrl, JSON.stringify({
+                target, filename: file.name, size: file.size,
+            }), {'Content-Type': 'application/json'});
+            if (!created.ok) {
+                throw new UploadFailed(created.data.error || 'Upload could not be started.');
+            }
+            localStorage.setItem(key, created.data.upload_id);
+            return created.data;
+        }
+
+        async upload(file, target, options) {
+            const onProgress = (options && options.onProgress) || (() => {});
+            let state = await this.start(file, target);
+            const uploadUrl = `${this.baseUrl}${state.upload_id}/`;
+            let offset = state.offset;
+            let crc = parseInt(state.crc32, 16) >>> 0;
+            let retries = 0;
+            onProgress(offset, file.size);
+
+            while (offset < file.size) {
+                const end = Math.min(offset + state.chunk_size, file.size);
+                const buffer = await file.slice(offset, end).arrayBuffer();
+                const headers = {
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+                };
+                const digest = await sha256(buffer);
+                if (digest) {
+                    headers['X-Chunk-SHA256'] = digest;
+                }
+
+                let result;
+                try {
+                    result = await this.request('PUT', uploadUrl, buffer, headers);
+                } catch (e) {
+                    result = {status: 0, ok: false, data: {}};  // network error
+                }
+
+                if (result.ok) {
+                    crc = crc32(new Uint8Array(buffer), crc);
+                    if (hex32(crc) !== result.data.crc32) {
+                        throw new UploadFailed('Checksum mismatch while uploading.');
+                    }
+                    offset = result.data.offset;
+                    retries = 0;
+                    onProgress(offset, file.size);
+                    continue;
+                }
+                if (result.status >= 400 && result.status < 500 && ![409, 422].includes(result.status)) {
+                    throw new UploadFailed(result.data.error || 'Upload rejected.');
+                }
+                if (++retries > MAX_RETRIES) {
+                    throw new UploadFailed('Upload failed after several retries; pick the file again to resume.');
+                }
+                await sleep(Math.min(30000, 500 * 2 ** retries));
+                // Resync with the server before retrying
+                const status = await this.request('GET', uploadUrl);
+                if (status.ok) {
+                    if (status.data.offset !== offset) {
+                        const prefix = new Uint8Array(await file.slice(0, status.data.offset).arrayBuffer());
+                        crc = crc32(prefix, 0);
+                    }
+                    offset = status.data.offset;
+                }
+            }
+
+            const done = await this.request('POST', `${uploadUrl}complete/`, JSON.stringify({crc32: hex32(crc)}),
+                                            {'Content-Type': 'application/json'});
+            localStorage.removeItem(this.resumeKey(file, target));
+            if (!done.ok) {
+                throw new UploadFailed(done.data.error || 'Upload could not be completed.');
+            }
+            return done.data.token;
+        }
+    }
+
+    // ── Form hook ──────────────────────────────────────────────────────────
+    function bind(input) {
+        if (input.dataset.chunkedBound) {
+            return;
+        }
+        input.dataset.chunkedBound = '1';
+        const form = input.form;
+        const target = input.dataset.chunkedUpload;
+        const uploader = new ChunkedUploader(input.dataset.uploadUrl);
+
+        const hidden = document.createElement('input');
+        hidden.type = 'hidden';
+        hidden.name = `${input.name}_upload`;
+        input.insertAdjacentElement('afterend', hidden);
+
+        const status = document.createElement('div');
+        status.className = 'mt-2 text-xs text-gray-600 hidden';
+        status.innerHTML = '<div class="w-full bg-gray-200 rounded-full h-2 mb-1"><div class="bg-primary-600 h-2 rounded-full" style="width:0%"></div></div><span></span>';
+        hidden.insertAdjacentElement('afterend', status);
+        const bar = status.querySelector('div > div');
+        const label = status.querySelector('span');
+
+        function setSubmitting(disabled) {
+            if (!form) {
+                return;
+            }
+            form.querySelectorAll('[type=submit]').forEach(button => { button.disabled = disabled; });
+        }
+
+        input.addEventListener('change', async () => {
+            const file = input.files && input.files[0];
+            hidden.value = '';
+            if (!file) {
+                return;
+            }
+            status.classList.remove('hidden');
+            setSubmitting(true);
+            try {
+                hidden.value = await uploader.upload(file, target, {
+                    onProgress(sent, total) {
+                        const percent = total ? Math.floor(sent * 100 / total) : 100;
+                        bar.style.width = `${percent}%`;
+                        label.textContent = `Uploading ${file.name}: ${percent}%`;
+                    },
+                });
+                label.textContent = `${file.name} uploaded.`;
+                // The file is on the server; do not send it again with the form
+                input.required = false;
+                input.value = '';
+            } catch (error) {
+                label.textContent = error.message;
+                label.classList.add('text-red-600');
+            } finally {
+                setSubmitting(false);
+            }
+        });
+    }
+
+    function bindAll(root) {
+        (root || document).querySelectorAll('input[type=file][data-chunked-upload]').forEach(bind);
+    }
+
+    window.ChunkedUploader = ChunkedUploader;
+    window.bindChunkedUploads = bindAll;
+    document.addEventListener('DOMContentLoaded', () => bindAll());
+})();
@@ -0,0 +1,99 @@
+// Live feeds (server side: eduweb/events.py)
+//
+// A container marked data-live-feed="<events url>" and
+// data-live-since="<last rendered id>" receives new items as they are
+// posted. Each item arrives as pre-rendered HTML carrying data-live-id, so
+// an item is never inserted twice. A child marked data-live-empty (the
+// "no messages yet" placeholder) is removed when the first item arrives.
+//
+// The feed uses EventSource, which reconnects on its own and resumes from
+// the last event id. When the browser has no EventSource, or the server
+// refuses the stream (204 when streaming is off, as under Passenger; 503
+// over the connection limit), the script polls the same URL with
+// ?format=json instead.
+(function () {
+    'use strict';
+
+    if (window.EduLiveFeed) return;
+
+    const MIN_POLL_MS = 3000;
+    const MAX_POLL_MS = 30000;
+
+    function attach(container) {
+        if (container.dataset.liveReady) return;
+        container.dataset.liveReady = '1';
+
+        const url = container.dataset.liveFeed;
+        const stickToBottom = container.dataset.liveScroll === 'bottom';
+        let since = parseInt(container.dataset.liveSince || '0', 10);
+        let pollMs = MIN_POLL_MS;
+        let timer = null;
+
+        function insert(item) {
+            since = Math.max(since, item.id);
+            if (container.querySelector('[data-live-id="' + item.id + '"]')) return;
+            const atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 40;
+            const empty = container.querySelector('[data-live-empty]');
+            if (empty) empty.remove();
+            container.insertAdjacentHTML('beforeend', item.html);
+            if (stickToBottom && atBottom) container.scrollTop = container.scrollHeight;
+        }
+
+        function poll() {
+            const separator = url.indexOf('?') === -1 ? '?' : '&';
+            fetch(url + separator + 'format=json&since=' + since, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                credentials: 'same-origin',
+            })
+                .then((response) => (response.ok ? response.json() : Promise.reject(response)))
+                .then((data) => {
+                    data.items.forEach(insert);
+                    // Back off while the feed is quiet
+                    pollMs = data.items.length ? Math.max(data.retry || MIN_POLL_MS, MIN_POLL_MS)
+                                               : Math.min(pollMs * 2, MAX_POLL_MS);
+                })
+                .catch(() => {
+                    pollMs = MAX_POLL_MS;
+                })
+                .finally(() => {
+                    if (!document.hidden) timer = setTimeout(poll, pollMs);
+                });
+        }
+
+        function startPolling() {
+            clearTimeout(timer);
+            timer = setTimeout(poll, pollMs);
+            document.addEventListener('visibilitychange', () => {
+                clearTimeout(timer);
+                if (!document.hidden) poll();
+            });
+        }
+
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+
+        const separator = url.indexOf('?') === -1 ? '?' : '&';
+        const source = new EventSource(url + separator + 'since=' + since);
+        source.addEventListener('item', (event) => insert(JSON.parse(event.data)));
+        source.addEventListener('error', () => {
+            // CLOSED means the server refused the stream rather than the
+            // connection dropping; a dropped one reconnects by itself
+            if (source.readyState === EventSource.CLOSED) startPolling();
+        });
+        window.addEventListener('pagehide', () => source.close());
+    }
+
+    function init(root) {
+        (root || document).querySelectorAll('[data-live-feed]').forEach(attach);
+    }
+
+    window.EduLiveFeed = { init: init };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', () => init());
+    } else {
+        init();
+    }
+})();
@@ -1,6 +1,6 @@
 from django import forms
-from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from eduweb.autocomplete import AutocompleteField, AutocompleteWidget
 from eduweb.models import (
     AssignmentSubmission,
     UserProfile,
@@ -230,11 +230,11 @@ class ProfileUpdateForm(forms.ModelForm):
 class MessageComposeForm(forms.ModelForm):
     """Form for composing messages"""
     
-    recipient = forms.ModelChoiceField(
-        queryset=User.objects.filter(
-            profile__role__in=['instructor', 'admin']
-        ).select_related('profile').order_by('profile__role', 'first_name'),
-        widget=forms.HiddenInput(),
+    recipient = AutocompleteField(
+        'staff_contacts',
+        widget=AutocompleteWidget(
+            'staff_contacts', placeholder='Search by name...'
+        ),
     )
     
     class Meta:
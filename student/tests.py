@@ -1,3 +1,39 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from benchmarks.scenarios import Fixtures
+from eduweb.instrumentation import QUERY_BUDGETS, assert_max_queries
+
+# Seeded data must not end up in the shared file cache
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class QueryBudgetTests(TestCase):
+    """The student pages stay within settings.INSTRUMENTATION_QUERY_BUDGETS."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_bulky_data', seed=1, stdout=StringIO())
+        cls.student = Fixtures().student
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.student)
+        # The first request of a session also loads the access record
+        self.client.get(reverse('students:dashboard'))
+
+    def assert_within_budget(self, view):
+        assert_max_queries(view, QUERY_BUDGETS[view], client=self.client)
+
+    def test_dashboard(self):
+        self.assert_within_budget('students:dashboard')
+
+    def test_grades(self):
+        self.assert_within_budget('students:grades')
+
+    def test_progress(self):
+        self.assert_within_budget('students:progress')
@@ -23,6 +23,14 @@ urlpatterns = [
         'courses/<slug:course_slug>/lessons/<slug:lesson_slug>/complete/',
         views.mark_lesson_complete, name='mark_lesson_complete',
     ),
+    path(
+        'courses/<slug:course_slug>/lessons/<slug:lesson_slug>/video/',
+        views.lesson_media, {'kind': 'video'}, name='lesson_video',
+    ),
+    path(
+        'courses/<slug:course_slug>/lessons/<slug:lesson_slug>/material/',
+        views.lesson_media, {'kind': 'file'}, name='lesson_material',
+    ),
 
     # ── Assignments ──────────────────────────────────────────────────────────
     path('assignments/', views.assignments, name='assignments'),
@@ -51,12 +59,14 @@ urlpatterns = [
     # ── Community ────────────────────────────────────────────────────────────
     path('community/', views.community, name='community'),
     path('community/thread/<int:thread_id>/', views.thread_detail, name='thread_detail'),
+    path('community/thread/<int:thread_id>/events/', views.thread_events, name='thread_events'),
     path('community/create/', views.create_thread, name='create_thread'),
 
     # ── Study Groups ─────────────────────────────────────────────────────────
     path('study-groups/', views.study_groups, name='study_groups'),
     path('study-groups/create/', views.create_study_group, name='create_study_group'),  # NEW
     path('study-groups/<int:group_id>/', views.study_group_detail, name='study_group_detail'),
+    path('study-groups/<int:group_id>/events/', views.study_group_events, name='study_group_events'),
     path('study-groups/<int:group_id>/join/', views.join_study_group, name='join_study_group'),
 
     # ── Achievements ─────────────────────────────────────────────────────────
@@ -68,6 +78,10 @@ urlpatterns = [
 
     # ── Certificates ─────────────────────────────────────────────────────────
     path('certificates/', views.certificates, name='certificates'),
+    path(
+        'certificates/<str:certificate_id>/download/',
+        views.certificate_download, name='certificate_download',
+    ),
 
     # ── Profile & Settings ───────────────────────────────────────────────────
     path('profile/', views.profile, name='profile'),
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from django.db.models import Q, Count, Avg, Prefetch, Max, Sum, F
 from django.utils import timezone
@@ -9,6 +10,8 @@ from functools import wraps
 from datetime import timedelta
 from decimal import Decimal
 
+from eduweb import conversations, events, listing, media, timeseries, uploads
+from eduweb.access import get_access
 from eduweb.models import (
     LMSCourse, Enrollment, Lesson, LessonProgress,
     CourseCategory, Assignment, AssignmentSubmission,
@@ -37,15 +40,17 @@ def student_required(view_func):
             )
             return redirect('eduweb:auth_page')
         
+        access = get_access(request)
+
         # Check if user has profile
-        if not hasattr(request.user, 'profile'):
+        if not access.has_profile:
             messages.error(
                 request, 
                 'Profile not found. Please contact support.'
             )
             return redirect('eduweb:index')
         
-        if request.user.profile.role != 'student':
+        if access.role != 'student':
             messages.error(
                 request, 
                 'Access denied. Students only.'
@@ -57,14 +62,12 @@ def student_required(view_func):
             )
 
         # Block access if application hasn't been approved yet
-        from eduweb.models import CourseApplication
-        application = CourseApplication.objects.filter(user=request.user).first()
-        if not application or not application.can_access_student_portal():
+        if not access.can_access_portal:
             messages.warning(
                 request,
                 'Your application is still being processed. You cannot access the student portal yet.'
             )
-            if application:
+            if access.has_application:
                 return redirect('eduweb:application_status')
             return redirect('eduweb:apply')
         
@@ -112,20 +115,14 @@ def dashboard(request):
                     to_attr='all_lessons'
                 )
             )
-            .order_by('-last_accessed')[:5]
-        )
-        
-        # Add progress data to each enrollment
-        for enrollment in enrollments:
-            completed_count = (
-                LessonProgress.objects
-                .filter(
-                    enrollment=enrollment,
-                    is_completed=True
+            .annotate(
+                completed_lessons_count=Count(
+                    'lesson_progress',
+                    filter=Q(lesson_progress__is_completed=True)
                 )
-                .count()
             )
-            enrollment.completed_lessons_count = completed_count
+            .order_by('-last_accessed')[:5]
+        )
         
         # Get pending assignments
         pending_assignments = (
@@ -649,6 +646,47 @@ def lesson_view(request, course_slug, lesson_slug):
 
     return render(request, 'students/lesson.html', context)
 
+@login_required
+def lesson_media(request, course_slug, lesson_slug, kind):
+    """
+    Lesson video (inline, Range-aware for seeking) or downloadable material.
+    Open to enrolled students, preview lessons, the course instructor and staff.
+    """
+    lesson = get_object_or_404(
+        Lesson.objects.select_related('course'),
+        course__slug=course_slug,
+        slug=lesson_slug,
+        is_active=True,
+    )
+    user = request.user
+    allowed = (
+        lesson.is_preview
+        or user.is_staff
+        or lesson.course.instructor_id == user.id
+        or get_access(request).role == 'admin'
+        or Enrollment.objects.filter(
+            student=user, course=lesson.course, status__in=['active', 'completed'],
+        ).exists()
+    )
+    if not allowed:
+        raise PermissionDenied
+
+    if kind == 'video':
+        return media.serve_file(request, lesson.video_file)
+    return media.serve_file(request, lesson.file, as_attachment=True)
+
+
+@login_required
+def certificate_download(request, certificate_id):
+    """Certificate file for its owner once the fee is paid, or for staff."""
+    certificate = get_object_or_404(Certificate, certificate_id=certificate_id)
+    user = request.user
+    is_staff = user.is_staff or get_access(request).role == 'admin'
+    if not is_staff and (certificate.student_id != user.id or not certificate.is_paid()):
+        raise PermissionDenied
+    return media.serve_file(request, certificate.certificate_file, as_attachment=True)
+
+
 @login_required
 @student_required
 def mark_lesson_complete(request, course_slug, lesson_slug):
@@ -940,7 +978,8 @@ def submit_assignment(request, course_slug, assignment_slug):
         )
     
     if request.method == 'POST':
-        form = AssignmentSubmissionForm(request.POST, request.FILES)
+        files = uploads.request_files(request, {'attachment': 'assignment_submission'})
+        form = AssignmentSubmissionForm(request.POST, files)
         
         if form.is_valid():
             try:
@@ -966,8 +1005,8 @@ def submit_assignment(request, course_slug, assignment_slug):
                     submission.is_late = is_overdue
                 
                 # Handle file upload
-                if 'attachment' in request.FILES:
-                    submission.attachment = request.FILES['attachment']
+                if form.cleaned_data.get('attachment'):
+                    submission.attachment = form.cleaned_data['attachment']
                 
                 submission.save()
                 
@@ -1479,9 +1518,9 @@ def thread_detail(request, thread_id):
     thread.refresh_from_db()
     
     # Get replies
-    replies = thread.replies.select_related(
+    replies = list(thread.replies.select_related(
         'author'
-    ).order_by('created_at')
+    ).order_by('created_at'))
     
     # Handle new reply with form
     if request.method == 'POST':
@@ -1515,11 +1554,22 @@ def thread_detail(request, thread_id):
         'thread': thread,
         'replies': replies,
         'reply_form': form,
+        'events_since': max((reply.pk for reply in replies), default=0),
     }
     
     return render(request, 'students/thread_detail.html', context)
 
 
+@login_required
+@student_required
+def thread_events(request, thread_id):
+    """Live feed of new replies to a discussion thread (Server-Sent Events)."""
+    thread = get_object_or_404(Discussion, id=thread_id)
+    return events.respond(
+        request, 'discussion', thread.pk, 'students/thread_reply.html', 'reply',
+    )
+
+
 @login_required
 @student_required
 def create_thread(request):
@@ -1662,13 +1712,15 @@ def study_group_detail(request, group_id):
     else:
         form = StudyGroupMessageForm()
 
-    # Fetch group messages (latest 50)
-    group_messages = (
+    # Fetch group messages (latest 50, oldest first); newer ones arrive
+    # over the live feed
+    group_messages = list(
         StudyGroupMessage.objects
         .filter(study_group=group)
         .select_related('author')
-        .order_by('created_at')[:50]
-    )
+        .order_by('-pk')[:50]
+    ) if is_member else []
+    group_messages.reverse()
     
     member_count = members.count()
     context = {
@@ -1679,12 +1731,27 @@ def study_group_detail(request, group_id):
         'member_count': member_count,
         'available_slots': group.max_members - member_count,
         'message_form': form if is_member else None,
-        'group_messages': group_messages if is_member else [],
+        'group_messages': group_messages,
+        'events_since': group_messages[-1].pk if group_messages else 0,
     }
     
     return render(request, 'students/study_group_detail.html', context)
 
 
+@login_required
+@student_required
+def study_group_events(request, group_id):
+    """Live feed of new group messages (Server-Sent Events, members only)."""
+    group = get_object_or_404(StudyGroup, id=group_id)
+    if not StudyGroupMember.objects.filter(
+        study_group=group, user=request.user, is_active=True,
+    ).exists():
+        raise PermissionDenied
+    return events.respond(
+        request, 'study_group', group.pk, 'students/study_group_message.html', 'msg',
+    )
+
+
 @login_required
 @student_required
 def join_study_group(request, group_id):
@@ -1807,21 +1874,34 @@ def grades(request):
         Enrollment.objects
         .filter(student=user)
         .select_related('course', 'course__instructor')
-        .prefetch_related('course__lessons')
+        .annotate(active_lessons=Count('course__lessons', filter=Q(course__lessons__is_active=True)))
         .order_by('-enrolled_at')
     )
     
+    # Completed lessons and average grade per enrollment, one query each
+    completed = dict(
+        LessonProgress.objects
+        .filter(enrollment__student=user, is_completed=True)
+        .values('enrollment')
+        .annotate(count=Count('pk'))
+        .values_list('enrollment', 'count')
+    )
+    from django.db.models import FloatField
+    course_grades = dict(
+        AssignmentSubmission.objects
+        .filter(student=user, status='graded', score__isnull=False)
+        .values('assignment__lesson__course')
+        .annotate(avg_score=Avg(
+            F('score') * 100.0 / F('assignment__max_score'),
+            output_field=FloatField()
+        ))
+        .values_list('assignment__lesson__course', 'avg_score')
+    )
+    
     # Add progress data to each enrollment
     for enrollment in enrollments:
-        # Get completed lessons count
-        completed_count = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).count()
-        
-        total_lessons = enrollment.course.lessons.filter(
-            is_active=True
-        ).count()
+        completed_count = completed.get(enrollment.pk, 0)
+        total_lessons = enrollment.active_lessons
         
         # Calculate progress percentage
         enrollment.completed_lessons = completed_count
@@ -1831,21 +1911,8 @@ def grades(request):
             else 0
         )
         
-        # Get current grade (average of graded assignments)
-        from django.db.models import FloatField
-        grade_data = AssignmentSubmission.objects.filter(
-            student=user,
-            assignment__lesson__course=enrollment.course,
-            status='graded',
-            score__isnull=False
-        ).aggregate(
-            avg_score=Avg(
-                F('score') * 100.0 / F('assignment__max_score'),
-                output_field=FloatField()
-            )
-        )
-        
-        enrollment.current_grade = grade_data['avg_score']
+        # Current grade (average of graded assignments)
+        enrollment.current_grade = course_grades.get(enrollment.course_id)
     
     # Get graded assignment submissions
     submissions = (
@@ -1892,29 +1959,41 @@ def progress(request):
         .select_related('course', 'course__instructor')
         .prefetch_related(
             'course__sections',
-            'course__sections__lessons',
             'course__lessons'
         )
+        .annotate(
+            assignment_count=Count('course__lessons__assignments', distinct=True),
+            quiz_count=Count('course__lessons__quizzes', distinct=True),
+        )
         .order_by('-enrolled_at')
     )
     
-    # Add detailed progress data to each enrollment
+    # Completed lessons of every enrollment in one query
+    completed_by_enrollment = {}
+    completed_progress = (
+        LessonProgress.objects
+        .filter(enrollment__student=user, is_completed=True)
+        .order_by()
+        .values_list('enrollment_id', 'lesson_id')
+    )
+    for enrollment_id, lesson_id in completed_progress:
+        completed_by_enrollment.setdefault(enrollment_id, set()).add(lesson_id)
+    
+    # Add detailed progress data to each enrollment (prefetched, no queries)
     for enrollment in enrollments:
-        # Get completed lessons
-        completed_progress = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).values_list('lesson_id', flat=True)
-        
-        enrollment.completed_lesson_ids = set(completed_progress)
+        enrollment.completed_lesson_ids = completed_by_enrollment.get(enrollment.pk, set())
         
         # Count completed lessons
-        enrollment.completed_lessons = len(completed_progress)
+        enrollment.completed_lessons = len(enrollment.completed_lesson_ids)
+        
+        # Active lessons of the course, by section
+        lessons_by_section = {}
+        for lesson in enrollment.course.lessons.all():
+            if lesson.is_active:
+                lessons_by_section.setdefault(lesson.section_id, []).append(lesson)
         
         # Calculate progress percentage
-        total_lessons = enrollment.course.lessons.filter(
-            is_active=True
-        ).count()
+        total_lessons = sum(len(lessons) for lessons in lessons_by_section.values())
         
         enrollment.progress_percentage = (
             (enrollment.completed_lessons / total_lessons * 100) 
@@ -1924,8 +2003,8 @@ def progress(request):
         
         # Add section progress
         for section in enrollment.course.sections.all():
-            section_lessons = section.lessons.filter(is_active=True)
-            total = section_lessons.count()
+            section_lessons = lessons_by_section.get(section.pk, [])
+            total = len(section_lessons)
             completed = sum(
                 1 for lesson in section_lessons 
                 if lesson.id in enrollment.completed_lesson_ids
@@ -1934,38 +2013,29 @@ def progress(request):
                 (completed / total * 100) if total > 0 else 0
             )
             section.total_lessons = total
-
-        enrollment.assignment_count = Assignment.objects.filter(
-            lesson__course=enrollment.course
-        ).count()
-        enrollment.quiz_count = Quiz.objects.filter(
-            lesson__course=enrollment.course
-        ).count()
     
-    # Calculate learning activity for last 28 days
-    from datetime import datetime, timedelta
-    today = timezone.now().date()
+    # Learning activity for the last 28 days: one GROUP BY per activity
+    today = timezone.localdate()
     start_date = today - timedelta(days=27)  # 28 days including today
     
+    lessons_series = timeseries.time_series(
+        LessonProgress.objects.filter(enrollment__student=user),
+        'completed_at', start_date, today,
+    )
+    assignments_series = timeseries.time_series(
+        AssignmentSubmission.objects.filter(student=user),
+        'submitted_at', start_date, today,
+    )
+    quizzes_series = timeseries.time_series(
+        QuizAttempt.objects.filter(student=user),
+        'started_at', start_date, today,
+    )
+    
     activity_data = []
-    for i in range(28):
-        date = start_date + timedelta(days=i)
-        
-        # Count activities for this day
-        lessons_completed = LessonProgress.objects.filter(
-            enrollment__student=user,
-            completed_at__date=date
-        ).count()
-        
-        assignments_submitted = AssignmentSubmission.objects.filter(
-            student=user,
-            submitted_at__date=date
-        ).count()
-        
-        quizzes_taken = QuizAttempt.objects.filter(
-            student=user,
-            started_at__date=date
-        ).count()
+    for lessons, assignments, quizzes in zip(lessons_series, assignments_series, quizzes_series):
+        lessons_completed = lessons['count']
+        assignments_submitted = assignments['count']
+        quizzes_taken = quizzes['count']
         
         # Calculate activity level (0-3)
         total_activities = (
@@ -1984,7 +2054,7 @@ def progress(request):
             level = 3
         
         activity_data.append({
-            'date': date,
+            'date': lessons['bucket'],
             'level': level,
             'count': total_activities,
             'lessons': lessons_completed,
@@ -2479,39 +2549,27 @@ def my_payments(request):
 @student_required
 def inbox(request):
     """
-    Student inbox.  Shows received & sent messages (root messages only).
-    Marks all unread received messages as read when the page is opened.
+    Student inbox: one row per conversation, newest activity first.
+    ?folder=sent lists the threads the student started. Threads are
+    marked read when opened, not here.
     """
     user = request.user
+    folder = 'sent' if request.GET.get('folder') == 'sent' else 'inbox'
+    mailbox = conversations.mailbox(user)
 
-    received = (
-        Message.objects
-        .filter(recipient=user, parent__isnull=True)
-        .select_related('sender')
-        .order_by('-created_at')
-    )
-
-    sent = (
-        Message.objects
-        .filter(sender=user, parent__isnull=True)
-        .select_related('recipient')
-        .order_by('-created_at')
+    threads = listing.keyset_page(
+        request,
+        conversations.threads(user, folder),
+        conversations.INBOX_ORDERING,
+        per_page=20,
+        total=mailbox.started_count if folder == 'sent' else mailbox.thread_count,
     )
 
-    # Grab the unread count BEFORE we mark them read (for flash badge)
-    unread_count = received.filter(is_read=False).count()
-
-    # Mark all unread as read
-    Message.objects.filter(
-        recipient=user,
-        is_read=False,
-    ).update(is_read=True, read_at=timezone.now())
-
     context = {
         'page_title': 'My Inbox',
-        'received': received,
-        'sent': sent,
-        'unread_count': unread_count,
+        'threads': threads,
+        'folder': folder,
+        'unread_count': mailbox.unread_count,
     }
     return render(request, 'students/inbox.html', context)
 
@@ -2530,7 +2588,7 @@ def compose_message(request):
         if form.is_valid():
             msg = form.save(commit=False)
             msg.sender = request.user
-            msg.save()
+            conversations.send(msg)
             messages.success(request, 'Message sent successfully!')
             _notify(
                 user=msg.recipient,
@@ -2565,25 +2623,25 @@ def compose_message(request):
 def message_thread(request, message_id):
     """
     View a full message thread and reply to it.
-    Only the sender or recipient can access.
+    Only participants of the conversation can access.
     """
     msg = get_object_or_404(
-        Message.objects.select_related('sender', 'recipient'),
+        Message.objects.select_related('sender', 'recipient', 'parent'),
         pk=message_id,
     )
-
-    # Security: only sender or recipient may view
-    if msg.sender != request.user and msg.recipient != request.user:
+    conversation = conversations.for_participant(msg, request.user)
+    # Security: only participants may view
+    if conversation is None:
         messages.error(request, 'You do not have permission to view this message.')
         return redirect('students:inbox')
 
-    # Mark as read if current user is the recipient
-    if msg.recipient == request.user and not msg.is_read:
-        msg.mark_as_read()
+    if conversation.root_id and conversation.root_id != msg.pk:
+        msg = conversation.root
+    conversations.mark_read(conversation, request.user)
 
     thread_replies = (
-        Message.objects
-        .filter(parent=msg)
+        conversation.messages
+        .exclude(pk=msg.pk)
         .select_related('sender', 'recipient')
         .order_by('created_at')
     )
@@ -2592,13 +2650,13 @@ def message_thread(request, message_id):
         body = request.POST.get('body', '').strip()
         if len(body) >= 5:
                 reply_to = msg.sender if msg.recipient == request.user else msg.recipient
-                Message.objects.create(
+                conversations.send(Message(
                     sender=request.user,
                     recipient=reply_to,
                     subject=f'Re: {msg.subject}',
                     body=body,
                     parent=msg,
-                )
+                ))
                 messages.success(request, 'Reply sent!')
                 _notify(
                     user=reply_to,
@@ -2609,7 +2667,7 @@ def message_thread(request, message_id):
                 )
                 from eduweb.emailservices import send_new_message_email
                 send_new_message_email(reply_to, request.user, msg)
-                return redirect('students:message_thread', message_id=message_id)
+                return redirect('students:message_thread', message_id=msg.pk)
         messages.error(request, 'Reply must be at least 5 characters.')
 
     return render(request, 'students/message_thread.html', {